@@ -0,0 +1,175 @@
+"""
+Content-addressed store for downloaded files
+
+Every downloaded file is kept once under objects/<ab>/<sha256>, hashed while
+it streams to disk. Product folders get hardlinks (or symlinks) to the blob
+instead of copies, and a URL index records which blob each URL produced, so a
+URL fetched for one product is not fetched again for its color variants or
+sets that link the same 商品図 and 分解図 PDFs. The index also keeps the
+ETag and Last-Modified validators of each URL for conditional re-downloads.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    filename TEXT,
+    fetched_at REAL NOT NULL,
+    etag TEXT,
+    last_modified TEXT
+);
+"""
+
+# Columns added after the first release, with their types
+ADDED_COLUMNS = {'etag': 'TEXT', 'last_modified': 'TEXT'}
+
+INDEX_FILE = "index.sqlite3"
+
+
+class BlobStore:
+    """SHA-256 keyed file store with a URL index.
+
+    The index connection is shared by the download threads, so every
+    statement runs under a lock.
+    """
+
+    def __init__(self, root, link_mode="hardlink"):
+        self.root = root
+        self.link_mode = link_mode
+        self.objects_dir = os.path.join(root, "objects")
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, INDEX_FILE), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(urls)")}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE urls ADD COLUMN {column} {column_type}")
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def blob_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def has_blob(self, sha256):
+        return os.path.exists(self.blob_path(sha256))
+
+    def lookup(self, url):
+        """Return the index row for url as a dict, or None if the URL or its blob is unknown"""
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is None or not self.has_blob(row['sha256']):
+            return None
+        return dict(row)
+
+    def last_fetched(self, urls=(), filenames=()):
+        """Return the newest fetched_at of the given URLs or stored filenames, or None if none is indexed"""
+        urls, filenames = list(urls), list(filenames)
+        if not urls and not filenames:
+            return None
+        where = []
+        if urls:
+            where.append(f"url IN ({', '.join('?' * len(urls))})")
+        if filenames:
+            where.append(f"filename IN ({', '.join('?' * len(filenames))})")
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT MAX(fetched_at) AS fetched_at FROM urls WHERE {' OR '.join(where)}", urls + filenames
+            ).fetchone()
+        return row['fetched_at']
+
+    def remember(self, url, sha256, size, filename=None, etag=None, last_modified=None):
+        """Record that url produced the blob sha256, with the response's validators"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO urls (url, sha256, size, filename, fetched_at, etag, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, sha256, size, filename, time.time(), etag, last_modified)
+            )
+            self.conn.commit()
+
+    def touch(self, url):
+        """Mark url as checked now, after the server answered 304 Not Modified"""
+        with self.lock:
+            self.conn.execute("UPDATE urls SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+
+    def write_stream(self, chunks):
+        """Write an iterable of byte chunks into the store, hashing it on the way.
+
+        Returns (sha256, size). A blob that is already stored is kept and
+        the new copy discarded.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    if chunk:
+                        digest.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            sha256 = digest.hexdigest()
+            blob_path = self.blob_path(sha256)
+            if os.path.exists(blob_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(tmp_path, blob_path)
+            return sha256, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def holds(self, path, sha256):
+        """True if path already has the content of blob sha256"""
+        try:
+            if os.path.samefile(path, self.blob_path(sha256)):
+                return True
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(65536), b''):
+                    digest.update(chunk)
+            return digest.hexdigest() == sha256
+        except OSError:
+            return False
+
+    def link(self, sha256, dest_path):
+        """Place blob sha256 at dest_path as a hardlink or symlink, copying when neither works"""
+        blob_path = self.blob_path(sha256)
+        tmp_path = f"{dest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        modes = ["hardlink", "symlink"] if self.link_mode == "hardlink" else ["symlink", "hardlink"]
+        for mode in modes + ["copy"]:
+            try:
+                if mode == "hardlink":
+                    os.link(blob_path, tmp_path)
+                elif mode == "symlink":
+                    os.symlink(os.path.abspath(blob_path), tmp_path)
+                else:
+                    shutil.copyfile(blob_path, tmp_path)
+                os.replace(tmp_path, dest_path)
+                return mode
+            except OSError:
+                if os.path.lexists(tmp_path):
+                    os.remove(tmp_path)
+        raise OSError(f"Could not place blob {sha256} at {dest_path}")
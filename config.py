@@ -5,6 +5,33 @@ WEBSITE_URL = "https://www.com-et.com/jp/"
 SEARCH_TIMEOUT = 10  # seconds to wait for search results
 PAGE_LOAD_TIMEOUT = 5  # seconds to wait for page loads
 
+# Direct search URLs. Searches open item_search with the query in the URL and
+# every result page is requested by its page_num (0-based) instead of typing
+# into the search box and clicking 次へ. SEARCH_PARAMS are the defaults of the
+# site's search form: 商品画像表示, 前方一致, 販売終了品を含む.
+DIRECT_SEARCH = True
+SEARCH_URL = "https://www.com-et.com/jp/item_search/"
+SEARCH_PARAMS = {"with_img": "1", "kensaku_info": "2", "isHaiban": "1"}
+SEARCH_PAGE_SIZE = 10  # results per page requested; the site shows 10
+SEARCH_PAGE_SIZE_PARAM = None  # query parameter for the page size, if the site accepts one
+SEARCH_PAGE_FETCHERS = 4  # result pages fetched over HTTP ahead of the page being processed
+COLOR_VARIATION_FETCHERS = 4  # color variation pages fetched over HTTP in parallel
+
+# Readiness profiles per page type. Waits return as soon as the document has
+# loaded and one of the selectors is present (an empty list only needs the
+# document). network_idle_ms additionally waits for that long without new
+# network requests; 0 skips that check.
+READY_PROFILES = {
+    "home": {"timeout": 10, "selectors": ["div.searchArea.incSearchOptions input#searchBox"], "network_idle_ms": 0},
+    "search_results": {"timeout": 15, "selectors": ["table.productTable", "ul.pageing", "section.searchInfo"], "network_idle_ms": 300},
+    "color_variations": {"timeout": 15, "selectors": ["table.productTable", "section.searchInfo"], "network_idle_ms": 300},
+    "specs": {"timeout": 10, "selectors": ["section.spec table", "[class*='spec'] table"], "network_idle_ms": 0},
+    "components": {"timeout": 10, "selectors": [".setPartsBox_content", "table"], "network_idle_ms": 0},
+    "bunkaizu": {"timeout": 10, "selectors": ["a.btn.md-pdfBtn"], "network_idle_ms": 0},
+    "diagram": {"timeout": 5, "selectors": [], "network_idle_ms": 0},
+    "new_window": {"timeout": 5},
+}
+
 # Browser settings
 BROWSER_OPTIONS = {
     "headless": False,  # Set to False for debugging
@@ -30,15 +57,68 @@ BROWSER_OPTIONS = {
     "disable_software_rasterizer": True
 }
 
+# Lightweight crawl profile: the crawler only reads text and hrefs, so images,
+# fonts, analytics and UI plugin scripts are blocked through CDP
+# Network.setBlockedURLs, images are not decoded and page loads return at
+# DOMContentLoaded ("eager")
+CRAWL_PROFILE = True
+PAGE_LOAD_STRATEGY = "eager"
+CRAWL_BLOCKED_URLS = [
+    # Images and fonts
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # Analytics and tag managers
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+    "*gtm.js*", "*facebook.net*", "*vw.min.js*",
+    # UI plugins the crawler never uses
+    "*jquery.colorbox*", "*easyselectbox.js*", "*ajaxzip3.js*", "*clipboard.min.js*", "*jquery.bxslider*",
+    "*perfect-scrollbar*", "*jquery.tooltipster*", "*smoothScroll.js*", "*recommend.js*", "*promotion.js*",
+]
+# Page URL pattern (fnmatch syntax) -> blocked patterns to let through on matching pages
+CRAWL_PROFILE_ALLOWLIST = {
+    "*search.toto.jp/img/*": ["*.png", "*.jpg", "*.jpeg", "*.gif"],
+}
+
+# Keep browsers open between searches instead of starting Chrome for every search
+KEEP_BROWSER_WARM = True
+DRIVER_CACHE_FILE = "driver_cache.json"  # stored in OUTPUT_DIR; caches the chromedriver path and working startup method
+
+# Read static pages (仕様一覧, 構成品, 分解図) over plain HTTP, using the browser only as a fallback
+HTTP_FAST_PATH = True
+
+# Parallel processing settings
+WORKER_COUNT = 1  # number of browser workers processing products; 1 processes them on the search browser
+
 # File download settings
 DOWNLOAD_TIMEOUT = 30  # seconds for file downloads
 CHUNK_SIZE = 8192  # bytes per chunk for streaming downloads
+HTTP_POOL_HOSTS = 4  # hosts with their own keep-alive connection pool
+HTTP_POOL_SIZE = 10  # connections kept alive per host
+HTTP_RETRIES = 3  # retries for connection errors and 429/5xx responses
+HTTP_BACKOFF_FACTOR = 0.5  # seconds; retry delays grow as 0.5, 1, 2, ...
+DOWNLOAD_WORKERS = 6  # files downloaded in the background at the same time
+DOWNLOADS_PER_HOST = 3  # concurrent downloads per host
+DOWNLOAD_QUEUE_LIMIT = 50  # queued downloads before the crawl waits for them
+BLOB_STORE_DIR = "blobs"  # in OUTPUT_DIR; each file is stored once by SHA-256 and linked into product folders; None disables it
+BLOB_LINK_MODE = "hardlink"  # "hardlink" or "symlink"; falls back to the other, then to a copy
+BROWSER_FETCH_CHUNK_BYTES = 1024 * 1024  # bytes read back per WebDriver call when a file has to be fetched inside the browser
+DOWNLOAD_REVALIDATE_SECONDS = 12 * 3600  # stored files younger than this are reused without a request; older ones are re-checked with If-None-Match/If-Modified-Since
 SUPPORTED_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff']
 
 # Directory settings
 OUTPUT_DIR = "output"
 DIAGRAM_FOLDER_NAME = "商品図"
 
+# Crawl state settings
+STATE_DB_FILE = "crawl_state.sqlite3"  # stored in OUTPUT_DIR; set to None to disable resumable runs
+SKIP_COMPLETED_PRODUCTS = True  # skip products whose steps all finished in an earlier run
+
+# Parsed page cache settings
+PARSE_CACHE_FILE = "parse_cache.sqlite3"  # in OUTPUT_DIR; parsed 仕様一覧, 構成品 and カラー pages shared between products; None keeps them in memory only
+PARSE_CACHE_MEMORY_ENTRIES = 256  # parsed pages kept in memory, least recently used dropped first
+PARSE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # size of the on-disk cache before the least recently used pages are dropped
+PARSE_CACHE_TTL_SECONDS = 24 * 3600  # parsed pages older than this are read again
+
 # Search patterns for finding product links
 PRODUCT_LINK_PATTERNS = [
     "a[href*='product']",
@@ -63,8 +143,15 @@ SEARCH_INPUT_PATTERNS = [
 GUI_TITLE = "COM-ET Product Diagram Downloader"
 GUI_SIZE = "800x600"
 GUI_BG_COLOR = "#f0f0f0"
+GUI_EVENT_INTERVAL_MS = 100  # how often the window applies progress events from the crawl
+GUI_MAX_EVENTS_PER_TICK = 500  # events applied per refresh; the rest wait for the next one
+GUI_MAX_LOG_LINES = 5000  # older lines are dropped from the results area
 
 # Logging settings
-ENABLE_LOGGING = True
-LOG_LEVEL = "INFO"
-LOG_FILE = "crawler.log" 
\ No newline at end of file
+ENABLE_LOGGING = True  # write LOG_FILE and the per-search log_*.txt files
+LOG_LEVEL = "INFO"  # DEBUG adds per-cell table dumps and pagination diagnostics
+LOG_FILE = "crawler.log"  # in OUTPUT_DIR, covers all searches
+LOG_FORMAT = "text"  # "text" or "json" (one JSON object per line)
+LOG_MAX_BYTES = 10 * 1024 * 1024  # rotate log files at this size
+LOG_BACKUP_COUNT = 5  # rotated files kept per log
+LOG_FLUSH_INTERVAL = 1.0  # seconds between background flushes to disk
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Headless batch entry point for the COM-ET crawler
+
+Runs a list of product IDs through CrawlEngine without creating a tkinter
+window and writes one JSON object per line to stdout for each progress event.
+
+Usage:
+    python -m crawl_cli ids.txt
+    cat ids.txt | python -m crawl_cli -
+
+Input has one product ID per line; blank lines and lines starting with # are
+ignored, and repeated IDs are only searched once. IDs are read as they
+arrive, so the first search starts before the input ends. A search fails when
+it raises or when it found products but none of them downloaded anything or
+was already complete from an earlier run. The exit status is 0 when every
+search succeeded, 1 when any search failed and 130 when interrupted.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+
+import config
+from crawl_engine import CrawlEngine
+
+
+def read_product_ids(stream):
+    """Yield product IDs from a text stream as they are read, skipping blanks, comments and repeats"""
+    seen = set()
+    for line in stream:
+        product_id = line.strip()
+        if not product_id or product_id.startswith('#') or product_id in seen:
+            continue
+        seen.add(product_id)
+        yield product_id
+
+
+class BatchCrawler(CrawlEngine):
+    """CrawlEngine that reports progress as JSON lines"""
+
+    def __init__(self, output_dir=None, stream=None, verbose=False):
+        self.stream = stream or sys.stdout
+        self.verbose = verbose
+        self.current_product_id = None
+        self.emit_lock = threading.Lock()
+        super().__init__(output_dir)
+
+    def emit(self, event, **fields):
+        """Write one progress event as a JSON line"""
+        record = {'event': event, 'time': round(time.time(), 3)}
+        if self.current_product_id is not None:
+            record['product_id'] = self.current_product_id
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False)
+        with self.emit_lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+
+    def update_status(self, message):
+        self.emit('status', message=message)
+
+    def update_results(self, message):
+        if self.verbose:
+            self.emit('log', message=message.rstrip('\n'))
+
+    def update_progress(self, value):
+        self.emit('progress', percent=value)
+
+    def crawl(self, product_ids):
+        """Search every product ID of an iterable in turn and return the number of failed searches.
+
+        A search fails with status 'error' when it raises and with status
+        'no_downloads' when it found products but none of them downloaded
+        something or was skipped as complete. Searches with status 'ok' or
+        'no_results' (nothing found) do not fail.
+        """
+        total = errors = empty = 0
+        self.emit('batch_start')
+        for product_id in product_ids:
+            total += 1
+            self.current_product_id = product_id
+            started = time.time()
+            self.emit('search_start', index=total)
+            try:
+                log_file = self.start_log(product_id)
+                summary = self.perform_search(product_id)
+                if summary.downloaded or summary.skipped:
+                    status = 'ok'
+                elif summary.failed:
+                    status = 'no_downloads'
+                    empty += 1
+                else:
+                    status = 'no_results'
+                self.emit('search_done', status=status, downloaded=summary.downloaded,
+                          skipped=summary.skipped, failed=summary.failed,
+                          seconds=round(time.time() - started, 1), log_file=log_file)
+            except Exception as e:
+                errors += 1
+                self.emit('search_done', status='error', error=str(e),
+                          seconds=round(time.time() - started, 1), log_file=self.log_file_path)
+        self.current_product_id = None
+        self.emit('batch_done', total=total, failed=errors + empty, errors=errors, no_downloads=empty)
+        return errors + empty
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m crawl_cli',
+        description="Download COM-ET product diagrams for a list of product IDs without the GUI."
+    )
+    parser.add_argument('input', nargs='?', default='-',
+                        help="file with one product ID per line, or - for stdin (default)")
+    parser.add_argument('--output-dir', default=None,
+                        help=f"directory for downloads and logs (default: {config.OUTPUT_DIR})")
+    parser.add_argument('--workers', type=int, default=None,
+                        help=f"browser workers per search (default: {config.WORKER_COUNT})")
+    parser.add_argument('--show-browser', action='store_true',
+                        help="run Chrome with a visible window instead of headless")
+    parser.add_argument('--verbose', action='store_true',
+                        help="also emit every log message as a 'log' event")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    config.BROWSER_OPTIONS['headless'] = not args.show_browser
+    if args.workers is not None:
+        config.WORKER_COUNT = max(1, args.workers)
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    crawler = BatchCrawler(output_dir=args.output_dir, verbose=args.verbose)
+    try:
+        failures = crawler.crawl(read_product_ids(input_file))
+    except KeyboardInterrupt:
+        crawler.emit('interrupted')
+        return 130
+    finally:
+        crawler.close_browsers()
+        if input_file is not sys.stdin:
+            input_file.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
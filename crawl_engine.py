@@ -0,0 +1,3513 @@
+"""
+Crawl engine for COM-ET product diagrams
+
+CrawlEngine holds the whole crawl (search, pagination, product processing,
+downloads and template generation) without any GUI dependency. Front ends
+such as the tkinter window in com_et_crawler.py or the batch CLI in
+crawl_cli.py subclass it and override the update_* hooks.
+"""
+
+import atexit
+import base64
+import fnmatch
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse, urlencode
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+from bs4 import BeautifulSoup
+import re
+import json
+import config
+import crawl_events
+import crawl_logging
+import crawl_metrics
+import http_session
+import crawl_state
+from download_scheduler import DownloadScheduler
+import page_parsers
+import page_scripts
+import parse_cache
+import product_ids
+from blob_store import BlobStore
+from crawl_metrics import RunMetrics
+from crawl_state import CrawlState
+from page_readiness import PageReady, NewWindowOrNavigation
+from parse_cache import ParseCache
+from product_ids import ProductIdClassifier
+from product_record import ImageLink, ProductRecord
+from template_renderer import TemplateRenderer
+from worker_pool import ProductWorkerPool
+from selenium.common.exceptions import TimeoutException
+
+# Outcomes of one product in a search
+PRODUCT_DOWNLOADED = "downloaded"  # processed and downloaded or generated something
+PRODUCT_SKIPPED = "skipped"  # complete from an earlier run, not processed again
+PRODUCT_FAILED = "failed"  # processed without any result
+
+# What perform_search returns: the number of products with each outcome
+SearchSummary = namedtuple('SearchSummary', [PRODUCT_DOWNLOADED, PRODUCT_SKIPPED, PRODUCT_FAILED])
+
+class CrawlEngine:
+    def __init__(self, output_dir=None, events=None):
+        self.log_file_path = None
+        
+        # Progress events for the front end (crawl_events.EventBus), if any
+        self.events = events
+        
+        # Output directory
+        self.output_dir = output_dir or config.OUTPUT_DIR
+        if not os.path.exists(self.output_dir):
+            os.makedirs(self.output_dir)
+        
+        # Buffered logging to the configured log file and per-search logs
+        self.log_pipeline = crawl_logging.get_pipeline(self.output_dir)
+        self.logger = self.log_pipeline.logger
+        
+        # Load color codes
+        self.color_codes = self.load_color_codes()
+        self.id_classifier = ProductIdClassifier(self.color_codes)
+        self.templates = TemplateRenderer(self.format_product_id_with_color, self.log_and_update)
+        
+        # Pooled keep-alive HTTP session for static pages and file downloads
+        self.metrics = RunMetrics()
+        self.blobs = BlobStore(os.path.join(self.output_dir, config.BLOB_STORE_DIR), config.BLOB_LINK_MODE) if config.BLOB_STORE_DIR else None
+        self.http_session = http_session.create_session(self.get_browser_headers())
+        
+        # File downloads run in the background while the browser moves on
+        self.downloads = DownloadScheduler(
+            self.download_for_stage,
+            max_workers=config.DOWNLOAD_WORKERS,
+            per_host_limit=config.DOWNLOADS_PER_HOST,
+            max_pending=config.DOWNLOAD_QUEUE_LIMIT
+        )
+        
+        # Browsers kept warm between searches
+        self.idle_drivers = []
+        self.driver_lock = threading.RLock()
+        self.blocked_urls = {}  # session_id -> URL patterns the browser blocks, guarded by driver_lock
+        # ChromeDriverManager downloads the driver once per run, outside driver_lock
+        self.driver_install_lock = threading.Lock()
+        self.installed_driver_path = None
+        
+        # Product outcomes of the current search, counted by the search thread and the workers
+        self.product_outcomes = Counter()
+        self.outcome_lock = threading.Lock()
+        atexit.register(self.close_browsers)
+        
+        # Crawl state for resumable runs
+        self.crawl_state = None
+        if config.STATE_DB_FILE:
+            try:
+                self.crawl_state = CrawlState(os.path.join(self.output_dir, config.STATE_DB_FILE))
+            except Exception as e:
+                self.log_and_update(f"Could not open crawl state database: {str(e)}")
+        
+        # Parsed 仕様一覧, 構成品 and カラー pages, shared by products that link the same page
+        self.page_cache = self.open_page_cache()
+    
+    def open_page_cache(self):
+        """Open the parsed page cache, keeping it in memory when the disk tier cannot be opened"""
+        options = dict(
+            memory_entries=config.PARSE_CACHE_MEMORY_ENTRIES,
+            max_bytes=config.PARSE_CACHE_MAX_BYTES,
+            ttl_seconds=config.PARSE_CACHE_TTL_SECONDS
+        )
+        if config.PARSE_CACHE_FILE:
+            try:
+                return ParseCache(os.path.join(self.output_dir, config.PARSE_CACHE_FILE), **options)
+            except Exception as e:
+                self.log_and_update(f"Could not open parsed page cache: {str(e)}")
+        return ParseCache(None, **options)
+    
+    def load_color_codes(self):
+        """Load color codes from the JSON file"""
+        try:
+            return product_ids.load_color_codes()
+        except Exception as e:
+            self.log_and_update(f"Error loading color codes: {str(e)}")
+            return {}
+    
+    def get_color_name_from_product_id(self, product_id):
+        """Extract color name from product ID using color codes mapping"""
+        try:
+            return self.id_classifier.classify(product_id).color_name
+        except Exception as e:
+            self.log_and_update(f"Error extracting color name from {product_id}: {str(e)}")
+            return ""
+    
+    def format_product_id_with_color(self, product_id):
+        """Format product ID with color name if available"""
+        try:
+            return self.id_classifier.format_with_color(product_id)
+        except Exception as e:
+            self.log_and_update(f"Error formatting product ID {product_id}: {str(e)}")
+            return product_id
+        
+    def start_log(self, product_id):
+        """Start a new log file in the output directory for a search"""
+        self.log_file_path = os.path.join(self.output_dir, f"log_{product_id}_{int(time.time())}.txt")
+        with open(self.log_file_path, "w", encoding="utf-8") as log_file:
+            log_file.write(f"--- Starting search for product ID: {product_id} at {time.ctime()} ---\n\n")
+        self.log_pipeline.start_search_log(self.log_file_path)
+        self.metrics.reset()
+        return self.log_file_path
+
+    def log_and_update(self, message, level=logging.INFO):
+        """Reports the message and queues it for the log files.
+
+        Messages below config.LOG_LEVEL are dropped before any work is done;
+        callers building expensive debug messages should check debug_enabled().
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        self.update_results(f"{message}\n")
+        self.logger.log(level, message)
+
+    def debug_enabled(self):
+        """True if debug messages are logged at the current LOG_LEVEL"""
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def build_chrome_options(self):
+        """Build Chrome options from config.BROWSER_OPTIONS"""
+        chrome_options = Options()
+        for option, value in config.BROWSER_OPTIONS.items():
+            if option == "headless" and value:
+                chrome_options.add_argument("--headless")
+            elif option == "no_sandbox" and value:
+                chrome_options.add_argument("--no-sandbox")
+            elif option == "disable_dev_shm_usage" and value:
+                chrome_options.add_argument("--disable-dev-shm-usage")
+            elif option == "disable_gpu" and value:
+                chrome_options.add_argument("--disable-gpu")
+            elif option == "window_size":
+                chrome_options.add_argument(f"--window-size={value}")
+            elif option == "user_agent":
+                chrome_options.add_argument(f"--user-agent={value}")
+            elif option == "disable_extensions" and value:
+                chrome_options.add_argument("--disable-extensions")
+            elif option == "disable_plugins" and value:
+                chrome_options.add_argument("--disable-plugins")
+            elif option == "disable_web_security" and value:
+                chrome_options.add_argument("--disable-web-security")
+            elif option == "allow_running_insecure_content" and value:
+                chrome_options.add_argument("--allow-running-insecure-content")
+            elif option == "disable_background_networking" and value:
+                chrome_options.add_argument("--disable-background-networking")
+            elif option == "disable_background_timer_throttling" and value:
+                chrome_options.add_argument("--disable-background-timer-throttling")
+            elif option == "disable_client_side_phishing_detection" and value:
+                chrome_options.add_argument("--disable-client-side-phishing-detection")
+            elif option == "disable_default_apps" and value:
+                chrome_options.add_argument("--disable-default-apps")
+            elif option == "disable_hang_monitor" and value:
+                chrome_options.add_argument("--disable-hang-monitor")
+            elif option == "disable_prompt_on_repost" and value:
+                chrome_options.add_argument("--disable-prompt-on-repost")
+            elif option == "disable_sync" and value:
+                chrome_options.add_argument("--disable-sync")
+            elif option == "metrics_recording_only" and value:
+                chrome_options.add_argument("--metrics-recording-only")
+            elif option == "no_first_run" and value:
+                chrome_options.add_argument("--no-first-run")
+            elif option == "safeBrowse_disable_auto_update" and value:
+                chrome_options.add_argument("--safeBrowse-disable-auto-update")
+            elif option == "disable_software_rasterizer" and value:
+                chrome_options.add_argument("--disable-software-rasterizer")
+        
+        # Lightweight crawl profile: no image loading or decoding, return at DOMContentLoaded
+        if config.CRAWL_PROFILE:
+            chrome_options.page_load_strategy = config.PAGE_LOAD_STRATEGY
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        return chrome_options
+
+    def create_driver(self):
+        """Create a Chrome driver, falling back through simpler setups if needed.
+
+        The resolved chromedriver path and the method that last worked are
+        cached in config.DRIVER_CACHE_FILE, so later starts skip
+        ChromeDriverManager's network lookup and go straight to that method.
+        """
+        chrome_options = self.build_chrome_options()
+        cache = self.load_driver_cache()
+
+        minimal_options = Options()
+        minimal_options.add_argument("--headless")
+        minimal_options.add_argument("--no-sandbox")
+        minimal_options.add_argument("--disable-dev-shm_usage")
+        minimal_options.add_argument("--disable-gpu")
+        minimal_options.add_argument("--disable-extensions")
+        minimal_options.add_argument("--disable-plugins")
+
+        visible_options = Options()
+        visible_options.add_argument("--no-sandbox")
+        visible_options.add_argument("--disable-dev-shm_usage")
+        visible_options.add_argument("--disable-gpu")
+        visible_options.add_argument("--disable-extensions")
+        visible_options.add_argument("--disable-plugins")
+        # Remove headless mode for debugging
+
+        # Methods 1-4 use the chromedriver resolved by ChromeDriverManager; method 5 uses the system PATH
+        methods = [
+            (1, "Initializing Chrome driver (method 1)...", chrome_options, True, "Chrome driver initialized successfully!"),
+            (3, "Trying with minimal Chrome options...", minimal_options, True, "Chrome driver initialized with minimal options!"),
+            (4, "Trying without headless mode...", visible_options, True, "Chrome driver initialized in visible mode!"),
+            (5, "Trying with system ChromeDriver...", chrome_options, False, "Chrome driver initialized from system PATH!"),
+        ]
+        cached_method = cache.get('method')
+        methods.sort(key=lambda method: method[0] != cached_method)
+
+        driver = None
+        error_messages = []
+        for number, attempt_message, options, needs_manager, success_message in methods:
+            try:
+                self.log_and_update(attempt_message)
+                if needs_manager:
+                    driver_path = self.resolve_driver_path(cache)
+                    try:
+                        driver = webdriver.Chrome(service=Service(driver_path), options=options)
+                    except Exception:
+                        if not cache.get('driver_path'):
+                            raise
+                        # A cached driver can go stale when Chrome updates; resolve it again once
+                        self.log_and_update("Cached Chrome driver failed, resolving it again...")
+                        cache.pop('driver_path', None)
+                        driver_path = self.resolve_driver_path(cache)
+                        driver = webdriver.Chrome(service=Service(driver_path), options=options)
+                else:
+                    driver = webdriver.Chrome(options=options)
+                self.log_and_update(success_message)
+                self.metrics.instrument_driver(driver)
+                self.apply_crawl_profile(driver)
+                cache['method'] = number
+                self.save_driver_cache(cache)
+                break
+            except Exception as e:
+                error_messages.append(f"Method {number} failed: {str(e)}")
+                self.log_and_update(f"Method {number} failed: {str(e)}")
+
+        if driver is None:
+            self.log_and_update("Failed to initialize Chrome driver after all attempts.")
+            raise Exception(f"All Chrome driver initialization methods failed. Errors: {'; '.join(error_messages)}. Please run 'python troubleshoot_chrome.py' for detailed diagnostics.")
+        
+        return driver
+
+    def resolve_driver_path(self, cache):
+        """Return the chromedriver path from the cache, or install it with ChromeDriverManager.
+
+        Threads starting browsers at once wait for a single install on
+        driver_install_lock instead of blocking driver_lock during the download.
+        """
+        driver_path = cache.get('driver_path')
+        if driver_path and os.path.exists(driver_path):
+            return driver_path
+        with self.driver_install_lock:
+            if not (self.installed_driver_path and os.path.exists(self.installed_driver_path)):
+                self.installed_driver_path = ChromeDriverManager().install()
+            driver_path = self.installed_driver_path
+        cache['driver_path'] = driver_path
+        cache['resolved_at'] = time.time()
+        self.save_driver_cache(cache)
+        return driver_path
+
+    def driver_cache_path(self):
+        return os.path.join(self.output_dir, config.DRIVER_CACHE_FILE)
+
+    def load_driver_cache(self):
+        """Load the cached chromedriver path and working method"""
+        if not config.DRIVER_CACHE_FILE:
+            return {}
+        try:
+            with open(self.driver_cache_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_driver_cache(self, cache):
+        if not config.DRIVER_CACHE_FILE:
+            return
+        try:
+            with self.driver_lock:
+                with open(self.driver_cache_path(), 'w', encoding='utf-8') as f:
+                    json.dump(cache, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            self.log_and_update(f"Could not save Chrome driver cache: {str(e)}")
+
+    def acquire_driver(self):
+        """Return a warm browser left by an earlier search, or start a new one"""
+        while True:
+            with self.driver_lock:
+                driver = self.idle_drivers.pop() if self.idle_drivers else None
+            if driver is None:
+                with self.metrics.stage(crawl_metrics.STAGE_DRIVER_INIT):
+                    return self.create_driver()
+            if self.reset_driver(driver):
+                self.log_and_update("Reusing warm browser session.")
+                return driver
+            self.quit_driver(driver)
+
+    def release_driver(self, driver):
+        """Keep a browser warm for the next search, or quit it when KEEP_BROWSER_WARM is off"""
+        if config.KEEP_BROWSER_WARM and self.reset_driver(driver):
+            with self.driver_lock:
+                self.idle_drivers.append(driver)
+            self.log_and_update("Browser kept warm for the next search.")
+        else:
+            self.quit_driver(driver)
+            self.log_and_update("Browser closed.")
+
+    def reset_driver(self, driver):
+        """Close extra tabs and check the browser still responds"""
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            return True
+        except Exception:
+            return False
+
+    def quit_driver(self, driver):
+        with self.driver_lock:
+            self.blocked_urls.pop(getattr(driver, 'session_id', None), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def apply_crawl_profile(self, driver, url=None):
+        """Block the resources in config.CRAWL_BLOCKED_URLS through CDP.
+
+        Patterns listed in config.CRAWL_PROFILE_ALLOWLIST for a page URL
+        pattern matching url are let through. The CDP call is skipped when
+        the browser already blocks the same list.
+        """
+        if not config.CRAWL_PROFILE:
+            return
+        blocked = list(config.CRAWL_BLOCKED_URLS)
+        if url:
+            for page_pattern, allowed in config.CRAWL_PROFILE_ALLOWLIST.items():
+                if fnmatch.fnmatch(url, page_pattern):
+                    blocked = [pattern for pattern in blocked if pattern not in allowed]
+
+        # Each browser is driven by one thread at a time, but workers share the dict
+        key = driver.session_id
+        with self.driver_lock:
+            current = self.blocked_urls.get(key)
+        if current == blocked:
+            return
+        try:
+            if current is None:
+                driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': blocked})
+            with self.driver_lock:
+                self.blocked_urls[key] = blocked
+        except Exception as e:
+            self.log_and_update(f"Could not apply crawl profile: {str(e)}")
+
+    def navigate(self, driver, url):
+        """Open url in the browser with the crawl profile for that URL"""
+        self.apply_crawl_profile(driver, url)
+        driver.get(url)
+
+    def close_browsers(self):
+        """Quit every warm browser"""
+        with self.driver_lock:
+            drivers, self.idle_drivers = self.idle_drivers, []
+        for driver in drivers:
+            self.quit_driver(driver)
+
+    def perform_search(self, product_id):
+        """Search for a product ID and process every result page.
+
+        Returns a SearchSummary with the number of products that downloaded
+        something, that were skipped as complete from an earlier run and that
+        produced nothing. Fatal errors are reported and raised again so
+        callers can count the failure.
+        """
+        with self.outcome_lock:
+            self.product_outcomes.clear()
+        try:
+            driver = self.acquire_driver()
+            
+            try:
+                if config.DIRECT_SEARCH:
+                    with self.metrics.stage(crawl_metrics.STAGE_SEARCH_SUBMIT):
+                        opened = self.open_search_results(driver, product_id)
+                    if opened:
+                        # Let HTTP fetches use the browser's session cookies
+                        self.import_browser_cookies(driver)
+                        self.process_search_results_by_url(driver, product_id)
+                        return self.search_summary()
+
+                with self.metrics.stage(crawl_metrics.STAGE_SEARCH_SUBMIT):
+                    self.submit_search_box(driver, product_id)
+                
+                # Let HTTP downloads use the browser's session cookies
+                self.import_browser_cookies(driver)
+                
+                # Process all result pages
+                self.process_search_results_across_pages(driver, product_id)
+                return self.search_summary()
+                
+            finally:
+                if driver:
+                    self.release_driver(driver)
+                
+        except Exception as e:
+            self.update_status(f"Error: {str(e)}")
+            self.log_and_update(f"FATAL ERROR occurred: {str(e)}")
+            raise
+        finally:
+            self.write_run_report()
+    
+    def search_summary(self):
+        """Return the product outcomes of the current search as a SearchSummary"""
+        with self.outcome_lock:
+            return SearchSummary(**{field: self.product_outcomes[field] for field in SearchSummary._fields})
+
+    def count_product(self, outcome):
+        with self.outcome_lock:
+            self.product_outcomes[outcome] += 1
+
+    def write_run_report(self):
+        """Write the stage timings of the search next to its log file"""
+        if not self.log_file_path:
+            return
+        report_path = os.path.splitext(self.log_file_path)[0] + "_report.json"
+        try:
+            report = self.metrics.write_report(report_path)
+            slowest = sorted(report['stages'].items(), key=lambda item: item[1]['total_seconds'], reverse=True)[:3]
+            summary = ", ".join(f"{name} {stats['total_seconds']:.1f}s" for name, stats in slowest)
+            self.log_and_update(f"Run report saved: {report_path} (slowest stages: {summary or 'none'}; waiting {report['wait_seconds']:.1f}s)")
+        except Exception as e:
+            self.log_and_update(f"Could not write run report: {str(e)}")
+
+    def submit_search_box(self, driver, product_id):
+        """Search from the home page by typing into the search box (fallback for direct search URLs)"""
+        self.log_and_update("Navigating to COM-ET website...")
+        self.navigate(driver, config.WEBSITE_URL)
+        
+        # Wait for page to load
+        try:
+            WebDriverWait(driver, config.SEARCH_TIMEOUT).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+            self.log_and_update("Page loaded successfully.")
+        except TimeoutException:
+            self.log_and_update("Timeout waiting for page to load.")
+        
+        self.log_and_update("Looking for search bar...")
+        
+        # Use the specific CSS selector provided by the user
+        search_selector = "div.searchArea.incSearchOptions input#searchBox"
+        search_input = None
+        
+        try:
+            search_input = WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, search_selector))
+            )
+        except Exception as e:
+            self.log_and_update(f"Could not find search input field with selector '{search_selector}': {str(e)}")
+            raise Exception(f"Could not find search input field with selector '{search_selector}': {str(e)}")
+        
+        if not (search_input and search_input.is_displayed() and search_input.is_enabled()):
+            self.log_and_update("Search input field is not visible or enabled.")
+            raise Exception("Search input field is not visible or enabled.")
+        
+        self.log_and_update(f"Entering product ID: {product_id}")
+        
+        # Wait for element to be interactable
+        try:
+            WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.CSS_SELECTOR, search_selector))
+            )
+            self.log_and_update("Search input field is clickable.")
+        except:
+            self.log_and_update("Search input field is not clickable, trying simpler approach.")
+            # If that fails, try a simpler approach
+            try:
+                WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.TAG_NAME, "input"))
+                )
+            except:
+                pass
+        
+        # Clear and enter product ID with better interaction
+        home_url = driver.current_url
+        try:
+            self.log_and_update("Attempting to send keys to search field...")
+            # Scroll to element to ensure it's visible
+            driver.execute_script("arguments[0].scrollIntoView(true);", search_input)
+            
+            # Clear the field
+            search_input.clear()
+            
+            # Enter the product ID
+            search_input.send_keys(product_id)
+            
+            # Submit the search
+            search_input.send_keys(Keys.RETURN)
+            self.log_and_update("Submitted search by pressing RETURN.")
+        except Exception as e:
+            # Fallback: try JavaScript interaction
+            self.log_and_update("Failed to send keys. Trying JavaScript interaction...")
+            try:
+                driver.execute_script(f"arguments[0].value = '{product_id}';", search_input)
+                driver.execute_script("arguments[0].form.submit();", search_input)
+                self.log_and_update("Submitted search via JavaScript.")
+            except:
+                # Last resort: try to find and click a search button
+                self.log_and_update("JavaScript submission failed. Trying to find a search button.")
+                try:
+                    search_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit'], input[type='submit'], .search-button, .btn-button")
+                    search_button.click()
+                    self.log_and_update("Submitted search by clicking a button.")
+                except:
+                    self.log_and_update(f"Could not interact with search field: {str(e)}")
+                    raise Exception(f"Could not interact with search field: {str(e)}")
+        
+        # Wait for search results to load
+        self.log_and_update("Waiting for search results to load...")
+        if self.wait_for_page(driver, "search_results", previous_url=home_url):
+            self.log_and_update("Search results page loaded.")
+        else:
+            self.log_and_update("Timeout waiting for search results page. Proceeding anyway.")
+        
+        # Check if we're still on the search page (search might have failed)
+        current_url = driver.current_url
+        if "search" not in current_url.lower() and "result" not in current_url.lower():
+            self.log_and_update("Search may have failed. URL does not indicate a search result page. Trying alternative method...")
+            # Try alternative search method using JavaScript
+            try:
+                # Try to find and fill search form using JavaScript
+                js_code = f"""
+                var inputs = document.querySelectorAll('input[type="text"], input[type="search"]');
+                for (var i = 0; i < inputs.length; i++) {{
+                    if (inputs[i].offsetParent !== null) {{
+                        inputs[i].value = '{product_id}';
+                        inputs[i].focus();
+                        break;
+                    }}
+                }}
+                """
+                driver.execute_script(js_code)
+                self.log_and_update("Filled search form with JavaScript.")
+                
+                # Try to submit the form
+                submit_js = """
+                var forms = document.querySelectorAll('form');
+                for (var i = 0; i < forms.length; i++) {
+                    var inputs = forms[i].querySelectorAll('input[type="text"], input[type="search"]');
+                    if (inputs.length > 0) {
+                        forms[i].submit();
+                        break;
+                    }
+                }
+                """
+                driver.execute_script(submit_js)
+                self.wait_for_page(driver, "search_results", previous_url=current_url)
+                self.log_and_update("Submitted search form with JavaScript.")
+            except Exception as e:
+                self.log_and_update(f"Alternative search method with JavaScript failed: {str(e)}")
+
+    def wait_for_page(self, driver, page_type, previous_url=None):
+        """Wait until a page of the given type is ready, using its profile in config.READY_PROFILES.
+
+        Returns True as soon as the page is ready, or False on timeout.
+        """
+        profile = config.READY_PROFILES.get(page_type, {})
+        condition = PageReady(
+            selectors=profile.get("selectors"),
+            previous_url=previous_url,
+            network_idle_ms=profile.get("network_idle_ms", 0),
+            ready_states=("interactive", "complete") if config.CRAWL_PROFILE and config.PAGE_LOAD_STRATEGY == "eager" else ("complete",)
+        )
+        started = time.time()
+        try:
+            WebDriverWait(driver, profile.get("timeout", config.PAGE_LOAD_TIMEOUT), poll_frequency=0.1).until(condition)
+            return True
+        except TimeoutException:
+            self.log_and_update(f"    Timed out waiting for {page_type} page to be ready.")
+            return False
+        finally:
+            self.metrics.add_wait(time.time() - started)
+
+    def wait_for_click_result(self, driver, existing_handles, previous_url):
+        """Wait until a click opened a new window or navigated the current one"""
+        timeout = config.READY_PROFILES.get("new_window", {}).get("timeout", config.PAGE_LOAD_TIMEOUT)
+        started = time.time()
+        try:
+            WebDriverWait(driver, timeout, poll_frequency=0.1).until(
+                NewWindowOrNavigation(existing_handles, previous_url)
+            )
+            return True
+        except TimeoutException:
+            return False
+        finally:
+            self.metrics.add_wait(time.time() - started)
+
+    def ensure_on_search_results_page(self, driver, original_search_url=None):
+        """Ensure we're on the search results page before processing products."""
+        try:
+            current_url = driver.current_url
+            self.log_and_update(f"    Current URL: {current_url}")
+            
+            # Check if we're on a search results page (specifically item_search, not item_view_set)
+            if "item_search" not in current_url:
+                self.log_and_update("    Not on search results page, attempting to return...")
+                
+                # First, try to go back to the search results
+                try:
+                    driver.back()
+                    self.wait_for_page(driver, "search_results", previous_url=current_url)
+                    new_url = driver.current_url
+                    self.log_and_update(f"    After back(): {new_url}")
+                    
+                    # Check if we're now on search results
+                    if "item_search" in new_url:
+                        self.log_and_update("    Successfully returned to search results page via back()")
+                        return
+                except Exception as e:
+                    self.log_and_update(f"    Error using back(): {str(e)}")
+                
+                # If back() didn't work, try to close any extra windows/tabs and switch to main window
+                try:
+                    current_handles = driver.window_handles
+                    if len(current_handles) > 1:
+                        self.log_and_update(f"    Found {len(current_handles)} windows, switching to main window...")
+                        # Close extra windows and switch to the first one (main window)
+                        for handle in current_handles[1:]:
+                            try:
+                                driver.switch_to.window(handle)
+                                driver.close()
+                            except:
+                                pass
+                        driver.switch_to.window(current_handles[0])
+                        
+                        # Check if we're now on search results
+                        final_url = driver.current_url
+                        if "item_search" in final_url:
+                            self.log_and_update("    Successfully returned to search results page via window switching")
+                            return
+                except Exception as e:
+                    self.log_and_update(f"    Error switching windows: {str(e)}")
+                
+                # If all else fails and we have the original search URL, try to navigate to it
+                if original_search_url:
+                    try:
+                        self.log_and_update(f"    Attempting to navigate to original search URL: {original_search_url}")
+                        self.navigate(driver, original_search_url)
+                        self.wait_for_page(driver, "search_results")
+                        self.log_and_update("    Successfully navigated to original search URL")
+                        return
+                    except Exception as e:
+                        self.log_and_update(f"    Error navigating to original search URL: {str(e)}")
+                
+                # If all else fails, log the issue
+                self.log_and_update(f"    Could not return to search results page. Current URL: {driver.current_url}")
+            else:
+                self.log_and_update("    Already on search results page")
+                
+        except Exception as e:
+            self.log_and_update(f"    Error ensuring on search results page: {str(e)}")
+
+    def process_search_results_across_pages(self, driver, search_product_id):
+        """Iterate all result pages, process products, and paginate via 次へ until done."""
+        total_downloaded = 0
+        page_index = 1
+        seen_product_ids = set()
+        
+        # Store the original search URL as a fallback
+        original_search_url = driver.current_url
+        self.log_and_update(f"Stored original search URL: {original_search_url}")
+
+        # Optionally hand products to a pool of worker browsers
+        worker_pool = self.start_worker_pool()
+
+        # Resume an interrupted run for this search term
+        state = self.crawl_state
+        finished = False
+        resumed_run, downloaded = self.resume_interrupted_run(driver, search_product_id, original_search_url, seen_product_ids, worker_pool)
+        total_downloaded += downloaded
+        if resumed_run:
+            resume_url = resumed_run['page_url']
+            if resume_url and resume_url != driver.current_url:
+                self.log_and_update(f"Returning to results page {resumed_run['page_index']}: {resume_url}")
+                url_before = driver.current_url
+                self.navigate(driver, resume_url)
+                self.wait_for_page(driver, "search_results", previous_url=url_before)
+                original_search_url = resume_url
+            page_index = resumed_run['page_index']
+
+        while True:
+            try:
+                self.log_and_update(f"Analyzing search results page {page_index} for product containers...")
+                try:
+                    WebDriverWait(driver, 15).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "body"))
+                    )
+                except TimeoutException:
+                    self.log_and_update("Timeout waiting for page body; continuing anyway.")
+
+                # FIRST: Ensure we're on the search results page before checking pagination
+                self.ensure_on_search_results_page(driver, original_search_url)
+                if state:
+                    state.record_page(search_product_id, page_index, driver.current_url)
+                
+                # SECOND: Check for pagination BEFORE processing products
+                # This ensures we're checking on the actual search results page
+                self.log_and_update(f"Checking for pagination on page {page_index}...")
+                
+                # Wait for any dynamic content to load
+                self.wait_for_page(driver, "search_results")
+                
+                # Quick debug: Let's see what pagination elements exist
+                if self.debug_enabled():
+                    self.log_pagination_elements(driver)
+                
+                with self.metrics.stage(crawl_metrics.STAGE_PAGINATION):
+                    pagination = self.detect_pagination(driver)
+                next_button = pagination['next_button']
+                next_url = pagination['next_url']
+                
+                has_next_page = next_button is not None
+                if not has_next_page:
+                    self.log_and_update("No next button found with any selector")
+                
+                # NOW: Process products on the current page, parsed from a single DOM snapshot
+                with self.metrics.stage(crawl_metrics.STAGE_RESULT_PAGE):
+                    page_products = self.extract_products_from_snapshot(driver)
+                    if page_products is None:
+                        self.log_and_update("Snapshot has no product containers; inspecting the page through the browser...")
+                        page_products = self.extract_products_from_containers(driver, page_index)
+
+                # Queue the products for this page
+                products_data = self.queue_page_products(driver, page_products, seen_product_ids)
+
+                # Process each product, including color variations
+                total_downloaded += self.process_page_products(driver, products_data, page_index, seen_product_ids, worker_pool, search_product_id)
+
+                # AFTER processing products: Ensure we're back on search results page, then use stored next button
+                self.ensure_on_search_results_page(driver, original_search_url)
+                
+                if has_next_page:
+                    try:
+                        current_url_before = driver.current_url
+                        if next_url:
+                            # Open the next page by its URL; the button may have gone stale
+                            self.log_and_update(f"Opening page {page_index + 1}: {next_url}")
+                            self.navigate(driver, next_url)
+                        else:
+                            self.log_and_update(f"Clicking next button to go to page {page_index + 1}...")
+                            # Scroll to the button and click it
+                            driver.execute_script("arguments[0].scrollIntoView(true);", next_button)
+                            next_button.click()
+                        
+                        # Wait for the next results page to be ready
+                        if self.wait_for_page(driver, "search_results", previous_url=current_url_before):
+                            self.log_and_update(f"Navigation successful. New URL: {driver.current_url}")
+                        else:
+                            self.log_and_update("Navigation timeout, but continuing...")
+                        page_index += 1
+                        self.log_and_update(f"Successfully moved to page {page_index}")
+                        continue
+                    except Exception as e:
+                        self.log_and_update(f"Error clicking next button: {str(e)}")
+                else:
+                    # If we reach here, no next page was found or clicked
+                    self.log_and_update("No further pages detected. Finishing.")
+                    finished = True
+                    break
+
+            except Exception as e:
+                self.log_and_update(f"Unexpected error while processing pages: {str(e)}")
+                break
+
+        return self.finish_search_run(driver, search_product_id, worker_pool, finished, total_downloaded)
+
+    def search_page_url(self, query, page_num=0):
+        """Return the item_search URL of one result page; page_num is 0-based like the site's"""
+        params = {'searchStr': query}
+        params.update(config.SEARCH_PARAMS)
+        if config.SEARCH_PAGE_SIZE_PARAM:
+            params[config.SEARCH_PAGE_SIZE_PARAM] = config.SEARCH_PAGE_SIZE
+        if page_num:
+            params['page_num'] = page_num
+        return f"{config.SEARCH_URL}?{urlencode(params)}"
+
+    def open_search_results(self, driver, query):
+        """Open the first result page by URL; returns False if it does not look like a results page"""
+        url = self.search_page_url(query)
+        self.log_and_update(f"Opening search results directly: {url}")
+        url_before = driver.current_url
+        self.navigate(driver, url)
+        self.wait_for_page(driver, "search_results", previous_url=url_before)
+        if "item_search" in driver.current_url and driver.find_elements(By.CSS_SELECTOR, "table.productTable, section.searchInfo"):
+            return True
+        self.log_and_update("Direct search URL did not open a results page; using the search box instead.")
+        return False
+
+    def process_search_results_by_url(self, driver, search_product_id):
+        """Process every result page by its URL.
+
+        The result count is read once from the first page, which the browser
+        has open; up to SEARCH_PAGE_FETCHERS of the following pages are fetched
+        over HTTP while the products of the current page are processed. A page
+        whose HTML has no product containers is opened in the browser instead.
+        """
+        total_downloaded = 0
+        seen_product_ids = set()
+        first_page_url = self.search_page_url(search_product_id)
+
+        # Read the result count once, before products take the browser elsewhere
+        with self.metrics.stage(crawl_metrics.STAGE_RESULT_PAGE):
+            first_page = page_parsers.parse_html(driver.page_source)
+            first_page_products = page_parsers.parse_search_results(first_page, first_page_url) or None
+
+        worker_pool = self.start_worker_pool()
+        state = self.crawl_state
+        resumed_run, downloaded = self.resume_interrupted_run(driver, search_product_id, first_page_url, seen_product_ids, worker_pool)
+        total_downloaded += downloaded
+        start_page = resumed_run['page_index'] if resumed_run else 1
+
+        with self.metrics.stage(crawl_metrics.STAGE_PAGINATION):
+            result_count = page_parsers.parse_result_count(first_page)
+        if result_count:
+            first, last, total = result_count
+            page_size = max(last - first + 1, 1) if last < total else max(total, 1)
+            page_count = max((total + page_size - 1) // page_size, 1)
+            self.log_and_update(f"{total} results on {page_count} pages of {page_size}.")
+        else:
+            page_count = 1
+            self.log_and_update("Result count not found; processing the first page only.")
+        page_urls = [self.search_page_url(search_product_id, page_num) for page_num in range(page_count)]
+
+        executor = ThreadPoolExecutor(max_workers=config.SEARCH_PAGE_FETCHERS, thread_name_prefix="result-page")
+        fetches = {}
+        try:
+            next_fetch = max(start_page, 2) if config.HTTP_FAST_PATH else page_count + 1
+            for page_index in range(start_page, page_count + 1):
+                # Keep a small window of pages fetching ahead of this one
+                while next_fetch <= min(page_index + config.SEARCH_PAGE_FETCHERS, page_count):
+                    fetches[next_fetch] = executor.submit(
+                        self.metrics.bind(crawl_metrics.STAGE_RESULT_PAGE, self.fetch_result_page),
+                        page_urls[next_fetch - 1], next_fetch
+                    )
+                    next_fetch += 1
+
+                page_url = page_urls[page_index - 1]
+                if state:
+                    state.record_page(search_product_id, page_index, page_url)
+                self.log_and_update(f"Processing search results page {page_index} of {page_count}...")
+
+                with self.metrics.stage(crawl_metrics.STAGE_RESULT_PAGE):
+                    if page_index == 1:
+                        page_products = first_page_products
+                    else:
+                        page_products = fetches.pop(page_index).result() if page_index in fetches else None
+
+                    page_driver = None
+                    if page_products is None:
+                        page_driver = driver
+                        url_before = driver.current_url
+                        self.navigate(driver, page_url)
+                        self.wait_for_page(driver, "search_results", previous_url=url_before)
+                        page_products = self.extract_products_from_snapshot(driver)
+                        if page_products is None:
+                            page_products = self.extract_products_from_containers(driver, page_index)
+
+                products_data = self.queue_page_products(page_driver, page_products, seen_product_ids)
+                total_downloaded += self.process_page_products(driver, products_data, page_index, seen_product_ids, worker_pool, search_product_id)
+                self.update_progress(int(page_index * 100 / page_count))
+            finished = True
+        except Exception as e:
+            self.log_and_update(f"Unexpected error while processing pages: {str(e)}")
+            finished = False
+        finally:
+            # Drop the prefetches that have not started after an error or a stop
+            for future in fetches.values():
+                future.cancel()
+            executor.shutdown(wait=False)
+
+        return self.finish_search_run(driver, search_product_id, worker_pool, finished, total_downloaded)
+
+    def fetch_result_page(self, url, page_index):
+        """Fetch one result page over HTTP and parse its products, or return None if it has none"""
+        soup = self.fetch_static_page(url)
+        if soup is None:
+            return None
+        products = page_parsers.parse_search_results(soup, url)
+        if not products:
+            self.log_and_update(f"No product containers in the HTML of page {page_index}.")
+            return None
+        self.log_and_update(f"Parsed {len(products)} products from page {page_index} over HTTP.")
+        return products
+
+    def start_worker_pool(self):
+        """Start a pool of worker browsers when WORKER_COUNT allows it, else return None"""
+        if config.WORKER_COUNT > 1:
+            worker_pool = ProductWorkerPool(self, config.WORKER_COUNT)
+            worker_pool.start()
+            return worker_pool
+        return None
+
+    def resume_interrupted_run(self, driver, search_product_id, search_url, seen_product_ids, worker_pool=None):
+        """Start the crawl-state run, dispatching the unfinished products of an interrupted one.
+
+        Returns (resumed run row or None, number of products that downloaded something).
+        """
+        state = self.crawl_state
+        if not state:
+            return None, 0
+        resumed_run = state.start_run(search_product_id, search_url)
+        if not resumed_run:
+            return None, 0
+
+        downloaded = 0
+        pending_products = [ProductRecord.from_dict(record) for record in state.pending_products(search_product_id)]
+        self.log_and_update(f"Resuming interrupted run at page {resumed_run['page_index']} with {len(pending_products)} unfinished products.")
+        for product in pending_products:
+            seen_product_ids.add(product['product_id'])
+            if self.dispatch_product(driver, product, worker_pool, search_product_id):
+                downloaded += 1
+        return resumed_run, downloaded
+
+    def queue_page_products(self, driver, page_products, seen_product_ids):
+        """Return the products of a page not seen yet.
+
+        When there are none, loose detection runs on the page open in driver;
+        pass driver=None when the products did not come from the browser.
+        """
+        products_data = []
+        for product_info in page_products or []:
+            if product_info['product_id'] not in seen_product_ids:
+                products_data.append(product_info)
+                seen_product_ids.add(product_info['product_id'])
+                self.log_and_update(f"Queued product: {product_info['product_id']} - {product_info['product_name']}")
+            else:
+                self.log_and_update(f"Skipping duplicate product: {product_info['product_id']}")
+
+        if not products_data and driver is not None:
+            self.log_and_update("No products extracted; trying fallback detection on this page...")
+            fallback_products = self.fallback_product_detection(driver)
+            for product in fallback_products:
+                if product['product_id'] not in seen_product_ids:
+                    products_data.append(product)
+                    seen_product_ids.add(product['product_id'])
+        return products_data
+
+    def process_page_products(self, driver, products_data, page_index, seen_product_ids, worker_pool=None, search_product_id=None):
+        """Process the products of one result page, including color variations.
+
+        Returns the number of products that downloaded something.
+        """
+        downloaded = 0
+        if products_data:
+            self.log_and_update(f"Processing {len(products_data)} products on page {page_index}...")
+        else:
+            self.log_and_update(f"No products to process on page {page_index}.")
+
+        # Color variations of the whole page are read up front, without leaving the results tab
+        with self.metrics.stage(crawl_metrics.STAGE_COLOR_VARIATIONS):
+            variations = self.expand_color_variations(driver, products_data)
+
+        for product in products_data:
+            try:
+                self.update_status(f"Processing (page {page_index}) {product['product_id']}")
+                
+                color_variations = variations.get(product['product_id'])
+                if color_variations:
+                    self.log_and_update(f"Found {len(color_variations)} color variations for {product['product_id']}")
+                    # Process each color variation
+                    for color_product in color_variations:
+                        if color_product['product_id'] not in seen_product_ids:
+                            seen_product_ids.add(color_product['product_id'])
+                            if self.dispatch_product(driver, color_product, worker_pool, search_product_id):
+                                downloaded += 1
+                else:
+                    # Process the original product if no color variations
+                    if self.dispatch_product(driver, product, worker_pool, search_product_id):
+                        downloaded += 1
+                        
+            except Exception as e:
+                self.log_and_update(f"Error processing {product.get('product_id', 'unknown')} on page {page_index}: {str(e)}")
+        return downloaded
+
+    def finish_search_run(self, driver, search_product_id, worker_pool, finished, total_downloaded):
+        """Wait for the worker browsers, close the crawl-state run and report the total"""
+        if worker_pool:
+            self.log_and_update("Waiting for browser workers to finish...")
+            total_downloaded += worker_pool.join(fallback_driver=driver)
+
+        if self.crawl_state and finished:
+            self.crawl_state.finish_run(search_product_id)
+
+        self.update_progress(100)
+        self.update_status(f"Search completed across pages. Downloads completed for {total_downloaded} products.")
+        self.log_and_update(f"Search completed across pages. Downloads completed for {total_downloaded} products.")
+        return total_downloaded
+
+    def detect_pagination(self, driver):
+        """Find the next-page link, current page and total pages with one in-page script.
+
+        Returns a dict with next_button (a WebElement or None), next_url,
+        current_page and total_pages. The element-by-element strategies only
+        run when the script fails.
+        """
+        try:
+            result = driver.execute_script(page_scripts.PAGINATION)
+            if result is not None:
+                pagination = {
+                    'next_button': result.get('next'),
+                    'next_url': result.get('next_url'),
+                    'current_page': result.get('current_page'),
+                    'total_pages': result.get('total_pages')
+                }
+                if pagination['next_url']:
+                    self.log_and_update(f"Found next page {pagination['next_url']} (page {pagination['current_page']} of {pagination['total_pages']})")
+                else:
+                    self.log_and_update(f"No next page link (page {pagination['current_page']} of {pagination['total_pages']})")
+                return pagination
+        except Exception as e:
+            self.log_and_update(f"Pagination script failed: {str(e)}")
+
+        started = time.time()
+        next_button = self.find_next_button_by_strategies(driver)
+        self.log_and_update(f"Element-by-element pagination detection took {time.time() - started:.2f}s")
+        next_url = None
+        if next_button is not None:
+            try:
+                next_url = next_button.get_attribute('href')
+            except Exception:
+                pass
+        return {'next_button': next_button, 'next_url': next_url, 'current_page': None, 'total_pages': None}
+
+    def find_next_button_by_strategies(self, driver):
+        """Look for the 次へ button element by element (slow fallback for detect_pagination)"""
+        next_button = None
+        
+        # Method 1: Try to find any clickable element with "次へ" text (including nested spans)
+        try:
+            # Look for links that contain "次へ" text directly or in nested elements
+            jitsu_elements = driver.find_elements(By.XPATH, "//a[contains(text(), '次へ') or .//span[contains(text(), '次へ')]]")
+            for elem in jitsu_elements:
+                try:
+                    if elem.is_displayed() and elem.is_enabled():
+                        href = elem.get_attribute('href')
+                        if href and 'javascript:void(0)' not in href:
+                            next_button = elem
+                            self.log_and_update(f"Found next button by text: {href}")
+                            break
+                except:
+                    continue
+        except:
+            pass
+        
+        # Method 2: Try to find elements with "next" class
+        if not next_button:
+            try:
+                next_elements = driver.find_elements(By.CSS_SELECTOR, "a.next")
+                for elem in next_elements:
+                    try:
+                        if elem.is_displayed() and elem.is_enabled():
+                            href = elem.get_attribute('href')
+                            if href and 'javascript:void(0)' not in href:
+                                next_button = elem
+                                self.log_and_update(f"Found next button by class: {href}")
+                                break
+                    except:
+                        continue
+            except:
+                pass
+        
+        # Method 3: Look for pagination containers and search within them
+        if not next_button:
+            try:
+                pagination_containers = [
+                    "ul.pageing",
+                    "ul.pagination", 
+                    "div.pagination",
+                    "nav.pagination",
+                    ".pagination",
+                    ".pageing"
+                ]
+                
+                for container_selector in pagination_containers:
+                    try:
+                        containers = driver.find_elements(By.CSS_SELECTOR, container_selector)
+                        for container in containers:
+                            # Look for links within this container
+                            links = container.find_elements(By.TAG_NAME, "a")
+                            for link in links:
+                                try:
+                                    text = link.text.strip()
+                                    href = link.get_attribute('href')
+                                    classes = link.get_attribute('class') or ''
+                                    
+                                    if (('next' in classes.lower() or '次へ' in text) and 
+                                        href and 'javascript:void(0)' not in href and
+                                        link.is_displayed() and link.is_enabled()):
+                                        next_button = link
+                                        self.log_and_update(f"Found next button in {container_selector}: {href}")
+                                        break
+                                except:
+                                    continue
+                            if next_button:
+                                break
+                        if next_button:
+                            break
+                    except:
+                        continue
+            except:
+                pass
+        
+        # Method 4: Look for any link containing pagination-related text (including nested spans)
+        if not next_button:
+            try:
+                pagination_texts = ['次へ', 'next', 'Next', 'NEXT', '次のページ', '次ページ', '>', '→']
+                for text in pagination_texts:
+                    try:
+                        # Look for links that contain the text directly or in nested elements
+                        elements = driver.find_elements(By.XPATH, f"//a[contains(text(), '{text}') or .//span[contains(text(), '{text}')]]")
+                        for elem in elements:
+                            try:
+                                href = elem.get_attribute('href')
+                                if (href and 'javascript:void(0)' not in href and
+                                    elem.is_displayed() and elem.is_enabled()):
+                                    next_button = elem
+                                    self.log_and_update(f"Found next button by text '{text}': {href}")
+                                    break
+                            except:
+                                continue
+                        if next_button:
+                            break
+                    except:
+                        continue
+            except:
+                pass
+        
+        # Method 5: Specific targeting of the exact pagination structure from reference HTML
+        if not next_button:
+            try:
+                # Look specifically for ul.pageing > li > a.next > span.arrow containing "次へ"
+                next_elements = driver.find_elements(By.CSS_SELECTOR, "ul.pageing li a.next")
+                for elem in next_elements:
+                    try:
+                        if elem.is_displayed() and elem.is_enabled():
+                            href = elem.get_attribute('href')
+                            if href and 'javascript:void(0)' not in href:
+                                # Check if it contains the arrow span with "次へ"
+                                span_elements = elem.find_elements(By.CSS_SELECTOR, "span.arrow")
+                                for span in span_elements:
+                                    if '次へ' in span.text:
+                                        next_button = elem
+                                        self.log_and_update(f"Found next button by specific structure: {href}")
+                                        break
+                                if next_button:
+                                    break
+                    except:
+                        continue
+            except:
+                pass
+        
+        return next_button
+
+    def log_pagination_elements(self, driver):
+        """Log the pagination elements on the current page at debug level"""
+        debug = lambda message: self.log_and_update(message, logging.DEBUG)
+        try:
+            # Check for any elements with "次へ" text (including nested)
+            jitsu_count = len(driver.find_elements(By.XPATH, "//*[contains(text(), '次へ')]"))
+            debug(f"Found {jitsu_count} elements containing '次へ'")
+            
+            # Check for links with "次へ" text (including nested spans)
+            jitsu_links_count = len(driver.find_elements(By.XPATH, "//a[contains(text(), '次へ') or .//span[contains(text(), '次へ')]]"))
+            debug(f"Found {jitsu_links_count} links containing '次へ' (including nested)")
+            
+            # Check for any elements with "next" class
+            next_count = len(driver.find_elements(By.CSS_SELECTOR, ".next"))
+            debug(f"Found {next_count} elements with class 'next'")
+            
+            # Check for pagination containers
+            pageing_count = len(driver.find_elements(By.CSS_SELECTOR, "ul.pageing"))
+            debug(f"Found {pageing_count} ul.pageing elements")
+            
+            # If we found elements, let's see what they are
+            if jitsu_count > 0:
+                jitsu_elements = driver.find_elements(By.XPATH, "//*[contains(text(), '次へ')]")
+                for i, elem in enumerate(jitsu_elements[:3]):  # Show first 3
+                    try:
+                        tag = elem.tag_name
+                        text = elem.text.strip()
+                        classes = elem.get_attribute('class') or ''
+                        href = elem.get_attribute('href') if tag == 'a' else 'N/A'
+                        displayed = elem.is_displayed()
+                        debug(f"  '次へ'[{i}]: tag='{tag}', text='{text}', classes='{classes}', href='{href}', displayed={displayed}")
+                    except:
+                        pass
+        except Exception as e:
+            debug(f"Debug error: {str(e)}")
+
+    def extract_products_from_snapshot(self, driver, page_label="page"):
+        """Parse every product container from one page_source snapshot.
+
+        Returns None when the snapshot has no recognisable product containers,
+        so the caller can fall back to the per-element WebDriver path.
+        """
+        try:
+            soup = page_parsers.parse_html(driver.page_source)
+            base_url = driver.current_url
+            containers = page_parsers.find_product_containers(soup)
+            if not containers:
+                return None
+
+            products = []
+            for container in containers:
+                product_info = page_parsers.parse_product_container(container, base_url)
+                if product_info:
+                    products.append(product_info)
+            self.log_and_update(f"Parsed {len(products)} products from {len(containers)} containers in the {page_label} snapshot.")
+            return products
+        except Exception as e:
+            self.log_and_update(f"Error parsing {page_label} snapshot: {str(e)}")
+            return None
+
+    def extract_products_from_containers(self, driver, page_index):
+        """Extract products by inspecting each result container through WebDriver (slow fallback)"""
+        product_containers = []
+        container_selectors = [
+            "table.productTable tbody tr",
+            "table.productTable tr",
+            ".product",
+            ".item",
+            ".result",
+            "[class*='product']",
+            "[class*='item']",
+            "[class*='result']",
+            "div[class*='product']",
+            "div[class*='item']",
+            "li[class*='product']",
+            "li[class*='item']"
+        ]
+
+        for selector in container_selectors:
+            try:
+                containers = driver.find_elements(By.CSS_SELECTOR, selector)
+                if containers:
+                    filtered = []
+                    for container in containers:
+                        try:
+                            text_value = container.text
+                            if any(k in text_value for k in ['品番', '商品名', '商品図', 'Product']):
+                                filtered.append(container)
+                        except Exception:
+                            continue
+                    if filtered:
+                        product_containers = filtered
+                        self.log_and_update(f"Found {len(filtered)} product containers using selector: {selector}")
+                        break
+            except Exception as e:
+                self.log_and_update(f"Selector {selector} failed: {e}")
+
+        if not product_containers:
+            self.log_and_update("No product containers with primary selectors. Trying broader search...")
+            try:
+                all_elements = driver.find_elements(By.CSS_SELECTOR, "div, li, section")
+                for element in all_elements:
+                    try:
+                        et = element.text
+                        if '品番' in et and ('商品名' in et or '商品図' in et):
+                            product_containers.append(element)
+                    except Exception:
+                        continue
+            except Exception as e:
+                self.log_and_update(f"Broader search failed: {e}")
+
+        self.log_and_update(f"Page {page_index}: {len(product_containers)} potential product containers found")
+
+        products = []
+        for i, container in enumerate(product_containers):
+            try:
+                self.log_and_update(f"Extracting info from container {i+1}/{len(product_containers)} on page {page_index}")
+                product_info = self.extract_product_info(container, driver)
+                if product_info:
+                    products.append(product_info)
+            except Exception as e:
+                self.log_and_update(f"Error extracting container on page {page_index}: {str(e)}")
+        return products
+
+    def dispatch_product(self, driver, product, worker_pool=None, search_id=None):
+        """Process a product on this browser, or queue it for the worker pool.
+
+        The product is stored in the crawl state first, so a run interrupted
+        before it finishes picks it up again. Returns True only when the
+        product was processed here and downloaded something; queued products
+        are counted when the pool is joined.
+        """
+        if self.crawl_state and search_id:
+            try:
+                self.crawl_state.add_product(search_id, product.to_dict())
+            except Exception as e:
+                self.log_and_update(f"Error storing {product['product_id']} in crawl state: {str(e)}")
+        if worker_pool:
+            worker_pool.submit(product)
+            self.log_and_update(f"Queued {product['product_id']} for browser workers.")
+            return False
+        return self.process_product_diagrams(driver, product)
+
+    def expand_color_variations(self, driver, products):
+        """Read the color variations of every product of a page without navigating the results tab.
+
+        The color variations pages are fetched over HTTP, several at a time.
+        Pages that cannot be read that way are opened one by one in a
+        background tab of driver. Returns {product_id: [variant records]}.
+        """
+        linked = [product for product in products if product.get('color_variation_href')]
+        variations = {}
+        if config.HTTP_FAST_PATH and linked:
+            with ThreadPoolExecutor(max_workers=config.COLOR_VARIATION_FETCHERS, thread_name_prefix="color-variations") as executor:
+                fetch = self.metrics.bind(crawl_metrics.STAGE_COLOR_VARIATIONS, self.process_color_variations)
+                futures = [(product, executor.submit(fetch, None, product)) for product in linked]
+                for product, future in futures:
+                    variations[product['product_id']] = future.result()
+
+        for product in linked:
+            if not variations.get(product['product_id']) and driver is not None:
+                variations[product['product_id']] = self.process_color_variations(driver, product)
+        return variations
+
+    def process_color_variations(self, driver, product):
+        """Return the color variants of a product from its color variations page.
+
+        With driver=None the page is fetched over HTTP; otherwise it is opened
+        in a background tab of driver.
+        """
+        try:
+            # Check if we have stored color variation link information
+            color_variation_href = product.get('color_variation_href')
+            if not color_variation_href:
+                self.log_and_update(f"  No color variation link found for {product['product_id']}")
+                return []
+            
+            self.log_and_update(f"  Found color variation link for {product['product_id']}: {color_variation_href}")
+            
+            # Variants share their color variations page, so it is read once per URL
+            if driver is None:
+                loader = lambda: self.read_color_variation_page_static(product, color_variation_href)
+            else:
+                loader = lambda: self.read_color_variation_page(driver, product, color_variation_href)
+            records = self.page_cache.get_or_load(parse_cache.KIND_COLOR_VARIATIONS, color_variation_href, loader)
+            color_products = []
+            for record in records or []:
+                color_product_info = ProductRecord.from_dict(record)
+                # Use the original product's name as base
+                color_product_info.product_name = product.get('product_name', '')
+                color_products.append(color_product_info)
+            return color_products
+                
+        except Exception as e:
+            self.log_and_update(f"  Error in process_color_variations for {product['product_id']}: {str(e)}")
+            return []
+
+    def read_color_variation_page_static(self, product, color_variation_href):
+        """Fetch a color variations page over HTTP and return its products as dicts, or None if none were read"""
+        soup = self.fetch_static_page(color_variation_href)
+        if soup is None:
+            return None
+        color_products = page_parsers.parse_search_results(soup, color_variation_href)
+        if not color_products:
+            self.log_and_update(f"  No color variations in the HTML of the page for {product['product_id']}.")
+            return None
+        self.log_and_update(f"  Parsed {len(color_products)} color variations for {product['product_id']} over HTTP.")
+        return [color_product.to_dict() for color_product in color_products]
+
+    def read_color_variation_page(self, driver, product, color_variation_href):
+        """Open a color variations page in a background tab and return its products as dicts, or None if none were read"""
+        original_window = driver.current_window_handle
+        try:
+            self.log_and_update(f"  Opening color variations page for {product['product_id']} in a new tab")
+            driver.switch_to.new_window('tab')
+            self.navigate(driver, color_variation_href)
+            
+            # Wait for the color variations page to load
+            if not self.wait_for_page(driver, "color_variations"):
+                self.log_and_update(f"  Timeout waiting for color variations page to load for {product['product_id']}")
+            
+            # Extract all color variation products
+            color_products = self.extract_color_variation_products(driver, product)
+            return [color_product.to_dict() for color_product in color_products] or None
+            
+        except Exception as e:
+            self.log_and_update(f"  Error processing color variations for {product['product_id']}: {str(e)}")
+            return None
+        finally:
+            # Close the tab; the results page in the original tab is untouched
+            try:
+                if driver.current_window_handle != original_window:
+                    driver.close()
+                driver.switch_to.window(original_window)
+            except Exception:
+                pass
+
+    def extract_color_variation_products(self, driver, original_product):
+        """Extract all color variation products from the color variations page"""
+        try:
+            self.log_and_update(f"    Extracting color variation products...")
+            color_products = []
+            
+            snapshot_products = self.extract_products_from_snapshot(driver, "color variations page")
+            if snapshot_products is not None:
+                for color_product_info in snapshot_products:
+                    # Use the original product's name as base
+                    color_product_info.product_name = original_product.get('product_name', '')
+                    color_products.append(color_product_info)
+                    self.log_and_update(f"    Extracted color variation: {color_product_info['product_id']}")
+                self.log_and_update(f"    Successfully extracted {len(color_products)} color variations")
+                return color_products
+            
+            # Look for product containers on the color variations page
+            product_containers = []
+            container_selectors = [
+                "table.productTable tbody tr",
+                "table.productTable tr",
+                ".product",
+                ".item",
+                ".result",
+                "[class*='product']",
+                "[class*='item']",
+                "[class*='result']"
+            ]
+            
+            for selector in container_selectors:
+                try:
+                    containers = driver.find_elements(By.CSS_SELECTOR, selector)
+                    if containers:
+                        filtered = []
+                        for container in containers:
+                            try:
+                                text_value = container.text
+                                if any(k in text_value for k in ['品番', '商品名', '商品図', 'Product']):
+                                    filtered.append(container)
+                            except Exception:
+                                continue
+                        if filtered:
+                            product_containers = filtered
+                            self.log_and_update(f"    Found {len(filtered)} color variation containers using selector: {selector}")
+                            break
+                except Exception as e:
+                    self.log_and_update(f"    Selector {selector} failed: {e}")
+            
+            if not product_containers:
+                self.log_and_update(f"    No color variation containers found")
+                return []
+            
+            # Extract product info for each color variation
+            for i, container in enumerate(product_containers):
+                try:
+                    self.log_and_update(f"    Extracting color variation {i+1}/{len(product_containers)}")
+                    color_product_info = self.extract_product_info(container, driver)
+                    
+                    if color_product_info:
+                        # Use the original product's name as base
+                        color_product_info.product_name = original_product.get('product_name', '')
+                        color_products.append(color_product_info)
+                        self.log_and_update(f"    Extracted color variation: {color_product_info['product_id']}")
+                    
+                except Exception as e:
+                    self.log_and_update(f"    Error extracting color variation {i+1}: {str(e)}")
+                    continue
+            
+            self.log_and_update(f"    Successfully extracted {len(color_products)} color variations")
+            return color_products
+            
+        except Exception as e:
+            self.log_and_update(f"    Error extracting color variation products: {str(e)}")
+            return []
+
+    def extract_product_info(self, container, driver):
+        """
+        Extract product information from a container element,
+        prioritizing diagram links that precisely match the product_id.
+        """
+        self.log_and_update("  Starting to extract product info...")
+        try:
+            product_id = None
+            product_name = "Unknown Product"
+            product_images = [] 
+            diagram_href = None
+            specs_href = None
+            bunkaizu_href = None
+            
+            # Find the '品番' (product ID) link
+            try:
+                self.log_and_update("  Attempting to find 品番 link...")
+                # Find the dt with '品番' text
+                hinban_dt = container.find_element(By.XPATH, ".//dt[contains(text(), '品番')]")
+                # Find the sibling dd element
+                hinban_dd = hinban_dt.find_element(By.XPATH, "./following-sibling::dd")
+                # Find the link within the dd element
+                product_id_link = hinban_dd.find_element(By.TAG_NAME, "a")
+                product_id = product_id_link.text.strip()
+                self.log_and_update(f"  Found product ID: {product_id}")
+            except Exception as e:
+                self.log_and_update(f"  Error finding 品番 link: {str(e)}")
+                return None
+            
+            # Find the '商品名' (product name)
+            try:
+                self.log_and_update("  Attempting to find 商品名...")
+                product_name_dd = container.find_element(By.XPATH, ".//dt[contains(text(), '商品名')]/following-sibling::dd")
+                product_name = product_name_dd.text.strip()
+                self.log_and_update(f"  Found product name: {product_name}")
+            except:
+                self.log_and_update("  Product name not found.")
+                pass
+            
+            # Find the 'シリーズ名' (series name)
+            series_name = "Unknown Series"
+            try:
+                self.log_and_update("  Attempting to find シリーズ名...")
+                series_name_dd = container.find_element(By.XPATH, ".//dt[contains(text(), 'シリーズ名')]/following-sibling::dd")
+                series_name = series_name_dd.text.strip()
+                # Remove the colon and any leading whitespace
+                if series_name.startswith('：'):
+                    series_name = series_name[1:].strip()
+                self.log_and_update(f"  Found series name: {series_name}")
+            except:
+                self.log_and_update("  Series name not found.")
+                pass
+            
+            if not product_id:
+                self.log_and_update("  Product ID is empty, skipping this container.")
+                return None
+
+            # Skip discontinued items (販売終了)
+            try:
+                self.log_and_update("  Checking 希望小売価格 for discontinued status...")
+                price_dd = container.find_element(
+                    By.XPATH,
+                    ".//dt[contains(text(), '希望小売価格')]/following-sibling::dd[contains(@class, 'price')]"
+                )
+                price_text = price_dd.text.strip()
+                self.log_and_update(f"  希望小売価格 text: {price_text}")
+                if "販売終了" in price_text:
+                    self.log_and_update("  Item marked as 販売終了. Skipping this item.")
+                    return None
+            except Exception as e:
+                self.log_and_update(f"  Could not determine discontinued status: {str(e)}")
+            
+            all_links_in_container = container.find_elements(By.TAG_NAME, "a")
+            self.log_and_update(f"  Found {len(all_links_in_container)} links in total within the container.")
+            
+            # --- Diagram Link Selection Logic ---
+            self.log_and_update("  Searching for Diagram link (商品図)...")
+            found_exact_diagram = False
+            for link in all_links_in_container:
+                href = link.get_attribute('href')
+                link_text = link.text.strip()
+                if '商品図' in link_text and href:
+                    self.log_and_update(f"    Found a link with '商品図' text: {link_text} ({href})")
+                    parsed_path = urlparse(href).path
+                    filename = os.path.basename(parsed_path)
+                    
+                    if re.search(r'\b' + re.escape(product_id) + r'\b', filename, re.IGNORECASE):
+                        diagram_href = href
+                        found_exact_diagram = True
+                        self.log_and_update(f"    Found exact diagram match for product ID: {diagram_href}")
+                        break
+            
+            if not found_exact_diagram:
+                self.log_and_update("    No exact diagram match found. Falling back to general search.")
+                for link in all_links_in_container:
+                    href = link.get_attribute('href')
+                    link_text = link.text.strip()
+                    if '商品図' in link_text:
+                        diagram_href = href
+                        self.log_and_update(f"    Found general diagram link: {diagram_href}")
+                        break
+                    elif href and ('diagram' in href.lower() or 'drawing' in href.lower()):
+                        if not diagram_href:
+                            diagram_href = href
+                            self.log_and_update(f"    Found fallback diagram link by keyword: {diagram_href}")
+
+            # --- Specifications Link Selection Logic ---
+            self.log_and_update("  Searching for Specifications link (仕様一覧)...")
+            specs_links = []
+            
+            # Method 1: Look for 仕様一覧 links in the productLabels section
+            try:
+                specs_links = container.find_elements(By.CSS_SELECTOR, "ul.productLabels a")
+                self.log_and_update(f"    Method 1 found {len(specs_links)} potential links.")
+            except Exception as e:
+                self.log_and_update(f"    Method 1 (CSS Selector) failed: {str(e)}")
+            
+            # Fallback if Method 1 fails
+            if not specs_links:
+                try:
+                    # If we're in a td element, look in the entire tr
+                    if container.tag_name == "td":
+                        parent_tr = container.find_element(By.XPATH, "./..")
+                        specs_links = parent_tr.find_elements(By.CSS_SELECTOR, "ul.productLabels a")
+                        self.log_and_update(f"    Method 1 fallback on parent TR found {len(specs_links)} links.")
+                    # If we're in a th element, look in the sibling td
+                    elif container.tag_name == "th":
+                        parent_tr = container.find_element(By.XPATH, "./..")
+                        td_element = parent_tr.find_element(By.TAG_NAME, "td")
+                        specs_links = td_element.find_elements(By.CSS_SELECTOR, "ul.productLabels a")
+                        self.log_and_update(f"    Method 1 fallback on sibling TD found {len(specs_links)} links.")
+                except Exception as e:
+                    self.log_and_update(f"    Method 1 fallback failed: {str(e)}")
+
+            found_specs_link_to_use = False
+            for link in specs_links:
+                href = link.get_attribute('href')
+                link_text = link.text.strip()
+                if '仕様一覧' in link_text and href:
+                    self.log_and_update(f"    Found a link with '仕様一覧' text: {link_text} ({href})")
+                    
+                    # New logic: Proceed with extraction if the link matches the base URL pattern, without strict hinban validation
+                    if "https://www.com-et.com/jp/item_view_spec/" in href:
+                        specs_href = href
+                        found_specs_link_to_use = True
+                        self.log_and_update(f"    Link URL matches the specifications view pattern. Specs link found: {specs_href}")
+                        break
+                    else:
+                        self.log_and_update(f"    Link found, but URL does not match the expected pattern. Skipping validation: {href}")
+            
+            if not found_specs_link_to_use:
+                self.log_and_update("  No valid Specifications link found for this product.")
+
+            # --- 分解図 (Exploded Diagram) Link Selection Logic ---
+            self.log_and_update("  Searching for 分解図 link...")
+            try:
+                bunkaizu_candidates = container.find_elements(By.XPATH, ".//a[contains(., '分解図')]")
+                for link in bunkaizu_candidates:
+                    href = link.get_attribute('href')
+                    if href:
+                        bunkaizu_href = href
+                        self.log_and_update(f"    Found 分解図 link: {bunkaizu_href}")
+                        break
+            except Exception as e:
+                self.log_and_update(f"    Error finding 分解図 link: {str(e)}")
+            
+            # --- 構成品 (Components) Link Selection Logic ---
+            self.log_and_update("  Searching for 構成品 link...")
+            component_href = None
+            has_components = False
+            try:
+                # First check for clickable 構成品 links
+                component_candidates = container.find_elements(By.XPATH, ".//a[contains(., '構成品')]")
+                for link in component_candidates:
+                    href = link.get_attribute('href')
+                    if href and "item_view_set" in href:
+                        component_href = href
+                        has_components = True
+                        self.log_and_update(f"    Found clickable 構成品 link: {component_href}")
+                        break
+                
+                # If no clickable link found, check for any 構成品 text presence
+                if not has_components:
+                    # Check for disabled 構成品 elements first
+                    disabled_components = container.find_elements(By.XPATH, ".//span[contains(@class, 'productLabels_disabled') and contains(., '構成品')]")
+                    if disabled_components:
+                        self.log_and_update("    Found disabled 構成品 element - components are disabled, no セット品番 section needed")
+                        has_components = False  # Disabled components should not show セット品番 section
+                    else:
+                        # Check for any 構成品 text that might indicate components exist
+                        component_text_elements = container.find_elements(By.XPATH, ".//*[contains(., '構成品')]")
+                        for elem in component_text_elements:
+                            if elem.tag_name == 'a' and elem.get_attribute('href'):
+                                # This is a clickable link we might have missed
+                                href = elem.get_attribute('href')
+                                if "item_view_set" in href:
+                                    component_href = href
+                                    has_components = True
+                                    self.log_and_update(f"    Found additional 構成品 link: {component_href}")
+                                    break
+                            elif elem.tag_name != 'a' and '構成品' in elem.text and 'productLabels_disabled' not in elem.get_attribute('class'):
+                                # Found 構成品 text in non-link element that is not disabled, components likely exist
+                                has_components = True
+                                self.log_and_update("    Found 構成品 text - components exist but may not be clickable")
+                                break
+            except Exception as e:
+                self.log_and_update(f"    Error finding 構成品 link: {str(e)}")
+            
+            # --- Product Images Selection Logic ---
+            self.log_and_update("  Searching for product images...")
+            product_images = []
+            
+            # Find all image links based on the URL pattern, regardless of alt text.
+            image_links = container.find_elements(By.CSS_SELECTOR, "a[href*='search.toto.jp/img/']")
+            self.log_and_update(f"    Found {len(image_links)} image links in container.")
+            
+            if not image_links:
+                try:
+                    # If no images found in current container, try parent/sibling.
+                    if container.tag_name == "td":
+                        parent_tr = container.find_element(By.XPATH, "./..")
+                        th_element = parent_tr.find_element(By.TAG_NAME, "th")
+                        image_links = th_element.find_elements(By.CSS_SELECTOR, "a[href*='search.toto.jp/img/']")
+                        self.log_and_update(f"    Found {len(image_links)} image links in parent/sibling.")
+                    elif container.tag_name == "th":
+                        image_links = container.find_elements(By.CSS_SELECTOR, "a[href*='search.toto.jp/img/']")
+                except Exception as e:
+                    self.log_and_update(f"    Error finding images in parent/sibling: {str(e)}")
+            
+            for link in image_links:
+                try:
+                    href = link.get_attribute('href')
+                    alt_text = link.get_attribute('alt') or ""
+                    
+                    # New logic: Don't strictly validate alt text. Just assume the link is for this product.
+                    product_images.append(ImageLink(href, alt_text))
+                    self.log_and_update(f"    Collected image link: {href}")
+                except Exception as e:
+                    self.log_and_update(f"    Error processing image link: {str(e)}")
+                    continue
+            
+            # Extract color variation link information while container is fresh
+            color_variation_href = None
+            try:
+                self.log_and_update("  Attempting to find color variation link...")
+                color_variation_href = container.find_element(By.CSS_SELECTOR, ".productColorLink a").get_attribute('href')
+                self.log_and_update(f"  Found color variation link: {color_variation_href}")
+            except Exception as e:
+                self.log_and_update(f"  No color variation link found: {str(e)}")
+                pass
+
+            self.log_and_update("  Finished extracting product info.")
+            return ProductRecord(
+                product_id=product_id,
+                product_name=product_name,
+                series_name=series_name,
+                diagram_href=diagram_href,
+                bunkaizu_href=bunkaizu_href,
+                specs_href=specs_href,
+                component_href=component_href,
+                has_components=has_components,
+                product_images=product_images,
+                color_variation_href=color_variation_href
+            )
+            
+        except Exception as e:
+            self.log_and_update(f"  Error extracting product info: {str(e)}")
+            return None
+
+    def fallback_product_detection(self, driver):
+        """Fallback method to detect products when containers are not found"""
+        self.log_and_update("  Starting fallback product detection...")
+        products_data = []
+        try:
+            # Look for any 商品図 links on the page
+            diagram_links = driver.find_elements(By.XPATH, "//a[contains(text(), '商品図')]")
+            self.log_and_update(f"  Fallback: Found {len(diagram_links)} '商品図' links.")
+            
+            for i, link in enumerate(diagram_links):
+                try:
+                    # Try to find product ID in nearby text
+                    parent = link.find_element(By.XPATH, "./..")
+                    parent_text = parent.text
+                    
+                    import re
+                    product_id_match = re.search(r'◆([A-Z0-9]+)', parent_text)
+                    if product_id_match:
+                        product_id = product_id_match.group(1)
+                        self.log_and_update(f"  Fallback: Detected product ID '{product_id}' from nearby text.")
+                    else:
+                        product_id = f"Product_{i+1}"
+                        self.log_and_update(f"  Fallback: Could not detect product ID from text, using generic ID '{product_id}'.")
+                    
+                    products_data.append(ProductRecord(
+                        product_id=product_id,
+                        product_name=f"Product {i+1}",
+                        diagram_href=link.get_attribute('href')
+                    ))
+                    
+                except Exception as e:
+                    self.log_and_update(f"  Error in fallback detection: {str(e)}")
+                    
+        except Exception as e:
+            self.log_and_update(f"  Fallback detection failed: {str(e)}")
+        
+        return products_data
+
+    def process_product_diagrams(self, driver, product):
+        """Process diagrams and specifications for a specific product in sequence.
+
+        Returns True if the product downloaded something; products skipped as
+        complete return False but are counted apart from failed ones.
+        """
+        if self.skip_completed_product(product):
+            self.count_product(PRODUCT_SKIPPED)
+            return False
+        with self.metrics.stage(crawl_metrics.STAGE_PRODUCT, product['product_id']):
+            downloaded = self.process_product_steps(driver, product)
+        self.count_product(PRODUCT_DOWNLOADED if downloaded else PRODUCT_FAILED)
+        return downloaded
+
+    def skip_completed_product(self, product):
+        """True if SKIP_COMPLETED_PRODUCTS applies to a product that finished in an earlier run"""
+        product_id = product['product_id']
+        state = self.crawl_state
+        if not (state and config.SKIP_COMPLETED_PRODUCTS and state.is_product_complete(product_id)):
+            return False
+        if self.downloads_due(product):
+            self.log_and_update(f"  {product_id} finished in an earlier run, revalidating its downloads.")
+            return False
+        self.log_and_update(f"  All steps for {product_id} finished in an earlier run, skipping.")
+        return True
+
+    def downloads_due(self, product):
+        """True if the newest stored download of a product is older than DOWNLOAD_REVALIDATE_SECONDS.
+
+        Looks the product's image and 商品図 URLs and the files its download
+        steps recorded up in the blob index; without an index entry there is
+        nothing to revalidate.
+        """
+        if not self.blobs:
+            return False
+        product_id = product['product_id']
+        urls = [image_info['href'] for image_info in product.get('product_images', [])[:2] if image_info.get('href')]
+        if product.get('diagram_href'):
+            urls.append(product['diagram_href'])
+        filenames = set()
+        for step in (crawl_state.STEP_IMAGES, crawl_state.STEP_DIAGRAM, crawl_state.STEP_BUNKAIZU):
+            step_record = self.completed_step(product_id, step)
+            if step_record:
+                filenames.update(os.path.basename(path) for path in step_record['files'])
+        try:
+            fetched_at = self.blobs.last_fetched(urls, filenames)
+        except Exception as e:
+            self.log_and_update(f"  Error reading the download index for {product_id}: {str(e)}")
+            return False
+        return fetched_at is not None and time.time() - fetched_at >= config.DOWNLOAD_REVALIDATE_SECONDS
+
+    def process_product_steps(self, driver, product):
+        """Run the download and extraction steps of process_product_diagrams"""
+        self.log_and_update(f"\n--- Processing Product: {product['product_id']} ---\n")
+        downloaded_something = False
+        product_id = product['product_id']
+        state = self.crawl_state
+        # Stored downloads past DOWNLOAD_REVALIDATE_SECONDS are checked with the server again
+        revalidate = self.downloads_due(product)
+
+        all_steps_done = True
+        pending_downloads = {}
+        
+        try:
+            # Store the original window handle to ensure we return to the search results page
+            original_window = driver.current_window_handle
+            
+            # Create directory for this product
+            product_dir = os.path.join(self.output_dir, product['product_id'])
+            diagram_dir = os.path.join(product_dir, config.DIAGRAM_FOLDER_NAME)
+            os.makedirs(diagram_dir, exist_ok=True)
+            self.log_and_update(f"  Created product directory: {product_dir}")
+            
+            # 1. Download Product Images (maximum 2 per product ID)
+            if not revalidate and self.completed_step(product_id, crawl_state.STEP_IMAGES):
+                self.log_and_update("  Images were downloaded in an earlier run.")
+            elif product.get('product_images'):
+                self.log_and_update(f"  Image: Queuing {min(2, len(product['product_images']))} images for {product['product_id']}...")
+                pending_downloads[crawl_state.STEP_IMAGES] = [
+                    self.downloads.submit(image_info['href'], diagram_dir, crawl_metrics.STAGE_IMAGES)
+                    for image_info in product['product_images'][:2]
+                ]
+            else:
+                self.log_and_update(f"  No product images found for {product['product_id']} with the current selector.")
+                self.record_step(product_id, crawl_state.STEP_IMAGES)
+
+            # 2. Process 商品図 (Product Diagram)
+            if not revalidate and self.completed_step(product_id, crawl_state.STEP_DIAGRAM):
+                self.log_and_update("  Diagram (商品図) was downloaded in an earlier run.")
+            elif product.get('diagram_href') and product['diagram_href'].lower().endswith('.pdf'):
+                self.log_and_update(f"  Diagram (商品図): Queuing direct PDF download for {product['product_id']}: {product['diagram_href']}")
+                pending_downloads[crawl_state.STEP_DIAGRAM] = [self.downloads.submit(product['diagram_href'], diagram_dir, crawl_metrics.STAGE_DIAGRAM)]
+            elif product.get('diagram_href'):
+                try:
+                    self.log_and_update(f"  Diagram (商品図): Attempting to download for {product['product_id']}...")
+                    files_before = self.list_files(diagram_dir)
+                    with self.metrics.stage(crawl_metrics.STAGE_DIAGRAM, product_id):
+                        diagram_downloaded = self.handle_diagram_download(driver, product, diagram_dir)
+                    if diagram_downloaded:
+                        downloaded_something = True
+                        self.record_step(product_id, crawl_state.STEP_DIAGRAM, self.list_files(diagram_dir) - files_before)
+                        self.log_and_update("  Diagram download process completed successfully.")
+                    else:
+                        all_steps_done = False
+                        self.log_and_update("  Diagram download process failed.")
+                except Exception as e:
+                    all_steps_done = False
+                    self.log_and_update(f"  Error downloading diagram: {str(e)}")
+            else:
+                self.log_and_update(f"  No 商品図 link found for {product['product_id']}.")
+                self.record_step(product_id, crawl_state.STEP_DIAGRAM)
+
+            # 2b. Process 分解図 (Exploded Diagram) - only a.btn.md-pdfBtn
+            if not revalidate and self.completed_step(product_id, crawl_state.STEP_BUNKAIZU):
+                self.log_and_update("  分解図 was downloaded in an earlier run.")
+            elif config.HTTP_FAST_PATH and self.queue_bunkaizu_downloads(product, diagram_dir, pending_downloads, product_id):
+                self.log_and_update(f"  分解図: Queued PDF downloads for {product['product_id']}.")
+            elif product.get('bunkaizu_href'):
+                try:
+                    self.log_and_update(f"  分解図: Attempting to download for {product['product_id']}...")
+                    files_before = self.list_files(diagram_dir)
+                    with self.metrics.stage(crawl_metrics.STAGE_BUNKAIZU, product_id):
+                        bunkaizu_downloaded = self.handle_bunkaizu_download(driver, product, diagram_dir)
+                    if bunkaizu_downloaded:
+                        downloaded_something = True
+                        self.record_step(product_id, crawl_state.STEP_BUNKAIZU, self.list_files(diagram_dir) - files_before)
+                        self.log_and_update("  分解図 download completed successfully.")
+                    else:
+                        all_steps_done = False
+                        self.log_and_update("  分解図 download did not find eligible PDF.")
+                except Exception as e:
+                    all_steps_done = False
+                    self.log_and_update(f"  Error downloading 分解図: {str(e)}")
+            else:
+                self.record_step(product_id, crawl_state.STEP_BUNKAIZU)
+            
+            # 3. Process 構成品 (Components)
+            components_data = None
+            self.log_and_update(f"  Checking for component data for {product['product_id']}...")
+            self.log_and_update(f"    has_components: {product.get('has_components')}")
+            self.log_and_update(f"    component_href: {product.get('component_href')}")
+            
+            components_step = self.completed_step(product_id, crawl_state.STEP_COMPONENTS)
+            if components_step:
+                components_data = components_step['data']
+                self.log_and_update("  Components were read in an earlier run.")
+            elif product.get('has_components') and product.get('component_href'):
+                try:
+                    self.log_and_update(f"  Components (構成品): Attempting to process for {product['product_id']}...")
+                    with self.metrics.stage(crawl_metrics.STAGE_COMPONENTS, product_id):
+                        components_data = self.extract_component_data(driver, None, product.get('component_href'), product['product_id'])
+                    if components_data:
+                        self.log_and_update(f"  Found {len(components_data)} components for {product['product_id']}")
+                        for i, comp in enumerate(components_data):
+                            self.log_and_update(f"    Component {i+1}: {comp['component_id']} - {comp['component_name']}")
+                        self.record_step(product_id, crawl_state.STEP_COMPONENTS, data=components_data)
+                    else:
+                        all_steps_done = False
+                        self.log_and_update("  No components found for this product.")
+                except Exception as e:
+                    all_steps_done = False
+                    self.log_and_update(f"  Error processing components: {str(e)}")
+            else:
+                if not product.get('has_components'):
+                    self.log_and_update("  Product has no components available (構成品 is disabled).")
+                else:
+                    self.log_and_update("  No component link or href found for this product.")
+                self.record_step(product_id, crawl_state.STEP_COMPONENTS)
+            
+            # 4. Process 仕様一覧 (Specifications) or create basic HTML
+            specs_data = None
+            specs_step = self.completed_step(product_id, crawl_state.STEP_SPECS)
+            if specs_step:
+                specs_data = specs_step['data']
+                self.log_and_update("  Specifications were read in an earlier run.")
+            elif product.get('specs_href'):
+                try:
+                    self.log_and_update(f"  Specifications (仕様一覧): Attempting to process for {product['product_id']}...")
+                    with self.metrics.stage(crawl_metrics.STAGE_SPECS, product_id):
+                        specs_data = self.extract_specifications_data(driver, None, product.get('specs_href'), product['product_id'])
+                    if specs_data:
+                        self.log_and_update(f"  Found specifications data for {product['product_id']}")
+                        self.record_step(product_id, crawl_state.STEP_SPECS, data=specs_data)
+                    else:
+                        all_steps_done = False
+                        self.log_and_update("  Specifications data extraction failed.")
+                except Exception as e:
+                    all_steps_done = False
+                    self.log_and_update(f"  Error processing specifications: {str(e)}")
+            else:
+                self.log_and_update(f"  No 仕様一覧 link found for {product['product_id']} - will create basic HTML.")
+                self.record_step(product_id, crawl_state.STEP_SPECS)
+            
+            # Generate template HTML (with or without specifications data)
+            try:
+                self.log_and_update(f"  Generating template HTML for {product['product_id']}...")
+                specs_file = os.path.join(product_dir, f"{product['product_id']}_template.html")
+                with self.metrics.stage(crawl_metrics.STAGE_TEMPLATE, product_id):
+                    saved = self.save_template_html(
+                        specs_file,
+                        specs_data,
+                        product['product_id'], 
+                        product.get('product_name', ''), 
+                        self.extract_manufacturer_from_product_id(product['product_id']),
+                        product.get('series_name', ''),
+                        components_data,
+                        product.get('has_components', False)
+                    )
+                if saved:
+                    self.log_and_update(f"  Template HTML saved: {specs_file}")
+                    self.record_step(product_id, crawl_state.STEP_TEMPLATE, [specs_file])
+                    downloaded_something = True
+                else:
+                    all_steps_done = False
+                    self.log_and_update("  Template HTML generation failed.")
+            except Exception as e:
+                all_steps_done = False
+                self.log_and_update(f"  Error generating template HTML: {str(e)}")
+
+            # Wait for the downloads queued for this product
+            for step, futures in pending_downloads.items():
+                with self.metrics.stage(step, product_id):
+                    collected = self.collect_downloads(driver, product, step, futures, diagram_dir)
+                if not collected:
+                    all_steps_done = False
+                else:
+                    downloaded_something = True
+
+            if state and all_steps_done:
+                state.mark_product_complete(product_id)
+            
+            # Ensure we return to the original window (search results page)
+            try:
+                if driver.current_window_handle != original_window:
+                    self.log_and_update("  Returning to original window after processing.")
+                    driver.switch_to.window(original_window)
+                else:
+                    self.log_and_update("  Already on the original window.")
+            except Exception as e:
+                self.log_and_update(f"  Error returning to original window: {str(e)}")
+                # If original window is closed, try to switch to any available window
+                try:
+                    available_windows = driver.window_handles
+                    if available_windows:
+                        self.log_and_update("  Original window closed, switching to first available window.")
+                        driver.switch_to.window(available_windows[0])
+                except Exception as e:
+                    self.log_and_update(f"  Could not switch to any available window: {str(e)}")
+            
+            return downloaded_something
+                
+        except Exception as e:
+            self.log_and_update(f"  Error processing product: {str(e)}")
+            # Try to return to original window even if there's an error
+            try:
+                if driver.current_window_handle != original_window:
+                    driver.switch_to.window(original_window)
+            except:
+                pass
+            return False
+
+    def completed_step(self, product_id, step):
+        """Return the step record if it finished in an earlier run, otherwise None"""
+        if not self.crawl_state:
+            return None
+        try:
+            return self.crawl_state.get_step(product_id, step)
+        except Exception as e:
+            self.log_and_update(f"  Error reading crawl state for {product_id}: {str(e)}")
+            return None
+
+    def record_step(self, product_id, step, files=(), data=None):
+        """Record a finished step in the crawl state"""
+        if not self.crawl_state:
+            return
+        try:
+            self.crawl_state.record_step(product_id, step, files, data)
+        except Exception as e:
+            self.log_and_update(f"  Error recording {step} for {product_id}: {str(e)}")
+
+    def list_files(self, directory):
+        """Return the set of file paths currently in a directory"""
+        try:
+            return {os.path.join(directory, name) for name in os.listdir(directory)}
+        except OSError:
+            return set()
+
+    def queue_bunkaizu_downloads(self, product, diagram_dir, pending_downloads, product_id=None):
+        """Read the 分解図 page over HTTP and queue its md-pdfBtn PDFs.
+
+        Returns False when the static page has no PDF links, so the caller
+        falls back to the browser.
+        """
+        href = product.get('bunkaizu_href')
+        if not href:
+            return False
+        with self.metrics.stage(crawl_metrics.STAGE_BUNKAIZU, product_id):
+            soup = self.fetch_static_page(href)
+            pdf_links = page_parsers.parse_bunkaizu_pdf_links(soup, href) if soup else []
+        if not pdf_links:
+            self.log_and_update("  分解図: Static page has no a.btn.md-pdfBtn, falling back to the browser.")
+            return False
+
+        self.log_and_update(f"  分解図: Found {len(pdf_links)} md-pdfBtn links over HTTP.")
+        pending_downloads[crawl_state.STEP_BUNKAIZU] = [
+            self.downloads.submit(pdf_href, diagram_dir, crawl_metrics.STAGE_BUNKAIZU) for pdf_href in pdf_links
+        ]
+        return True
+
+    def collect_downloads(self, driver, product, step, futures, diagram_dir):
+        """Wait for the queued downloads of one step and record the step if any file arrived"""
+        files = [os.path.join(diagram_dir, filename) for filename in (f.result() for f in futures) if filename]
+
+        if step == crawl_state.STEP_IMAGES and len(files) < 2:
+            # Replace failed images with the next ones, up to 2 per product
+            for image_info in product['product_images'][len(futures):]:
+                if len(files) >= 2:
+                    break
+                filename = self.download_file(image_info['href'], diagram_dir)
+                if filename:
+                    files.append(os.path.join(diagram_dir, filename))
+
+        succeeded = bool(files)
+        if step == crawl_state.STEP_DIAGRAM and not files:
+            self.log_and_update("  Direct 商品図 download failed, trying the link in the browser.")
+            files_before = self.list_files(diagram_dir)
+            succeeded = self.handle_diagram_download(driver, product, diagram_dir, try_direct_pdf=False)
+            files = sorted(self.list_files(diagram_dir) - files_before)
+
+        if succeeded:
+            self.log_and_update(f"  {product['product_id']}: {step} downloads finished ({len(files)} files).")
+            self.record_step(product['product_id'], step, files)
+        else:
+            self.log_and_update(f"  {product['product_id']}: {step} downloads failed.")
+        return succeeded
+
+    def handle_diagram_download(self, driver, product, diagram_dir, try_direct_pdf=True):
+        """Download a product's diagram from its link URL."""
+        downloaded = False
+        href = product.get('diagram_href')
+        
+        if href:
+            self.log_and_update(f"  Link href: {href}")
+
+        # First, try direct download if the href is a PDF link
+        if try_direct_pdf and href and href.lower().endswith('.pdf'):
+            self.log_and_update("  Direct PDF link found, attempting direct download.")
+            if self.download_file(href, diagram_dir):
+                return True
+
+        # If it's not a direct link or direct download fails, open the link
+        if href:
+            try:
+                self.log_and_update("  Navigating to the diagram link URL.")
+                self.navigate(driver, href)
+                if self.download_from_current_page(driver, diagram_dir, pdf_only=True, single_file=True):
+                    downloaded = True
+            except Exception as e:
+                self.log_and_update(f"  Opening diagram link failed: {e}")
+        
+        return downloaded
+
+    def handle_bunkaizu_download(self, driver, product, diagram_dir):
+        """Open 分解図 page and download only the a.btn.md-pdfBtn PDF."""
+        href = product.get('bunkaizu_href')
+        if not href:
+            self.log_and_update("  分解図: No link to follow.")
+            return False
+
+        original_window = driver.current_window_handle
+        try:
+            self.navigate(driver, href)
+
+            # Wait for md-pdfBtn presence
+            if not self.wait_for_page(driver, "bunkaizu"):
+                self.log_and_update("  分解図: No a.btn.md-pdfBtn found.")
+                return False
+
+            pdf_links = driver.find_elements(By.CSS_SELECTOR, "a.btn.md-pdfBtn")
+            self.log_and_update(f"  分解図: Found {len(pdf_links)} md-pdfBtn links.")
+            futures = []
+            for i, a in enumerate(pdf_links):
+                try:
+                    href = a.get_attribute('href')
+                    if not href:
+                        continue
+                    self.log_and_update(f"  分解図: Downloading PDF {i+1}: {href}")
+                    futures.append(self.downloads.submit(href, diagram_dir, crawl_metrics.STAGE_BUNKAIZU))
+                except Exception as e:
+                    self.log_and_update(f"  分解図: Failed to download one PDF: {str(e)}")
+                    continue
+
+            return any(future.result() for future in futures)
+        finally:
+            try:
+                if driver.current_window_handle != original_window and original_window in driver.window_handles:
+                    driver.close()
+                    driver.switch_to.window(original_window)
+            except Exception:
+                try:
+                    if original_window in driver.window_handles:
+                        driver.switch_to.window(original_window)
+                except Exception:
+                    pass
+
+    def download_from_current_page(self, driver, diagram_dir, pdf_only=False, single_file=False):
+        """Download diagrams from the current page."""
+        try:
+            self.log_and_update(f"  Analyzing current page for downloads...")
+            self.wait_for_page(driver, "diagram")
+            current_url = driver.current_url
+
+            # Method 1: If the current URL is a direct link to a file
+            file_extensions = ['.pdf'] if pdf_only else ['.pdf', '.jpg', '.jpeg', '.png', '.gif']
+            if any(ext in current_url.lower() for ext in file_extensions):
+                self.log_and_update("  Current URL is a direct file link. Attempting download over HTTP...")
+                filename = self.download_file(current_url, diagram_dir)
+                if filename:
+                    self.log_and_update(f"  Successfully downloaded current page: {filename}")
+                    return True
+                self.log_and_update("  HTTP download failed. Attempting download with Selenium...")
+                filename = self.download_file_with_selenium(driver, diagram_dir)
+                if filename:
+                    self.log_and_update(f"  Successfully downloaded current page: {filename}")
+                    return True
+
+            # Method 2: Look for download links on the current page
+            links_to_download = []
+            all_links = driver.find_elements(By.TAG_NAME, "a")
+            for link in all_links:
+                href = link.get_attribute('href')
+                if href and any(href.lower().endswith(ext) for ext in file_extensions):
+                    links_to_download.append(href)
+
+            self.log_and_update(f"  Found {len(links_to_download)} potential file links on this page.")
+
+            if not links_to_download:
+                self.log_and_update("  No direct links found on the page.")
+
+            for i, link_url in enumerate(links_to_download):
+                self.log_and_update(f"  Attempting download from link {i+1}: {link_url}")
+                if self.download_file(link_url, diagram_dir):
+                    if single_file:
+                        return True
+            
+            return False
+            
+        except Exception as e:
+            self.log_and_update(f"  Error downloading from current page: {str(e)}")
+            return False
+
+    def download_file_with_selenium(self, driver, directory):
+        """Download the file open in the browser, deriving the filename from the URL.
+
+        The browser's cookies are handed to the HTTP session first; only if
+        that download still fails is the file fetched inside the page and read
+        back in base64 chunks.
+        """
+        try:
+            current_url = driver.current_url
+            self.log_and_update(f"    Downloading file from current URL: {current_url}")
+
+            self.import_browser_cookies(driver)
+            filename = self.download_file(current_url, directory)
+            if filename:
+                return filename
+            self.log_and_update("    HTTP download with browser cookies failed, fetching inside the browser.")
+            
+            # Get filename from URL
+            parsed_url = urlparse(current_url)
+            filename = os.path.basename(parsed_url.path)
+            filename = "".join(c for c in filename if c.isalnum() or c in "._-")
+
+            key = hashlib.sha1(f"{current_url}{time.time()}".encode('utf-8')).hexdigest()
+            driver.set_script_timeout(config.DOWNLOAD_TIMEOUT)
+            result = driver.execute_async_script(page_scripts.FETCH_TO_PAGE, current_url, key)
+            
+            if not isinstance(result, dict) or 'error' in result:
+                self.log_and_update(f"    Selenium download via JS failed: {result.get('error') if isinstance(result, dict) else result}")
+                return None
+
+            try:
+                size = int(result.get('size') or 0)
+                if not size:
+                    self.log_and_update(f"    Selenium download failed - file is empty or missing")
+                    return None
+                
+                # If filename is empty or invalid, name it after the content type
+                if not filename or '.' not in filename:
+                    filename = self.filename_for_content_type(current_url, result.get('type', ''))
+                    self.log_and_update(f"    Filename from URL is invalid, using {filename}.")
+                
+                chunks = self.counted_chunks(self.read_fetched_chunks(driver, key, size))
+                if self.blobs:
+                    sha256, stored_size = self.blobs.write_stream(chunks)
+                    self.blobs.remember(current_url, sha256, stored_size, filename)
+                    filename = self.place_blob(sha256, directory, filename)
+                else:
+                    filename = self.write_named_by_hash(chunks, directory, filename)
+            finally:
+                try:
+                    driver.execute_script(page_scripts.RELEASE_FETCHED, key)
+                except Exception:
+                    pass
+
+            filepath = os.path.join(directory, filename)
+            if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+                self.log_and_update(f"    Successfully downloaded via Selenium: {filename} ({os.path.getsize(filepath)} bytes)")
+                return filename
+            else:
+                self.log_and_update(f"    Selenium download failed - file is empty or missing")
+                if os.path.exists(filepath): os.remove(filepath)
+                return None
+                
+        except Exception as e:
+            self.log_and_update(f"    Error in Selenium download: {str(e)}")
+            return None
+
+    def read_fetched_chunks(self, driver, key, size):
+        """Yield a body kept in the page by FETCH_TO_PAGE, one base64 chunk per WebDriver call"""
+        for start in range(0, size, config.BROWSER_FETCH_CHUNK_BYTES):
+            end = min(start + config.BROWSER_FETCH_CHUNK_BYTES, size)
+            yield base64.b64decode(driver.execute_script(page_scripts.READ_FETCHED_BASE64, key, start, end))
+
+    def extract_component_data(self, driver, component_link, component_href, product_id):
+        """Extract component data from the component page and return as structured data"""
+        if component_href:
+            components = self.page_cache.get_or_load(
+                parse_cache.KIND_COMPONENTS, component_href,
+                lambda: self.read_component_page(driver, component_link, component_href)
+            )
+        else:
+            components = self.read_component_page(driver, component_link, component_href)
+        if components is None:
+            return None
+        return self.finalize_components(components, product_id)
+
+    def read_component_page(self, driver, component_link, component_href):
+        """Read the components listed on a 構成品 page, before finalize_components, or None if none were found"""
+        self.log_and_update("  Starting component data extraction process.")
+        if config.HTTP_FAST_PATH and component_href:
+            components = self.extract_component_data_static(component_href)
+            if components is not None:
+                return components
+            self.log_and_update("  Static component page lacked setPartsBox_content, falling back to the browser.")
+        try:
+            # Navigate to component page using URL directly to avoid stale element issues
+            if component_href:
+                self.log_and_update(f"  Navigating to component page: {component_href}")
+                self.navigate(driver, component_href)
+            elif component_link is not None:
+                # Get the href from the element before it becomes stale
+                try:
+                    href = component_link.get_attribute('href')
+                    if href:
+                        self.log_and_update(f"  Navigating to component page from element: {href}")
+                        self.navigate(driver, href)
+                    else:
+                        self.log_and_update("  No href found on component link element.")
+                        return None
+                except Exception as e:
+                    self.log_and_update(f"  Error getting href from component link: {str(e)}")
+                    return None
+            else:
+                self.log_and_update("  No component URL provided, skipping component extraction.")
+                return None
+            
+            # Wait for page to load
+            self.wait_for_page(driver, "components")
+            
+            # Look for component data in the page
+            components = []
+            
+            # Debug: Log page content to understand structure
+            self.log_and_update(f"  Component page URL: {driver.current_url}")
+            page_title = driver.title
+            self.log_and_update(f"  Component page title: {page_title}")
+            
+            # Log the entire page text for debugging
+            page_text = driver.find_element(By.TAG_NAME, "body").text
+            if self.debug_enabled():
+                self.log_and_update(f"  Full page text (first 1000 chars): {page_text[:1000]}", logging.DEBUG)
+            self.log_and_update(f"  Full page text length: {len(page_text)} characters")
+            
+            # Method 1: Look for the specific setPartsBox_content structure (NEW)
+            try:
+                for pairs in self.read_component_sets(driver):
+                    component_id = None
+                    component_name = None
+                    
+                    # The first 2 dl elements hold 構成品番 and 商品名
+                    for dl_idx, (dt_text, dd_text) in enumerate(pairs):
+                        self.log_and_update(f"          DL {dl_idx + 1}: {dt_text} = {dd_text}")
+                        
+                        if "構成品番" in dt_text:
+                            # Extract text content, ignoring links
+                            component_id = dd_text.replace("：", "").strip()
+                            # Remove any HTML tags that might be in the text
+                            if "<" in component_id:
+                                component_id = re.sub(r'<[^>]+>', '', component_id)
+                            # Remove diamond symbol if present
+                            component_id = component_id.replace("◆", "").strip()
+                            self.log_and_update(f"            Extracted component ID: {component_id}")
+                            
+                        elif "商品名" in dt_text:
+                            component_name = dd_text.replace("：", "").strip()
+                            self.log_and_update(f"            Extracted component name: {component_name}")
+                    
+                    # If we found both component ID and name, add to components list
+                    if component_id and component_name:
+                        # Check if this component is already in the list
+                        existing_component = next((comp for comp in components if comp['component_id'] == component_id), None)
+                        if not existing_component:
+                            components.append({
+                                'component_id': component_id,
+                                'component_name': component_name
+                            })
+                            self.log_and_update(f"        Added component: {component_id} - {component_name}")
+                        else:
+                            self.log_and_update(f"        Component {component_id} already exists, skipping")
+                            
+            except Exception as e:
+                self.log_and_update(f"  Error finding setPartsBox_content structure: {str(e)}")
+            
+            # Method 2: Fallback to table-based extraction
+            try:
+                # Look for tables containing component information
+                tables = driver.find_elements(By.TAG_NAME, "table")
+                self.log_and_update(f"  Found {len(tables)} tables on component page.")
+                
+                for table_idx, table in enumerate(tables):
+                    try:
+                        rows = table.find_elements(By.TAG_NAME, "tr")
+                        self.log_and_update(f"    Table {table_idx + 1}: Found {len(rows)} rows")
+                        
+                        # Process all rows to find component information
+                        for row_idx, row in enumerate(rows):
+                            cells = row.find_elements(By.TAG_NAME, "td")
+                            if len(cells) >= 1:
+                                # Look for component ID and name patterns
+                                cell_text = [cell.text.strip() for cell in cells]
+                                self.log_and_update(f"      Row {row_idx + 1}: {cell_text}")
+                                
+                                # Check if this row contains component information
+                                component_id = None
+                                component_name = None
+                                
+                                # Look for component ID in this row
+                                for i, text in enumerate(cell_text):
+                                    if "構成品番" in text or "品番" in text:
+                                        self.log_and_update(f"      Found component ID row: {cell_text}")
+                                        # Extract component ID
+                                        if i + 1 < len(cell_text):
+                                            component_id = cell_text[i + 1]
+                                        else:
+                                            # Component ID might be in the same cell after the label
+                                            component_id = text.split("：")[-1].strip() if "：" in text else text.split(":")[-1].strip()
+                                        # Remove diamond symbol if present
+                                        component_id = component_id.replace("◆", "").strip()
+                                        self.log_and_update(f"        Extracted component ID: {component_id}")
+                                        break
+                                
+                                # Look for component name in this row
+                                for i, text in enumerate(cell_text):
+                                    if "商品名" in text or "名称" in text:
+                                        self.log_and_update(f"      Found component name row: {cell_text}")
+                                        # Extract component name
+                                        if i + 1 < len(cell_text):
+                                            component_name = cell_text[i + 1]
+                                        else:
+                                            # Component name might be in the same cell after the label
+                                            component_name = text.split("：")[-1].strip() if "：" in text else text.split(":")[-1].strip()
+                                        self.log_and_update(f"        Extracted component name: {component_name}")
+                                        break
+                                
+                                # If we found both component ID and name in this row, add to components list
+                                if component_id and component_name:
+                                    # Check if this component is already in the list
+                                    existing_component = next((comp for comp in components if comp['component_id'] == component_id), None)
+                                    if not existing_component:
+                                        components.append({
+                                            'component_id': component_id,
+                                            'component_name': component_name
+                                        })
+                                        self.log_and_update(f"    Added component: {component_id} - {component_name}")
+                                    else:
+                                        self.log_and_update(f"    Component {component_id} already exists, skipping")
+                                    
+                    except Exception as e:
+                        self.log_and_update(f"    Error processing table {table_idx + 1}: {str(e)}")
+                        continue
+                        
+            except Exception as e:
+                self.log_and_update(f"  Error finding component tables: {str(e)}")
+            
+            # Alternative method: Look for component information in divs or other elements
+            if not components:
+                self.log_and_update("  No components found in tables, trying alternative extraction methods...")
+            else:
+                self.log_and_update(f"  Found {len(components)} components in tables, but trying alternative methods for better extraction...")
+            
+            try:
+                    # Method 1: Look for elements containing component information (only if no components found)
+                    if not components:
+                        component_elements = driver.find_elements(By.XPATH, "//*[contains(text(), '構成品番') or contains(text(), '品番')]")
+                        self.log_and_update(f"  Found {len(component_elements)} elements with component information.")
+                        
+                        for element in component_elements:
+                            try:
+                                # Get the parent element to find related information
+                                parent = element.find_element(By.XPATH, "./..")
+                                text_content = parent.text
+                                self.log_and_update(f"    Element text content: {text_content[:200]}...")
+                                
+                                # Extract component ID and name using regex
+                                # Look for component ID patterns
+                                component_id_match = re.search(r'構成品番[：:]\s*([^\s\n]+)', text_content)
+                                if not component_id_match:
+                                    component_id_match = re.search(r'品番[：:]\s*([^\s\n]+)', text_content)
+                                
+                                # Look for component name patterns - be more flexible with the pattern
+                                component_name_match = re.search(r'商品名[：:]\s*([^\n\r]+?)(?=\n|$|構成品番|品番)', text_content)
+                                if not component_name_match:
+                                    component_name_match = re.search(r'名称[：:]\s*([^\n\r]+?)(?=\n|$|構成品番|品番)', text_content)
+                                if not component_name_match:
+                                    # Try without colon
+                                    component_name_match = re.search(r'商品名\s+([^\n\r]+?)(?=\n|$|構成品番|品番)', text_content)
+                                if not component_name_match:
+                                    component_name_match = re.search(r'名称\s+([^\n\r]+?)(?=\n|$|構成品番|品番)', text_content)
+                                
+                                if component_id_match and component_name_match:
+                                    component_id = component_id_match.group(1).strip()
+                                    # Remove diamond symbol if present
+                                    component_id = component_id.replace("◆", "").strip()
+                                    component_name = component_name_match.group(1).strip()
+                                    
+                                    components.append({
+                                        'component_id': component_id,
+                                        'component_name': component_name
+                                    })
+                                    self.log_and_update(f"    Found component via regex: {component_id} - {component_name}")
+                                    
+                            except Exception as e:
+                                self.log_and_update(f"    Error processing component element: {str(e)}")
+                                continue
+                    else:
+                        self.log_and_update(f"  Found {len(components)} components in setPartsBox_content, skipping XPath search to avoid duplicates")
+                    
+                    # Method 2: Specific regex for setPartsBox_content structure (only if no components found)
+                    if not components:
+                        self.log_and_update("  Trying specific regex for setPartsBox_content structure...")
+                        
+                        # Look for patterns like: 構成品番：ID followed by 商品名：Name within partsSet structure
+                        parts_set_pattern = r'構成品番[：:]\s*([^\s\n]+).*?商品名[：:]\s*([^\n\r]+?)(?=\n|$|構成品番|品番|希望小売価格)'
+                        parts_set_matches = re.findall(parts_set_pattern, page_text, re.DOTALL)
+                        self.log_and_update(f"  Found {len(parts_set_matches)} partsSet matches: {parts_set_matches}")
+                        
+                        for comp_id, comp_name in parts_set_matches:
+                            comp_id = comp_id.strip()
+                            # Remove diamond symbol if present
+                            comp_id = comp_id.replace("◆", "").strip()
+                            comp_name = comp_name.strip()
+                            if comp_id and comp_name:
+                                # Check if this component is already in the list
+                                existing_component = next((comp for comp in components if comp['component_id'] == comp_id), None)
+                                if not existing_component:
+                                    components.append({
+                                        'component_id': comp_id,
+                                        'component_name': comp_name
+                                    })
+                                    self.log_and_update(f"    Added component from partsSet regex: {comp_id} - {comp_name}")
+                                else:
+                                    self.log_and_update(f"    Component {comp_id} already exists, skipping")
+                    else:
+                        self.log_and_update(f"  Found {len(components)} components in setPartsBox_content, skipping partsSet regex to avoid duplicates")
+                    
+                    # Method 3: Only use comprehensive text search if no components found in setPartsBox_content
+                    if not components:
+                        self.log_and_update("  No components found in setPartsBox_content, trying comprehensive text pattern search...")
+                        # Use the page_text we already extracted for debugging
+                        self.log_and_update(f"  Using page text length: {len(page_text)} characters")
+                        
+                        # Look for patterns like "TCA573" or "TCF5831" (component IDs)
+                        component_id_patterns = re.findall(r'\b(TCA\d+[A-Z0-9#]*|TCF\d+[A-Z0-9#]*)\b', page_text)
+                        self.log_and_update(f"  Found potential component IDs: {component_id_patterns}")
+                        
+                        # Method 3a: Try to find all component blocks using a more comprehensive pattern
+                        self.log_and_update("  Trying comprehensive component block extraction...")
+                        # Look for patterns like: 構成品番：ID followed by 商品名：Name
+                        component_blocks = re.findall(r'構成品番[：:]\s*([^\s\n]+).*?商品名[：:]\s*([^\n\r]+?)(?=\n|$|構成品番|品番)', page_text, re.DOTALL)
+                        self.log_and_update(f"  Found {len(component_blocks)} component blocks: {component_blocks}")
+                        
+                        for comp_id, comp_name in component_blocks:
+                            comp_id = comp_id.strip()
+                            # Remove diamond symbol if present
+                            comp_id = comp_id.replace("◆", "").strip()
+                            comp_name = comp_name.strip()
+                            if comp_id and comp_name:
+                                # Check if this component is already in the list
+                                existing_component = next((comp for comp in components if comp['component_id'] == comp_id), None)
+                                if not existing_component:
+                                    components.append({
+                                        'component_id': comp_id,
+                                        'component_name': comp_name
+                                    })
+                                    self.log_and_update(f"    Added component from block: {comp_id} - {comp_name}")
+                                else:
+                                    self.log_and_update(f"    Component {comp_id} already exists, skipping")
+                        
+                        # Method 3b: For each potential component ID, try to find associated product name
+                        for comp_id in component_id_patterns:
+                            # Remove diamond symbol if present
+                            comp_id = comp_id.replace("◆", "").strip()
+                            # Look for structured patterns around this component ID
+                            # Pattern: 構成品番：ID followed by 商品名：Name
+                            structured_pattern = rf'構成品番[：:]\s*{re.escape(comp_id)}.*?商品名[：:]\s*([^\n\r]+?)(?=\n|$|構成品番|品番)'
+                            structured_match = re.search(structured_pattern, page_text, re.DOTALL)
+                            
+                            if structured_match:
+                                component_name = structured_match.group(1).strip()
+                                # Check if this component is already in the list
+                                existing_component = next((comp for comp in components if comp['component_id'] == comp_id), None)
+                                if not existing_component:
+                                    components.append({
+                                        'component_id': comp_id,
+                                        'component_name': component_name
+                                    })
+                                    self.log_and_update(f"    Found component via structured pattern: {comp_id} - {component_name}")
+                                else:
+                                    self.log_and_update(f"    Component {comp_id} already exists, skipping")
+                            else:
+                                # Fallback: Look for text around this component ID
+                                pattern = rf'.{{0,200}}{re.escape(comp_id)}.{{0,200}}'
+                                matches = re.findall(pattern, page_text, re.IGNORECASE)
+                                for match in matches:
+                                    # Try to extract product name from the context
+                                    name_match = re.search(r'([^。\n]{10,50})', match)
+                                    if name_match:
+                                        potential_name = name_match.group(1).strip()
+                                        if len(potential_name) > 5:  # Reasonable product name length
+                                            components.append({
+                                                'component_id': comp_id,
+                                                'component_name': potential_name
+                                            })
+                                            self.log_and_update(f"    Found component via pattern: {comp_id} - {potential_name}")
+                                            break
+                    else:
+                        self.log_and_update(f"  Found {len(components)} components in setPartsBox_content, skipping comprehensive text search to avoid duplicates")
+                            
+            except Exception as e:
+                self.log_and_update(f"  Error with alternative component extraction: {str(e)}")
+            
+            return components or None
+            
+        except Exception as e:
+            self.log_and_update(f"  Error in component data extraction: {str(e)}")
+            return None
+
+    def read_component_sets(self, driver):
+        """Return the (dt, dd) text pairs of the first two dl of every .setPartsBox_content .partsSet .info"""
+        try:
+            sets = driver.execute_script(page_scripts.COMPONENT_SETS)
+            if isinstance(sets, list):
+                self.log_and_update(f"  Found {len(sets)} partsSet info blocks.")
+                return sets
+        except Exception as e:
+            self.log_and_update(f"  Component script failed, reading partsSet elements one by one: {str(e)}")
+
+        sets = []
+        set_parts_containers = driver.find_elements(By.CSS_SELECTOR, ".setPartsBox_content")
+        self.log_and_update(f"  Found {len(set_parts_containers)} setPartsBox_content containers.")
+        
+        for container_idx, container in enumerate(set_parts_containers):
+            # Look for partsSet divs within this container
+            parts_sets = container.find_elements(By.CSS_SELECTOR, ".partsSet")
+            self.log_and_update(f"    Container {container_idx + 1}: Found {len(parts_sets)} partsSet elements.")
+            
+            for parts_set_idx, parts_set in enumerate(parts_sets):
+                try:
+                    for info_div in parts_set.find_elements(By.CSS_SELECTOR, ".info"):
+                        pairs = []
+                        for dl_idx, dl in enumerate(info_div.find_elements(By.TAG_NAME, "dl")[:2]):
+                            try:
+                                dt_elements = dl.find_elements(By.TAG_NAME, "dt")
+                                dd_elements = dl.find_elements(By.TAG_NAME, "dd")
+                                if dt_elements and dd_elements:
+                                    pairs.append((dt_elements[0].text.strip(), dd_elements[0].text.strip()))
+                            except Exception as e:
+                                self.log_and_update(f"          Error processing DL {dl_idx + 1}: {str(e)}")
+                                continue
+                        sets.append(pairs)
+                except Exception as e:
+                    self.log_and_update(f"      Error processing partsSet {parts_set_idx + 1}: {str(e)}")
+                    continue
+        return sets
+
+    def finalize_components(self, components, product_id):
+        """Deduplicate extracted components, drop the main product and tidy up names"""
+        # Remove duplicates and keep the best component names
+        self.log_and_update(f"  Before deduplication: {len(components)} components found")
+        unique_components = {}
+        for comp in components:
+            comp_id = comp['component_id']
+            comp_name = comp['component_name']
+            
+            # If we haven't seen this component ID, or if this name is longer (more complete), use it
+            if comp_id not in unique_components or len(comp_name) > len(unique_components[comp_id]['component_name']):
+                unique_components[comp_id] = comp
+                self.log_and_update(f"    Updated component {comp_id}: {comp_name}")
+        
+        components = list(unique_components.values())
+        self.log_and_update(f"  After deduplication: {len(components)} unique components")
+        
+        # Filter out duplicates and the main product ID, and improve component names
+        filtered_components = []
+        seen_ids = set()
+        main_product_id = self.id_classifier.classify(product_id).base_id
+        
+        # Common component name mappings for better display
+        component_name_mappings = {
+            'TCA573': 'リモコン便器洗浄ユニット',
+            'TCA': 'リモコン便器洗浄ユニット',  # Generic pattern
+            'TCF': 'ウォシュレット',  # Generic pattern for washlet components
+        }
+        
+        for component in components:
+            comp_id = component['component_id']
+            comp_name = component['component_name']
+            
+            # Skip if we've already seen this component ID
+            if comp_id in seen_ids:
+                self.log_and_update(f"    Skipping duplicate component: {comp_id}")
+                continue
+            
+            # Skip if this is the main product ID (not a sub-component)
+            if comp_id == product_id or comp_id == main_product_id:
+                self.log_and_update(f"    Skipping main product ID: {comp_id}")
+                continue
+            
+            # Skip if the component ID is very similar to the main product ID
+            if comp_id.startswith(main_product_id) and len(comp_id) - len(main_product_id) <= 3:
+                self.log_and_update(f"    Skipping similar to main product ID: {comp_id}")
+                continue
+            
+            # Improve component name if it's generic or contains the component ID
+            if not comp_name or comp_id in comp_name or '構成品番' in comp_name or '品番' in comp_name:
+                # Try to find a better name from mappings
+                better_name = None
+                for pattern, name in component_name_mappings.items():
+                    if comp_id.startswith(pattern):
+                        better_name = name
+                        break
+                
+                if better_name:
+                    comp_name = better_name
+                    self.log_and_update(f"    Improved component name for {comp_id}: {comp_name}")
+                else:
+                    # Fallback to a generic name
+                    comp_name = f"コンポーネント {comp_id}"
+                    self.log_and_update(f"    Using fallback name for {comp_id}: {comp_name}")
+            
+            filtered_components.append({
+                'component_id': comp_id,
+                'component_name': comp_name
+            })
+            seen_ids.add(comp_id)
+            self.log_and_update(f"    Added component: {comp_id} - {comp_name}")
+        
+        self.log_and_update(f"  Component extraction completed. Found {len(components)} total, {len(filtered_components)} unique components after filtering.")
+        
+        # Log all found components for debugging
+        if filtered_components:
+            self.log_and_update("  Final component list:")
+            for i, comp in enumerate(filtered_components):
+                self.log_and_update(f"    {i+1}. {comp['component_id']} - {comp['component_name']}")
+        else:
+            self.log_and_update("  No components found after filtering.")
+            
+        return filtered_components if filtered_components else None
+
+    def extract_features_data(self, driver):
+        """Extract features data from the specifications page class='spec' section"""
+        self.log_and_update("    Starting features data extraction...")
+        try:
+            features_data = {}
+            
+            for row in self.read_feature_rows(driver):
+                category_text = row['category']
+                # Remove "機能ガイド" text and links
+                if "機能ガイド" in category_text:
+                    category_text = category_text.split("機能ガイド")[0].strip()
+                
+                self.log_and_update(f"          Found category: {category_text}")
+                functions = row['functions']
+                for function_text in functions:
+                    self.log_and_update(f"            Found function: {function_text}")
+                
+                if category_text and functions:
+                    features_data[category_text] = functions
+                    self.log_and_update(f"          Added category '{category_text}' with {len(functions)} functions.")
+            
+            self.log_and_update(f"    Features extraction completed. Found {len(features_data)} categories.")
+            return features_data if features_data else None
+            
+        except Exception as e:
+            self.log_and_update(f"    Error in features data extraction: {str(e)}")
+            return None
+
+    def read_feature_rows(self, driver):
+        """Return [{category, functions}] for the rows of section.spec table.facultyTable"""
+        try:
+            rows = driver.execute_script(page_scripts.FEATURE_ROWS)
+            if isinstance(rows, list):
+                self.log_and_update(f"    Found {len(rows)} feature rows.")
+                return rows
+        except Exception as e:
+            self.log_and_update(f"    Feature script failed, reading rows one by one: {str(e)}")
+
+        rows = []
+        spec_sections = driver.find_elements(By.CSS_SELECTOR, "section.spec")
+        self.log_and_update(f"    Found {len(spec_sections)} spec sections.")
+        
+        for section in spec_sections:
+            try:
+                # Look for the faculty table within this section
+                faculty_tables = section.find_elements(By.CSS_SELECTOR, "table.facultyTable")
+                self.log_and_update(f"      Found {len(faculty_tables)} faculty tables in section.")
+                
+                for table in faculty_tables:
+                    table_rows = table.find_elements(By.TAG_NAME, "tr")
+                    self.log_and_update(f"        Processing {len(table_rows)} rows in faculty table.")
+                    
+                    for row in table_rows:
+                        try:
+                            # Get the category from th tag
+                            th_elements = row.find_elements(By.TAG_NAME, "th")
+                            if not th_elements:
+                                continue
+                            
+                            # Get the functions from li tags
+                            functions = []
+                            for li in row.find_elements(By.CSS_SELECTOR, "ul.faculty li"):
+                                function_text = li.text.strip()
+                                if function_text:
+                                    functions.append(function_text)
+                            rows.append({'category': th_elements[0].text.strip(), 'functions': functions})
+                                
+                        except Exception as e:
+                            self.log_and_update(f"          Error processing row: {str(e)}")
+                            continue
+                            
+            except Exception as e:
+                self.log_and_update(f"      Error processing spec section: {str(e)}")
+                continue
+        return rows
+
+    def extract_specifications_data(self, driver, specs_link, specs_href, product_id):
+        """Extract the specifications table and features, sharing the parsed page between products with the same URL"""
+        if not specs_href:
+            return self.read_specifications_page(driver, specs_link, specs_href)
+        return self.page_cache.get_or_load(
+            parse_cache.KIND_SPECS, specs_href,
+            lambda: self.read_specifications_page(driver, specs_link, specs_href)
+        )
+
+    def read_specifications_page(self, driver, specs_link, specs_href):
+        """Extract specifications table data and return as structured data"""
+        self.log_and_update("  Starting specifications data extraction process.")
+        if config.HTTP_FAST_PATH and specs_href:
+            specs_data = self.extract_specifications_data_static(specs_href)
+            if specs_data:
+                return specs_data
+            self.log_and_update("    Static specifications page lacked the specs table, falling back to the browser.")
+        original_window = driver.current_window_handle
+        try:
+            # Navigate to specifications page using URL directly to avoid stale element issues
+            try:
+                if specs_href:
+                    self.log_and_update(f"    Navigating to specs URL: {specs_href}")
+                    self.navigate(driver, specs_href)
+                elif specs_link is not None:
+                    # Get the href from the element before it becomes stale
+                    try:
+                        href = specs_link.get_attribute('href')
+                        if href:
+                            self.log_and_update(f"    Navigating to specs URL from element: {href}")
+                            self.navigate(driver, href)
+                        else:
+                            self.log_and_update("    No href found on specs link element.")
+                            return None
+                    except Exception as e:
+                        self.log_and_update(f"    Error getting href from specs link: {str(e)}")
+                        return None
+                else:
+                    self.log_and_update("    No specifications link or URL available. Skipping.")
+                    return None
+            except Exception as e:
+                self.log_and_update(f"    Error clicking specs link: {str(e)}")
+                return None
+            
+            # Check if a new window/tab opened
+            if len(driver.window_handles) > 1:
+                new_window = [h for h in driver.window_handles if h != original_window][0]
+                driver.switch_to.window(new_window)
+                self.log_and_update("    Switched to new window for specifications.")
+            
+            self.wait_for_page(driver, "specs")
+            
+            specs_table = None
+            table_selectors = ["[class*='spec'] table", "[class*='table']", "table"]
+            
+            for selector in table_selectors:
+                try:
+                    self.log_and_update(f"    Attempting to find table with selector: {selector}")
+                    tables = driver.find_elements(By.CSS_SELECTOR, selector)
+                    if not tables:
+                        self.log_and_update(f"    No tables found with selector: {selector}")
+                        continue
+                    
+                    for table in tables:
+                        if any(k in table.text for k in ['基本情報', '仕様', '質量', '発売時期']):
+                            specs_table = table
+                            self.log_and_update(f"    Found specifications table with keyword match.")
+                            break
+                    if specs_table:
+                        break
+                except Exception as e:
+                    self.log_and_update(f"    Error finding table with selector {selector}: {str(e)}")
+            
+            if not specs_table:
+                self.log_and_update(f"    No specifications table found on the page.")
+                if len(driver.window_handles) > 1 and driver.current_window_handle != original_window:
+                    self.log_and_update("    Closing new window and returning to original.")
+                    driver.close()
+                    driver.switch_to.window(original_window)
+                return None
+            
+            table_data = self.extract_table_data(specs_table)
+            self.log_and_update(f"    Extracted {len(table_data)} rows of table data.")
+            
+            # Extract features from the specifications page
+            features_data = self.extract_features_data(driver)
+            if features_data:
+                self.log_and_update(f"    Extracted {len(features_data)} feature categories.")
+            else:
+                self.log_and_update("    No features data found.")
+            
+            if len(driver.window_handles) > 1 and driver.current_window_handle != original_window:
+                self.log_and_update("    Closing new window and returning to original.")
+                driver.close()
+                driver.switch_to.window(original_window)
+            
+            # Return both table data and features data
+            return {
+                'table_data': table_data,
+                'features_data': features_data
+            }
+            
+        except Exception as e:
+            self.log_and_update(f"    Error extracting specifications data: {str(e)}")
+            try:
+                if len(driver.window_handles) > 1 and driver.current_window_handle != original_window:
+                    self.log_and_update("    Error occurred, but attempting to close new window and return to original.")
+                    driver.close()
+                    driver.switch_to.window(original_window)
+            except:
+                pass
+            return None
+
+    def fetch_static_page(self, url):
+        """Fetch a page over HTTP and parse it, returning None if it is not usable HTML"""
+        try:
+            self.log_and_update(f"    Fetching page over HTTP: {url}")
+            response = self.http_session.get(url, timeout=config.PAGE_LOAD_TIMEOUT)
+            response.raise_for_status()
+            if 'html' not in response.headers.get('content-type', ''):
+                self.log_and_update("    HTTP response is not HTML.")
+                return None
+            self.metrics.add_bytes(len(response.content))
+            if 'charset' in response.headers.get('content-type', '').lower():
+                return page_parsers.parse_html(response.text)
+            # Without a charset header requests assumes ISO-8859-1; let the parser read the <meta> charset
+            return page_parsers.parse_html(response.content)
+        except Exception as e:
+            self.log_and_update(f"    HTTP fetch failed: {str(e)}")
+            return None
+
+    def extract_specifications_data_static(self, specs_href):
+        """Read the specifications table and features from the static HTML of the specs page"""
+        soup = self.fetch_static_page(specs_href)
+        if soup is None:
+            return None
+
+        specs_table = page_parsers.find_specs_table(soup)
+        if specs_table is None:
+            return None
+
+        table_data = page_parsers.parse_table_data(specs_table)
+        self.log_and_update(f"    Extracted {len(table_data)} rows of table data over HTTP.")
+        features_data = page_parsers.parse_features_data(soup) or None
+        if features_data:
+            self.log_and_update(f"    Extracted {len(features_data)} feature categories over HTTP.")
+        else:
+            self.log_and_update("    No features data found.")
+
+        return {
+            'table_data': table_data,
+            'features_data': features_data
+        }
+
+    def extract_component_data_static(self, component_href):
+        """Read components from the static HTML of the 構成品 page.
+
+        Returns None when the page could not be read or lacks the
+        setPartsBox_content markup, so the caller can fall back to the browser.
+        """
+        soup = self.fetch_static_page(component_href)
+        if soup is None or not soup.select(".setPartsBox_content"):
+            return None
+
+        components = page_parsers.parse_components(soup)
+        if not components:
+            return None
+        self.log_and_update(f"  Found {len(components)} components over HTTP.")
+        return components
+
+    def extract_manufacturer_from_product_id(self, product_id):
+        """Extract manufacturer name from product ID"""
+        return product_ids.manufacturer_for(product_id)
+
+    def extract_series_from_product_name(self, product_name):
+        """Extract series information from product name"""
+        return product_ids.series_for(product_name)
+
+    def extract_table_data(self, table_element):
+        """Extract table data exactly as it appears row by row, column by column"""
+        self.log_and_update("      Extracting table data row by row...")
+        try:
+            table_data = table_element.parent.execute_script(page_scripts.TABLE_DATA, table_element)
+        except Exception as e:
+            self.log_and_update(f"      - Table script failed, reading cells one by one: {str(e)}")
+            table_data = None
+        if not isinstance(table_data, list):
+            return self.extract_table_data_by_cells(table_element)
+
+        if self.debug_enabled():
+            for row in table_data:
+                self.log_table_row(row)
+        return table_data
+
+    def extract_table_data_by_cells(self, table_element):
+        """Element-by-element version of extract_table_data, used when the script cannot run"""
+        table_data = []
+        try:
+            rows = table_element.find_elements(By.TAG_NAME, "tr")
+            
+            for i, row in enumerate(rows):
+                try:
+                    # Get all th and td elements in this row
+                    all_cells = row.find_elements(By.TAG_NAME, "th") + row.find_elements(By.TAG_NAME, "td")
+                    
+                    if not all_cells:
+                        continue
+                    
+                    # Extract text from each cell
+                    row_data = []
+                    for cell in all_cells:
+                        cell_text = cell.text.strip()
+                        rowspan = cell.get_attribute("rowspan")
+                        colspan = cell.get_attribute("colspan")
+                        cell_type = cell.tag_name
+                        
+                        row_data.append({
+                            'text': cell_text,
+                            'rowspan': int(rowspan) if rowspan else 1,
+                            'colspan': int(colspan) if colspan else 1,
+                            'type': cell_type
+                        })
+                    
+                    # Store the complete row data
+                    table_data.append({
+                        'row_index': i,
+                        'cells': row_data
+                    })
+                    
+                    if self.debug_enabled():
+                        self.log_table_row(table_data[-1])
+                
+                except Exception as e:
+                    self.log_and_update(f"      - Error processing table row {i}: {str(e)}")
+                    continue
+        except Exception as e:
+            self.log_and_update(f"      - Error extracting table data: {str(e)}")
+        return table_data
+
+    def log_table_row(self, row):
+        """Log the cells of one extract_table_data row at debug level"""
+        self.log_and_update(f"      - Row {row['row_index']}: {len(row['cells'])} cells", logging.DEBUG)
+        for j, cell in enumerate(row['cells']):
+            self.log_and_update(f"        Cell {j}: '{cell['text']}' ({cell['type']}, rowspan={cell['rowspan']}, colspan={cell['colspan']})", logging.DEBUG)
+
+    def generate_rakuten_html(self, table_data, product_id):
+        """Generate HTML for Rakuten EC site based on specifications data with 3-column structure"""
+        self.log_and_update("      Generating Rakuten HTML...")
+        try:
+            html_content = "".join(self.templates.rakuten_parts(table_data, product_id))
+            self.log_and_update("      Rakuten HTML generated successfully.")
+            return html_content
+        except Exception as e:
+            self.log_and_update(f"      Error generating Rakuten HTML: {str(e)}")
+            return None
+
+    def generate_template_html(self, specs_data, product_id, product_name="", manufacturer="", series="", components=None, has_components=False):
+        """Generate HTML following the template structure with product-specific information"""
+        self.log_and_update("      Generating template HTML...")
+        try:
+            html_content = self.templates.render_template(
+                specs_data, product_id, product_name, manufacturer, series, components, has_components
+            )
+            self.log_and_update("      Template HTML generated successfully.")
+            return html_content
+        except Exception as e:
+            self.log_and_update(f"      Error generating template HTML: {str(e)}")
+            return None
+
+    def save_template_html(self, path, specs_data, product_id, product_name="", manufacturer="", series="", components=None, has_components=False):
+        """Write the template HTML of generate_template_html straight to path; returns path, or None on failure"""
+        self.log_and_update("      Generating template HTML...")
+        try:
+            self.templates.render_template_to_file(
+                path, specs_data, product_id, product_name, manufacturer, series, components, has_components
+            )
+            self.log_and_update("      Template HTML generated successfully.")
+            return path
+        except Exception as e:
+            self.log_and_update(f"      Error generating template HTML: {str(e)}")
+            return None
+
+    def generate_specs_table_html(self, table_data):
+        """Generate the specifications table HTML exactly as the original table structure"""
+        return "".join(self.templates.specs_table_parts(table_data))
+
+    def generate_component_html(self, components, formatted_product_id, product_name, has_components=False):
+        """Generate the component section HTML following the template format"""
+        return "".join(self.templates.component_parts(components, formatted_product_id, product_name, has_components))
+
+    def generate_features_html(self, features_data):
+        """Generate the features section HTML following the template format"""
+        return "".join(self.templates.features_parts(features_data))
+
+    def download_direct_link(self, diagram, product_id):
+        """Download a diagram from a direct link"""
+        try:
+            self.log_and_update(f"  Downloading direct link: {diagram['text']}")
+            
+            # Create directory structure
+            product_dir = os.path.join(self.output_dir, product_id)
+            diagram_dir = os.path.join(product_dir, config.DIAGRAM_FOLDER_NAME)
+            
+            os.makedirs(diagram_dir, exist_ok=True)
+            self.log_and_update(f"  Ensured diagram directory exists: {diagram_dir}")
+            
+            # Download the file
+            filename = self.download_file(diagram['url'], diagram_dir)
+            if filename:
+                self.log_and_update(f"  Downloaded: {filename}")
+                return True
+            else:
+                self.log_and_update(f"  Failed to download: {diagram['url']}")
+                return False
+                
+        except Exception as e:
+            self.log_and_update(f"  Error downloading direct link: {str(e)}")
+            return False
+
+    def process_product_page(self, driver, product, product_id):
+        try:
+            self.log_and_update(f"Processing product page: {product['text']}")
+            
+            # Navigate to product page
+            self.navigate(driver, product['url'])
+            self.wait_for_page(driver, "diagram")
+            self.log_and_update("  Navigated to product page and waited for load.")
+            
+            # Get page source
+            page_source = driver.page_source
+            soup = BeautifulSoup(page_source, 'html.parser')
+            
+            # Look for 商品図 (product diagram) section
+            diagram_links = []
+            
+            # Search for text containing 商品図
+            diagram_sections = soup.find_all(text=re.compile(r'商品図'))
+            
+            for section in diagram_sections:
+                parent = section.parent
+                # Look for links in the same section
+                links = parent.find_all('a', href=True)
+                for link in links:
+                    href = link.get('href')
+                    if href:
+                        full_url = urljoin(driver.current_url, href)
+                        diagram_links.append({
+                            'url': full_url,
+                            'text': link.get_text(strip=True)
+                        })
+            
+            # Also search for common file extensions
+            all_links = soup.find_all('a', href=True)
+            for link in all_links:
+                href = link.get('href')
+                if href:
+                    # Check if it's a downloadable file
+                    if any(href.lower().endswith(ext) for ext in config.SUPPORTED_EXTENSIONS):
+                        full_url = urljoin(driver.current_url, href)
+                        diagram_links.append({
+                            'url': full_url,
+                            'text': link.get_text(strip=True) or os.path.basename(href)
+                        })
+            
+            if not diagram_links:
+                self.log_and_update(f"  No diagrams found for {product['text']}")
+                return False
+            
+            # Create directory structure
+            product_dir = os.path.join(self.output_dir, product_id)
+            diagram_dir = os.path.join(product_dir, config.DIAGRAM_FOLDER_NAME)
+            
+            os.makedirs(diagram_dir, exist_ok=True)
+            
+            # Download diagrams
+            downloaded = False
+            for diagram in diagram_links:
+                try:
+                    self.log_and_update(f"  Attempting to download diagram from product page: {diagram['url']}")
+                    filename = self.download_file(diagram['url'], diagram_dir)
+                    if filename:
+                        self.log_and_update(f"  Downloaded: {filename}")
+                        downloaded = True
+                except Exception as e:
+                    self.log_and_update(f"  Failed to download {diagram['url']}: {str(e)}")
+            
+            return downloaded
+            
+        except Exception as e:
+            self.log_and_update(f"  Error processing page: {str(e)}")
+            return False
+    
+    def download_for_stage(self, url, directory, stage=None):
+        """download_file for the download scheduler, counting the bytes for stage"""
+        with self.metrics.attribute_to(stage):
+            return self.download_file(url, directory)
+
+    def download_file(self, url, directory):
+        try:
+            self.log_and_update(f"    Starting file download for URL: {url}")
+            known = self.blobs.lookup(url) if self.blobs else None
+            
+            # Get filename from URL
+            parsed_url = urlparse(url)
+            filename = os.path.basename(parsed_url.path)
+            
+            # Clean up filename
+            if filename:
+                filename = filename.split('?')[0]
+                filename = "".join(c for c in filename if c.isalnum() or c in "._-")
+            
+            if not filename or '.' not in filename:
+                # Named after the response's content type once it arrives
+                filename = known['filename'] if known and known['filename'] else None
+            
+            if known and filename and time.time() - known['fetched_at'] < config.DOWNLOAD_REVALIDATE_SECONDS:
+                # Fetched recently, possibly for another product: link the stored copy
+                filename = self.place_blob(known['sha256'], directory, filename)
+                self.log_and_update(f"    Reusing stored copy: {filename} ({known['size']} bytes)")
+                return filename
+            
+            # Ask the server to skip the body if the file has not changed
+            headers = {}
+            if known and filename:
+                if known['etag']:
+                    headers['If-None-Match'] = known['etag']
+                if known['last_modified']:
+                    headers['If-Modified-Since'] = known['last_modified']
+            
+            with self.http_session.get(url, timeout=config.DOWNLOAD_TIMEOUT, stream=True, headers=headers) as response:
+                if headers and response.status_code == 304:
+                    self.blobs.touch(url)
+                    filename = self.place_blob(known['sha256'], directory, filename)
+                    self.log_and_update(f"    Not modified since the last download: {filename}")
+                    return filename
+                response.raise_for_status()
+                
+                content_type = response.headers.get('content-type', '')
+                if 'text/html' in content_type:
+                    self.log_and_update("    Warning: Link leads to an HTML page, not a direct file. Skipping direct download.")
+                    return None
+                
+                if not filename:
+                    filename = self.filename_for_content_type(url, content_type)
+                    self.log_and_update(f"    Filename from URL is invalid, using {filename} based on content type.")
+                filepath = os.path.join(directory, filename)
+                
+                chunks = self.counted_chunks(response.iter_content(chunk_size=config.CHUNK_SIZE))
+                if self.blobs:
+                    sha256, size = self.blobs.write_stream(chunks)
+                    if not size:
+                        self.log_and_update("    File download failed - file is empty or missing")
+                        return None
+                    self.blobs.remember(url, sha256, size, filename,
+                                        etag=response.headers.get('ETag'),
+                                        last_modified=response.headers.get('Last-Modified'))
+                    filename = self.place_blob(sha256, directory, filename, replaces=known['sha256'] if known else None)
+                    filepath = os.path.join(directory, filename)
+                else:
+                    content_length = response.headers.get('content-length')
+                    if os.path.exists(filepath) and content_length and str(os.path.getsize(filepath)) == content_length:
+                        self.log_and_update(f"    Unchanged file already present: {filename}")
+                        return filename
+                    with open(filepath, 'wb') as f:
+                        for chunk in chunks:
+                            f.write(chunk)
+            
+            if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
+                self.log_and_update(f"    Successfully downloaded: {filename} ({os.path.getsize(filepath)} bytes)")
+                return filename
+            else:
+                self.log_and_update(f"    File download failed - file is empty or missing")
+                return None
+            
+        except Exception as e:
+            self.log_and_update(f"    Download failed: {str(e)}")
+            return None
+
+    def filename_for_content_type(self, url, content_type):
+        """Return a filename for a URL without one, stable across runs for the same URL"""
+        token = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        if 'pdf' in content_type:
+            return f"diagram_{token}.pdf"
+        elif 'image' in content_type:
+            ext = content_type.split('/')[-1].split(';')[0].strip()
+            if ext in ['jpeg', 'jpg']:
+                ext = 'jpg'
+            elif ext not in ['png', 'gif', 'bmp', 'tiff']:
+                ext = 'jpg'
+            return f"image_{token}.{ext}"
+        return f"file_{token}.dat"
+
+    def counted_chunks(self, chunks):
+        """Pass chunks through, counting their bytes in the run metrics"""
+        for chunk in chunks:
+            self.metrics.add_bytes(len(chunk))
+            yield chunk
+
+    def place_blob(self, sha256, directory, filename, replaces=None):
+        """Link a stored blob into directory and return the filename used.
+
+        An existing file with the same content is left alone and one holding
+        the blob replaces (an older version from the same URL) is updated in
+        place. A file with other content keeps its name and the blob gets one
+        ending in the start of its hash.
+        """
+        filepath = os.path.join(directory, filename)
+        if os.path.lexists(filepath):
+            if self.blobs.holds(filepath, sha256):
+                return filename
+            if replaces and self.blobs.holds(filepath, replaces):
+                self.blobs.link(sha256, filepath)
+                return filename
+            # Name the other content after its hash, so re-runs pick the same name
+            name, ext = os.path.splitext(filename)
+            filename = f"{name}_{sha256[:8]}{ext}"
+            filepath = os.path.join(directory, filename)
+            if os.path.lexists(filepath) and self.blobs.holds(filepath, sha256):
+                return filename
+            self.log_and_update(f"    A different file already has that name, saving as {filename}.")
+        self.blobs.link(sha256, filepath)
+        return filename
+
+    def write_named_by_hash(self, chunks, directory, filename):
+        """Write chunks to directory without a blob store and return the filename used.
+
+        Like place_blob, an existing file with the same content is kept and one
+        with other content keeps its name while the new file gets one ending in
+        the start of its hash.
+        """
+        filepath = os.path.join(directory, filename)
+        part_path = filepath + ".part"
+        digest = hashlib.sha256()
+        with open(part_path, 'wb') as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                f.write(chunk)
+        sha256 = digest.hexdigest()
+        if os.path.exists(filepath):
+            if crawl_state.hash_file(filepath) != sha256:
+                name, ext = os.path.splitext(filename)
+                filename = f"{name}_{sha256[:8]}{ext}"
+                filepath = os.path.join(directory, filename)
+                self.log_and_update(f"    A different file already has that name, saving as {filename}.")
+            if os.path.exists(filepath) and crawl_state.hash_file(filepath) == sha256:
+                os.remove(part_path)
+                return filename
+        os.replace(part_path, filepath)
+        return filename
+
+    def get_browser_headers(self):
+        """Get realistic browser headers to avoid 403 errors"""
+        return {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+            'Accept-Language': 'en-US,en;q=0.9,ja;q=0.8',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'DNT': '1',
+            'Connection': 'keep-alive',
+            'Upgrade-Insecure-Requests': '1',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'none',
+            'Sec-Fetch-User': '?1',
+            'Cache-Control': 'max-age=0',
+            'Referer': 'https://www.com-et.com/jp/'
+        }
+
+    def import_browser_cookies(self, driver):
+        """Copy the browser's cookies into the HTTP session used for downloads"""
+        try:
+            count = http_session.import_driver_cookies(self.http_session, driver)
+            self.log_and_update(f"Imported {count} browser cookies for HTTP downloads.")
+        except Exception as e:
+            self.log_and_update(f"Could not import browser cookies: {str(e)}")
+
+    def download_product_image(self, driver, image_info, diagram_dir):
+        """Download a product image from the href link."""
+        try:
+            href = image_info['href']
+            alt_text = image_info['alt']
+            
+            self.log_and_update(f"    Downloading image for {alt_text}: {href}")
+            
+            # Direct download from the href link
+            if self.download_file(href, diagram_dir):
+                self.log_and_update(f"    Successfully downloaded image for {alt_text}")
+                return True
+            else:
+                self.log_and_update(f"    Failed to download image for {alt_text}")
+                return False
+                
+        except Exception as e:
+            self.log_and_update(f"    Error downloading image: {str(e)}")
+            return False
+    
+    def update_status(self, message):
+        """Report a one-line status on the event bus"""
+        if self.events:
+            self.events.publish(crawl_events.STATUS, message)
+    
+    def update_results(self, message):
+        """Report a log message on the event bus"""
+        if self.events:
+            self.events.publish(crawl_events.LOG, message)
+    
+    def update_progress(self, value):
+        """Report overall progress as a percentage on the event bus"""
+        if self.events:
+            self.events.publish(crawl_events.PROGRESS, value)
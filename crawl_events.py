@@ -0,0 +1,38 @@
+"""
+Thread-safe event bus between the crawl engine and its front end
+
+The engine publishes progress events from the search thread and the browser
+workers; the front end drains them on its own thread at its own pace.
+"""
+
+import queue
+import time
+from collections import namedtuple
+
+# Event kinds
+LOG = "log"
+STATUS = "status"
+PROGRESS = "progress"
+FINISHED = "finished"
+
+CrawlEvent = namedtuple('CrawlEvent', ['kind', 'value', 'time'])
+
+
+class EventBus:
+    """Unbounded FIFO of CrawlEvent records"""
+
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def publish(self, kind, value=None):
+        self.events.put(CrawlEvent(kind, value, time.time()))
+
+    def drain(self, max_events=None):
+        """Return the queued events, at most max_events of them, without blocking"""
+        drained = []
+        while max_events is None or len(drained) < max_events:
+            try:
+                drained.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return drained
@@ -0,0 +1,203 @@
+"""
+Buffered logging pipeline for the crawler
+
+Callers only put records on a queue (logging.handlers.QueueHandler). A
+QueueListener thread formats them and writes them to size-rotated files that
+stay open, and a flush thread pushes the buffered output to disk every
+LOG_FLUSH_INTERVAL seconds. Honours ENABLE_LOGGING, LOG_LEVEL, LOG_FILE and
+LOG_FORMAT from config.py.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+import config
+
+LOGGER_NAME = "comet"
+LISTENER_CALL_TIMEOUT = 10  # seconds to wait for the listener to reach a queued call
+
+
+class TextFormatter(logging.Formatter):
+    """Formats records as '[ctime] message', the format of the per-search log files"""
+
+    def format(self, record):
+        return f"[{time.ctime(record.created)}] {record.getMessage()}"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that does not flush after every record.
+
+    Output stays in the file buffer until flush_now() is called by the flush
+    thread, the file rotates, or the handler is closed.
+    """
+
+    def flush(self):
+        pass
+
+    def flush_now(self):
+        self.acquire()
+        try:
+            if self.stream:
+                self.stream.flush()
+        finally:
+            self.release()
+
+
+class FanoutHandler(logging.Handler):
+    """Hands each record to a list of handlers that can change while the listener runs.
+
+    A record carrying a listener_call attribute is not logged; the call is
+    run instead, in queue order, on the listener thread.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.targets = ()
+
+    def add(self, handler):
+        with self.lock:
+            self.targets = self.targets + (handler,)
+
+    def remove(self, handler):
+        with self.lock:
+            self.targets = tuple(h for h in self.targets if h is not handler)
+
+    def emit(self, record):
+        call = getattr(record, 'listener_call', None)
+        if call is not None:
+            call()
+            return
+        for handler in self.targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class LogPipeline:
+    """Queue, listener thread, flush thread and the file handlers behind the crawl logger"""
+
+    def __init__(self, output_dir):
+        self.logger = logging.getLogger(LOGGER_NAME)
+        self.logger.setLevel(getattr(logging, str(config.LOG_LEVEL).upper(), logging.INFO))
+        self.logger.propagate = False
+
+        self.records = queue.SimpleQueue()
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+        self.logger.addHandler(logging.handlers.QueueHandler(self.records))
+
+        self.fanout = FanoutHandler()
+        self.listener = logging.handlers.QueueListener(self.records, self.fanout)
+        self.listener.start()
+        self.listening = True
+
+        self.search_handler = None
+        self.stop_event = threading.Event()
+        self.flush_thread = threading.Thread(target=self._flush_loop, name="log-flush")
+        self.flush_thread.daemon = True
+        self.flush_thread.start()
+
+        if config.ENABLE_LOGGING and config.LOG_FILE:
+            self.fanout.add(self.open_file_handler(os.path.join(output_dir, config.LOG_FILE)))
+
+    def open_file_handler(self, path):
+        """Return a buffered, size-rotated file handler in the configured format"""
+        handler = BufferedRotatingFileHandler(
+            path, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+        if config.LOG_FORMAT == "json":
+            handler.setFormatter(JsonLinesFormatter())
+        else:
+            handler.setFormatter(TextFormatter())
+        return handler
+
+    def start_search_log(self, path):
+        """Send records to a per-search log file from now on, closing the previous one"""
+        self.close_search_log()
+        if config.ENABLE_LOGGING:
+            self.search_handler = self.open_file_handler(path)
+            self.fanout.add(self.search_handler)
+
+    def close_search_log(self):
+        """Close the per-search log file once the records queued before now are written to it"""
+        handler, self.search_handler = self.search_handler, None
+        if handler:
+            def detach():
+                self.fanout.remove(handler)
+                handler.close()
+            self.run_on_listener(detach)
+
+    def run_on_listener(self, func):
+        """Run func on the listener thread after the records already queued, and wait for it.
+
+        Handlers the listener may be writing to can only be changed safely
+        there. Runs func directly once the listener has stopped.
+        """
+        if not self.listening:
+            func()
+            return
+        done = threading.Event()
+
+        def call():
+            try:
+                func()
+            finally:
+                done.set()
+
+        self.records.put(logging.makeLogRecord({'listener_call': call}))
+        done.wait(LISTENER_CALL_TIMEOUT)
+
+    def _flush_loop(self):
+        while not self.stop_event.wait(config.LOG_FLUSH_INTERVAL):
+            self.flush()
+
+    def flush(self):
+        for handler in self.fanout.targets:
+            try:
+                handler.flush_now()
+            except Exception:
+                pass
+
+    def shutdown(self):
+        """Write out every queued record and close the files"""
+        self.stop_event.set()
+        self.listening = False
+        self.listener.stop()
+        for handler in self.fanout.targets:
+            self.fanout.remove(handler)
+            handler.close()
+        self.search_handler = None
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline(output_dir):
+    """Return the process-wide log pipeline, starting it on first use"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = LogPipeline(output_dir)
+            atexit.register(_pipeline.shutdown)
+        return _pipeline
@@ -0,0 +1,195 @@
+"""
+Per-stage timing for a crawl run
+
+The engine wraps each stage of a search (driver start, search submit,
+result-page parsing, pagination, color variations and the per-product
+steps) in RunMetrics.stage(). Every sample records the wall time, the
+WebDriver commands sent and the HTTP bytes received on that thread while the
+stage ran. Work handed to other threads (result-page prefetches, color
+variation fetches, scheduled downloads) runs under attribute_to(stage), which
+adds its bytes to a locked per-stage counter instead. report() summarises the
+samples per stage with p50/p95/max, lists the slowest products and totals the
+time spent waiting for pages.
+"""
+
+import contextlib
+import json
+import math
+import threading
+import time
+
+import crawl_state
+
+# Stage names; the per-product steps reuse the crawl-state step names
+STAGE_DRIVER_INIT = "driver_init"
+STAGE_SEARCH_SUBMIT = "search_submit"
+STAGE_RESULT_PAGE = "result_page_parse"
+STAGE_PAGINATION = "pagination"
+STAGE_COLOR_VARIATIONS = "color_variations"
+STAGE_IMAGES = crawl_state.STEP_IMAGES
+STAGE_DIAGRAM = crawl_state.STEP_DIAGRAM
+STAGE_BUNKAIZU = crawl_state.STEP_BUNKAIZU
+STAGE_COMPONENTS = crawl_state.STEP_COMPONENTS
+STAGE_SPECS = crawl_state.STEP_SPECS
+STAGE_TEMPLATE = crawl_state.STEP_TEMPLATE
+STAGE_PRODUCT = "product"
+
+SLOWEST_PRODUCTS = 10
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class RunMetrics:
+    """Thread-safe collector of stage samples for one search"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        """Forget the samples of the previous search"""
+        with self.lock:
+            self.samples = []
+            self.stage_bytes = {}  # stage -> bytes counted by attribute_to() threads
+            self.wait_seconds = 0.0
+            self.started = time.time()
+
+    def _counters(self):
+        local = self.local
+        if not hasattr(local, 'commands'):
+            local.commands = 0
+            local.bytes = 0
+        return local
+
+    def instrument_driver(self, driver):
+        """Count the WebDriver commands sent through driver, including those of its elements"""
+        execute = driver.execute
+
+        def counted(driver_command, params=None):
+            self._counters().commands += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted
+        return driver
+
+    def add_bytes(self, count):
+        """Count HTTP bytes received on this thread, or for the stage it is attributed to"""
+        stage = getattr(self.local, 'stage', None)
+        if stage is None:
+            self._counters().bytes += count
+            return
+        with self.lock:
+            self.stage_bytes[stage] = self.stage_bytes.get(stage, 0) + count
+
+    @contextlib.contextmanager
+    def attribute_to(self, stage):
+        """Count the bytes received on this thread in the enclosed block for stage.
+
+        For worker threads that do part of a stage running elsewhere; with
+        stage=None the bytes stay on this thread's own samples.
+        """
+        previous = getattr(self.local, 'stage', None)
+        self.local.stage = stage
+        try:
+            yield
+        finally:
+            self.local.stage = previous
+
+    def bind(self, stage, func):
+        """Wrap func so that, on whatever thread calls it, its bytes count for stage"""
+        def attributed(*args, **kwargs):
+            with self.attribute_to(stage):
+                return func(*args, **kwargs)
+        return attributed
+
+    def add_wait(self, seconds):
+        """Count time spent waiting for a page or window"""
+        with self.lock:
+            self.wait_seconds += seconds
+
+    @contextlib.contextmanager
+    def stage(self, name, product_id=None):
+        """Time the enclosed block as one sample of stage name"""
+        counters = self._counters()
+        commands_before = counters.commands
+        bytes_before = counters.bytes
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            sample = {
+                'stage': name,
+                'product_id': product_id,
+                'seconds': time.perf_counter() - started,
+                'webdriver_commands': counters.commands - commands_before,
+                'http_bytes': counters.bytes - bytes_before
+            }
+            with self.lock:
+                self.samples.append(sample)
+
+    def report(self):
+        """Summarise the samples collected since the last reset()"""
+        with self.lock:
+            samples = list(self.samples)
+            stage_bytes = dict(self.stage_bytes)
+            wait_seconds = self.wait_seconds
+            started = self.started
+
+        stages = {}
+        for name in dict.fromkeys(sample['stage'] for sample in samples):
+            stage_samples = [sample for sample in samples if sample['stage'] == name]
+            seconds = sorted(sample['seconds'] for sample in stage_samples)
+            stages[name] = {
+                'count': len(seconds),
+                'total_seconds': round(sum(seconds), 3),
+                'p50_seconds': round(percentile(seconds, 0.50), 3),
+                'p95_seconds': round(percentile(seconds, 0.95), 3),
+                'max_seconds': round(seconds[-1], 3),
+                'webdriver_commands': sum(sample['webdriver_commands'] for sample in stage_samples),
+                'http_bytes': sum(sample['http_bytes'] for sample in stage_samples) + stage_bytes.pop(name, 0)
+            }
+        for name, count in stage_bytes.items():
+            # Bytes of a stage that recorded no samples in this run
+            stages[name] = {
+                'count': 0,
+                'total_seconds': 0,
+                'p50_seconds': 0,
+                'p95_seconds': 0,
+                'max_seconds': 0,
+                'webdriver_commands': 0,
+                'http_bytes': count
+            }
+
+        products = sorted(
+            (sample for sample in samples if sample['stage'] == STAGE_PRODUCT),
+            key=lambda sample: sample['seconds'],
+            reverse=True
+        )
+        return {
+            'started': round(started, 3),
+            'elapsed_seconds': round(time.time() - started, 3),
+            'wait_seconds': round(wait_seconds, 3),
+            'stages': stages,
+            'slowest_products': [
+                {
+                    'product_id': sample['product_id'],
+                    'seconds': round(sample['seconds'], 3),
+                    'webdriver_commands': sample['webdriver_commands']
+                }
+                for sample in products[:SLOWEST_PRODUCTS]
+            ]
+        }
+
+    def write_report(self, path):
+        """Write report() to path as JSON and return it"""
+        report = self.report()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
@@ -0,0 +1,210 @@
+"""
+Persistent crawl state for resumable and incremental runs
+
+Progress is kept in a SQLite database inside the output directory:
+
+- runs: one row per search term, with the last results page reached, so an
+  interrupted run can continue from that page.
+- products: one row per product ID with its product record (URLs and text
+  only), so products queued before a crash can be processed on restart.
+- steps: one row per finished step of a product (images, 商品図, 分解図,
+  構成品, 仕様一覧, template HTML) with a timestamp, the files it produced
+  and a SHA-256 of their content.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Step names recorded in the steps table
+STEP_IMAGES = "images"
+STEP_DIAGRAM = "diagram"
+STEP_BUNKAIZU = "bunkaizu"
+STEP_COMPONENTS = "components"
+STEP_SPECS = "specs"
+STEP_TEMPLATE = "template"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    search_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    start_url TEXT,
+    page_index INTEGER NOT NULL DEFAULT 1,
+    page_url TEXT,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    search_id TEXT,
+    url TEXT,
+    record TEXT,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    product_id TEXT NOT NULL,
+    step TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    files TEXT,
+    content_hash TEXT,
+    data TEXT,
+    PRIMARY KEY (product_id, step)
+);
+CREATE INDEX IF NOT EXISTS products_search ON products (search_id, status);
+"""
+
+
+def hash_file(path, chunk_size=65536):
+    """Return the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_files(paths):
+    """Return one SHA-256 over the content of several files, or None for no files"""
+    if not paths:
+        return None
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.basename(path).encode('utf-8'))
+        digest.update(hash_file(path).encode('ascii'))
+    return digest.hexdigest()
+
+
+class CrawlState:
+    """SQLite backed record of runs, products and finished steps.
+
+    One connection is shared by the search thread and the browser workers,
+    so every statement runs under a lock.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.executescript(SCHEMA)
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _execute(self, sql, params=()):
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+            return cursor
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    # Runs
+
+    def start_run(self, search_id, start_url):
+        """Start or resume the run for a search term.
+
+        Returns the unfinished run row to resume from, or None when the run
+        starts from the first page.
+        """
+        now = time.time()
+        rows = self._query("SELECT * FROM runs WHERE search_id = ?", (search_id,))
+        if rows and rows[0]['status'] == 'running':
+            self._execute("UPDATE runs SET updated_at = ? WHERE search_id = ?", (now, search_id))
+            return dict(rows[0])
+
+        self._execute(
+            "INSERT OR REPLACE INTO runs (search_id, status, start_url, page_index, page_url, started_at, updated_at) "
+            "VALUES (?, 'running', ?, 1, ?, ?, ?)",
+            (search_id, start_url, start_url, now, now)
+        )
+        return None
+
+    def record_page(self, search_id, page_index, page_url):
+        """Remember the results page a run has reached"""
+        self._execute(
+            "UPDATE runs SET page_index = ?, page_url = ?, updated_at = ? WHERE search_id = ?",
+            (page_index, page_url, time.time(), search_id)
+        )
+
+    def finish_run(self, search_id):
+        self._execute(
+            "UPDATE runs SET status = 'finished', updated_at = ? WHERE search_id = ?",
+            (time.time(), search_id)
+        )
+
+    # Products
+
+    def add_product(self, search_id, record):
+        """Store a product record dict as pending, unless it is already complete"""
+        now = time.time()
+        url = record.get('specs_href') or record.get('diagram_href')
+        self._execute(
+            "INSERT INTO products (product_id, search_id, url, record, status, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, 'pending', ?, ?) "
+            "ON CONFLICT(product_id) DO UPDATE SET search_id = excluded.search_id, url = excluded.url, "
+            "record = excluded.record, updated_at = excluded.updated_at",
+            (record['product_id'], search_id, url, json.dumps(record, ensure_ascii=False), now, now)
+        )
+
+    def pending_products(self, search_id):
+        """Return the stored records of products a run queued but did not complete"""
+        rows = self._query(
+            "SELECT record FROM products WHERE search_id = ? AND status = 'pending' ORDER BY created_at",
+            (search_id,)
+        )
+        return [json.loads(row['record']) for row in rows if row['record']]
+
+    def mark_product_complete(self, product_id):
+        self._execute(
+            "UPDATE products SET status = 'complete', updated_at = ? WHERE product_id = ?",
+            (time.time(), product_id)
+        )
+
+    def is_product_complete(self, product_id):
+        """True if every step of the product finished and its files are still on disk"""
+        rows = self._query("SELECT status FROM products WHERE product_id = ?", (product_id,))
+        if not rows or rows[0]['status'] != 'complete':
+            return False
+        steps = self._query("SELECT files FROM steps WHERE product_id = ?", (product_id,))
+        return all(self._files_exist(row['files']) for row in steps)
+
+    # Steps
+
+    def record_step(self, product_id, step, files=(), data=None):
+        """Record a finished step with the files it produced and optional result data"""
+        files = [path for path in files if os.path.exists(path)]
+        self._execute(
+            "INSERT OR REPLACE INTO steps (product_id, step, completed_at, files, content_hash, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (product_id, step, time.time(), json.dumps(files, ensure_ascii=False),
+             hash_files(files), json.dumps(data, ensure_ascii=False) if data is not None else None)
+        )
+
+    def get_step(self, product_id, step):
+        """Return the finished step as a dict, or None if it is missing or its files are gone"""
+        rows = self._query("SELECT * FROM steps WHERE product_id = ? AND step = ?", (product_id, step))
+        if not rows or not self._files_exist(rows[0]['files']):
+            return None
+        row = dict(rows[0])
+        row['files'] = json.loads(row['files']) if row['files'] else []
+        row['data'] = json.loads(row['data']) if row['data'] else None
+        return row
+
+    def _files_exist(self, files_json):
+        files = json.loads(files_json) if files_json else []
+        return all(os.path.exists(path) for path in files)
@@ -0,0 +1,62 @@
+"""
+Concurrent download scheduler
+
+File downloads run on a bounded thread pool so the browser can move on to
+the next page while bytes stream to disk. Each host gets its own concurrency
+limit, and submit() blocks once too many downloads are waiting.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import crawl_logging
+
+logger = logging.getLogger(crawl_logging.LOGGER_NAME)
+
+
+class DownloadScheduler:
+    """Run download_func(url, directory, *args) calls concurrently.
+
+    submit() returns a Future whose result is whatever download_func returned
+    (the saved filename or None), or None if it raised; the exception is
+    logged with the URL.
+    """
+
+    def __init__(self, download_func, max_workers, per_host_limit, max_pending):
+        self.download_func = download_func
+        self.per_host_limit = per_host_limit
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="download")
+        self.pending = threading.BoundedSemaphore(max_pending)
+        self.host_limits = {}
+        self.lock = threading.Lock()
+
+    def _host_limit(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.Semaphore(self.per_host_limit)
+            return self.host_limits[host]
+
+    def submit(self, url, directory, *args):
+        """Queue a download, waiting while the queue is full; args are passed on to download_func"""
+        self.pending.acquire()
+        try:
+            future = self.executor.submit(self._run, url, directory, *args)
+        except Exception:
+            self.pending.release()
+            raise
+        future.add_done_callback(lambda _: self.pending.release())
+        return future
+
+    def _run(self, url, directory, *args):
+        with self._host_limit(url):
+            try:
+                return self.download_func(url, directory, *args)
+            except Exception:
+                logger.exception("Download of %s failed", url)
+                return None
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
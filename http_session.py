@@ -0,0 +1,58 @@
+"""
+Shared HTTP session for page fetches and file downloads
+
+One requests.Session keeps connections to com-et.com and search.toto.jp
+alive across downloads, retries transient failures with backoff and can
+carry the cookies of the browser session.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import config
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+def create_session(headers):
+    """Return a keep-alive session with pooled connections and retry/backoff"""
+    session = requests.Session()
+    session.headers.update(headers)
+
+    retry = Retry(
+        total=config.HTTP_RETRIES,
+        backoff_factor=config.HTTP_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['HEAD', 'GET']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=config.HTTP_POOL_HOSTS,
+        pool_maxsize=config.HTTP_POOL_SIZE,
+        max_retries=retry
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def import_driver_cookies(session, driver):
+    """Copy the browser's cookies into the session and return how many were copied.
+
+    Chrome's DevTools protocol returns the cookies of every domain; other
+    drivers only expose the cookies of the current page's domain.
+    """
+    try:
+        cookies = driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+    except Exception:
+        cookies = driver.get_cookies()
+
+    for cookie in cookies:
+        session.cookies.set(
+            cookie['name'],
+            cookie['value'],
+            domain=cookie.get('domain'),
+            path=cookie.get('path', '/')
+        )
+    return len(cookies)
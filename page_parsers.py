@@ -0,0 +1,383 @@
+"""
+Static HTML parsers for COM-ET pages
+
+These mirror the Selenium based extraction in crawl_engine.py but work on
+HTML fetched over plain HTTP, so pages that do not need JavaScript can be read
+without a browser.
+"""
+
+import os
+import re
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup, Comment, NavigableString
+
+from product_record import ImageLink, ProductRecord
+
+# Tags that start a new line in rendered text
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt',
+    'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr',
+    'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'tr', 'ul'
+}
+
+SPECS_TABLE_SELECTORS = ["[class*='spec'] table", "[class*='table']", "table"]
+SPECS_TABLE_KEYWORDS = ['基本情報', '仕様', '質量', '発売時期']
+
+
+def parse_html(html):
+    """Parse HTML with the built-in parser; bytes are decoded using the document's <meta> charset"""
+    return BeautifulSoup(html, 'html.parser')
+
+
+def element_text(tag):
+    """Return the visible text of a tag, close to what Selenium's element.text gives"""
+    if tag is None:
+        return ""
+    if isinstance(tag, NavigableString):
+        return re.sub(r'\s+', ' ', str(tag)).strip()
+
+    parts = []
+    for node in tag.descendants:
+        if isinstance(node, NavigableString):
+            if isinstance(node, Comment) or node.parent.name in ('script', 'style'):
+                continue
+            parts.append(re.sub(r'\s+', ' ', str(node)))
+        elif node.name == 'br' or node.name in BLOCK_TAGS:
+            parts.append('\n')
+
+    lines = [line.strip() for line in ''.join(parts).split('\n')]
+    return '\n'.join(line for line in lines if line)
+
+
+def find_specs_table(soup):
+    """Find the specifications table using the same selectors as the browser path"""
+    for selector in SPECS_TABLE_SELECTORS:
+        for table in soup.select(selector):
+            if table.name != 'table':
+                continue
+            table_text = element_text(table)
+            if any(k in table_text for k in SPECS_TABLE_KEYWORDS):
+                return table
+    return None
+
+
+def parse_table_data(table):
+    """Extract table rows in the same structure as CrawlEngine.extract_table_data"""
+    table_data = []
+    for i, row in enumerate(table.find_all('tr')):
+        # th cells first, then td cells, matching the browser implementation
+        all_cells = row.find_all('th') + row.find_all('td')
+        if not all_cells:
+            continue
+
+        row_data = []
+        for cell in all_cells:
+            rowspan = cell.get('rowspan')
+            colspan = cell.get('colspan')
+            row_data.append({
+                'text': element_text(cell),
+                'rowspan': int(rowspan) if rowspan else 1,
+                'colspan': int(colspan) if colspan else 1,
+                'type': cell.name
+            })
+
+        table_data.append({
+            'row_index': i,
+            'cells': row_data
+        })
+    return table_data
+
+
+def parse_features_data(soup):
+    """Extract the 機能 categories from section.spec table.facultyTable"""
+    features_data = {}
+    for section in soup.select("section.spec"):
+        for table in section.select("table.facultyTable"):
+            for row in table.find_all('tr'):
+                th_elements = row.find_all('th')
+                if not th_elements:
+                    continue
+
+                category_text = element_text(th_elements[0])
+                if "機能ガイド" in category_text:
+                    category_text = category_text.split("機能ガイド")[0].strip()
+
+                functions = []
+                for li in row.select("ul.faculty li"):
+                    function_text = element_text(li)
+                    if function_text:
+                        functions.append(function_text)
+
+                if category_text and functions:
+                    features_data[category_text] = functions
+    return features_data
+
+
+def parse_components(soup):
+    """Extract 構成品番/商品名 pairs from the .setPartsBox_content structure"""
+    components = []
+    for container in soup.select(".setPartsBox_content"):
+        for parts_set in container.select(".partsSet"):
+            for info_div in parts_set.select(".info"):
+                component_id = None
+                component_name = None
+
+                # The first two dl elements hold 構成品番 and 商品名
+                for dl in info_div.find_all('dl')[:2]:
+                    dt = dl.find('dt')
+                    dd = dl.find('dd')
+                    if not (dt and dd):
+                        continue
+                    dt_text = element_text(dt)
+                    dd_text = element_text(dd)
+
+                    if "構成品番" in dt_text:
+                        component_id = dd_text.replace("：", "").strip()
+                        component_id = component_id.replace("◆", "").strip()
+                    elif "商品名" in dt_text:
+                        component_name = dd_text.replace("：", "").strip()
+
+                if component_id and component_name:
+                    if not any(comp['component_id'] == component_id for comp in components):
+                        components.append({
+                            'component_id': component_id,
+                            'component_name': component_name
+                        })
+    return components
+
+
+def parse_bunkaizu_pdf_links(soup, base_url):
+    """Return the absolute URLs of every a.btn.md-pdfBtn on a 分解図 page"""
+    links = []
+    for a in soup.select("a.btn.md-pdfBtn"):
+        href = a.get('href')
+        if href:
+            links.append(urljoin(base_url, href))
+    return links
+
+
+# Selectors tried in order to find product containers on result pages
+PRODUCT_CONTAINER_SELECTORS = [
+    "table.productTable tbody tr",
+    "table.productTable tr",
+    ".product",
+    ".item",
+    ".result",
+    "[class*='product']",
+    "[class*='item']",
+    "[class*='result']",
+    "div[class*='product']",
+    "div[class*='item']",
+    "li[class*='product']",
+    "li[class*='item']"
+]
+PRODUCT_CONTAINER_KEYWORDS = ['品番', '商品名', '商品図', 'Product']
+IMAGE_LINK_SELECTOR = "a[href*='search.toto.jp/img/']"
+SPECS_URL_PREFIX = "https://www.com-et.com/jp/item_view_spec/"
+
+
+def find_product_containers(soup):
+    """Return the product containers of a result page, using the first selector that matches"""
+    for selector in PRODUCT_CONTAINER_SELECTORS:
+        containers = [
+            container for container in soup.select(selector)
+            if any(k in element_text(container) for k in PRODUCT_CONTAINER_KEYWORDS)
+        ]
+        if containers:
+            return containers
+    return []
+
+
+def _definition_value(container, label):
+    """Return the dd following the first dt whose text contains label"""
+    for dt in container.find_all('dt'):
+        if label in dt.get_text():
+            return dt.find_next_sibling('dd')
+    return None
+
+
+def _absolute_href(link, base_url):
+    href = link.get('href')
+    return urljoin(base_url, href) if href else None
+
+
+def parse_product_container(container, base_url):
+    """Extract a product record from one result container.
+
+    Returns a ProductRecord, or None if the container has no 品番 or the
+    item is marked 販売終了.
+    """
+    hinban_dd = _definition_value(container, '品番')
+    product_id_link = hinban_dd.find('a') if hinban_dd else None
+    product_id = element_text(product_id_link) if product_id_link else None
+    if not product_id:
+        return None
+
+    product_name = "Unknown Product"
+    name_dd = _definition_value(container, '商品名')
+    if name_dd is not None:
+        product_name = element_text(name_dd)
+
+    series_name = "Unknown Series"
+    series_dd = _definition_value(container, 'シリーズ名')
+    if series_dd is not None:
+        series_name = element_text(series_dd)
+        if series_name.startswith('：'):
+            series_name = series_name[1:].strip()
+
+    price_dd = _definition_value(container, '希望小売価格')
+    if price_dd is not None and 'price' in (price_dd.get('class') or []):
+        if "販売終了" in element_text(price_dd):
+            return None
+
+    links = [(link, _absolute_href(link, base_url), element_text(link)) for link in container.find_all('a')]
+
+    # 商品図: prefer a link whose file name contains the product ID
+    diagram_href = None
+    id_pattern = re.compile(r'\b' + re.escape(product_id) + r'\b', re.IGNORECASE)
+    for link, href, link_text in links:
+        if '商品図' in link_text and href:
+            filename = os.path.basename(urlparse(href).path)
+            if id_pattern.search(filename):
+                diagram_href = href
+                break
+    if not diagram_href:
+        for link, href, link_text in links:
+            if '商品図' in link_text:
+                diagram_href = href
+                break
+            elif href and ('diagram' in href.lower() or 'drawing' in href.lower()):
+                if not diagram_href:
+                    diagram_href = href
+
+    # 仕様一覧
+    specs_href = None
+    for link in container.select("ul.productLabels a"):
+        href = _absolute_href(link, base_url)
+        if '仕様一覧' in element_text(link) and href and SPECS_URL_PREFIX in href:
+            specs_href = href
+            break
+
+    # 分解図
+    bunkaizu_href = next((href for link, href, link_text in links if '分解図' in link_text and href), None)
+
+    # 構成品
+    component_href = next(
+        (href for link, href, link_text in links if '構成品' in link_text and href and "item_view_set" in href),
+        None
+    )
+    has_components = component_href is not None
+    if not has_components:
+        disabled = [
+            span for span in container.select("span.productLabels_disabled")
+            if '構成品' in element_text(span)
+        ]
+        has_components = not disabled and '構成品' in element_text(container)
+
+    product_images = [
+        ImageLink(_absolute_href(link, base_url), link.get('alt') or "")
+        for link in container.select(IMAGE_LINK_SELECTOR)
+    ]
+
+    color_link = container.select_one(".productColorLink a")
+    color_variation_href = _absolute_href(color_link, base_url) if color_link else None
+
+    return ProductRecord(
+        product_id=product_id,
+        product_name=product_name,
+        series_name=series_name,
+        diagram_href=diagram_href,
+        bunkaizu_href=bunkaizu_href,
+        specs_href=specs_href,
+        component_href=component_href,
+        has_components=has_components,
+        product_images=product_images,
+        color_variation_href=color_variation_href
+    )
+
+
+def parse_search_results(html, base_url):
+    """Parse every product container of a result page snapshot into product records"""
+    soup = parse_html(html) if isinstance(html, str) else html
+    products = []
+    for container in find_product_containers(soup):
+        product = parse_product_container(container, base_url)
+        if product:
+            products.append(product)
+    return products
+
+
+RESULT_COUNT_PATTERN = re.compile(r'検索件数\s*[：:]\s*([\d,]+)\s*[～〜~\-]\s*([\d,]+)\s*/\s*([\d,]+)\s*件')
+
+
+def parse_result_count(soup):
+    """Return (first, last, total) from the '検索件数：1～10/19件' line of a result page, or None"""
+    for element in soup.select('p.number, section.searchInfo'):
+        match = RESULT_COUNT_PATTERN.search(element_text(element))
+        if match:
+            return tuple(int(value.replace(',', '')) for value in match.groups())
+    return None
+
+
+PAGINATION_CONTAINER_SELECTORS = ['ul.pageing', 'ul.pagination', 'div.pagination', 'nav.pagination', '.pagination', '.pageing']
+NEXT_LINK_TEXTS = ['next', 'Next', 'NEXT', '次のページ', '次ページ', '>', '→']
+
+
+def parse_pagination(soup, base_url):
+    """Snapshot counterpart of page_scripts.PAGINATION.
+
+    Returns a dict with next_url (None on the last page), current_page,
+    total_pages and result_total; values that cannot be read are None.
+    """
+    containers = soup.select(', '.join(PAGINATION_CONTAINER_SELECTORS))
+    container_ids = {id(container) for container in containers}
+
+    def usable(link):
+        href = link.get('href')
+        return href and 'javascript:void(0)' not in href
+
+    def in_container(link):
+        return any(id(parent) in container_ids for parent in link.parents)
+
+    candidates = [
+        lambda a, text: '次へ' in text,
+        lambda a, text: 'next' in (a.get('class') or []),
+        lambda a, text: in_container(a) and ('next' in ' '.join(a.get('class') or []).lower() or '次へ' in text),
+        lambda a, text: any(t in text for t in NEXT_LINK_TEXTS),
+    ]
+    links = [(a, element_text(a)) for a in soup.find_all('a') if usable(a)]
+    next_url = None
+    for candidate in candidates:
+        link = next((a for a, text in links if candidate(a, text)), None)
+        if link:
+            next_url = urljoin(base_url, link['href'])
+            break
+
+    current_page = total_pages = None
+    for container in containers:
+        for element in container.find_all(['a', 'span', 'li']):
+            text = element_text(element)
+            if not text.isdigit():
+                continue
+            number = int(text)
+            total_pages = max(total_pages or number, number)
+            if {'active', 'current'} & set(element.get('class') or []):
+                current_page = number
+
+    result_total = None
+    result_count = parse_result_count(soup)
+    if result_count:
+        first, last, result_total = result_count
+        size = last - first + 1
+        if size > 0:
+            total_pages = max(total_pages or 1, -(-result_total // size))
+            current_page = current_page or -(-last // size)
+
+    return {
+        'next_url': next_url,
+        'current_page': current_page,
+        'total_pages': total_pages,
+        'result_total': result_total
+    }
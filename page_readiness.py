@@ -0,0 +1,82 @@
+"""
+Readiness conditions for WebDriverWait
+
+Each condition checks the page state with a single execute_script call per
+poll, so waits return as soon as the page is usable instead of sleeping for a
+fixed time.
+"""
+
+import time
+
+READY_STATE_SCRIPT = """
+var selectors = arguments[0];
+var marker = selectors.length === 0;
+for (var i = 0; i < selectors.length && !marker; i++) {
+    try {
+        marker = document.querySelector(selectors[i]) !== null;
+    } catch (e) {}
+}
+var resources = 0;
+try {
+    resources = performance.getEntriesByType('resource').length;
+} catch (e) {}
+return {
+    url: window.location.href,
+    state: document.readyState,
+    marker: marker,
+    resources: resources
+};
+"""
+
+
+class PageReady:
+    """Condition that holds once the page has loaded and shows one of the marker selectors.
+
+    previous_url makes the condition wait for a navigation away from that URL
+    first. ready_states lists the document.readyState values that count as
+    loaded. network_idle_ms additionally requires that no new resources were
+    requested for that many milliseconds, measured with the Resource Timing API.
+    """
+
+    def __init__(self, selectors=None, previous_url=None, network_idle_ms=0, ready_states=("complete",)):
+        self.selectors = list(selectors or [])
+        self.previous_url = previous_url
+        self.ready_states = tuple(ready_states)
+        self.network_idle = network_idle_ms / 1000.0
+        self.last_resources = None
+        self.last_change = None
+
+    def __call__(self, driver):
+        state = driver.execute_script(READY_STATE_SCRIPT, self.selectors)
+        if not state:
+            return False
+        if self.previous_url is not None and state['url'] == self.previous_url:
+            return False
+        if state['state'] not in self.ready_states or not state['marker']:
+            return False
+        if self.network_idle <= 0:
+            return True
+
+        now = time.monotonic()
+        if state['resources'] != self.last_resources:
+            self.last_resources = state['resources']
+            self.last_change = now
+            return False
+        return now - self.last_change >= self.network_idle
+
+
+class NewWindowOrNavigation:
+    """Condition that holds once a click opened a new window or changed the current URL.
+
+    Returns the handle of the new window, or True for a same-tab navigation.
+    """
+
+    def __init__(self, existing_handles, previous_url):
+        self.existing_handles = set(existing_handles)
+        self.previous_url = previous_url
+
+    def __call__(self, driver):
+        new_handles = set(driver.window_handles) - self.existing_handles
+        if new_handles:
+            return list(new_handles)[0]
+        return driver.current_url != self.previous_url
@@ -0,0 +1,196 @@
+"""
+In-page JavaScript for the crawl engine
+
+Each script runs through driver.execute_script and returns everything it
+finds as one JSON-like value, so reading a page structure costs a single
+WebDriver round trip instead of one command per element.
+"""
+
+# Returns {found, next, next_url, current_page, total_pages, result_total}
+# for a search results page. 'next' is the 次へ link element (Selenium turns
+# it into a WebElement) or null on the last page. The candidates are tried in
+# the order of the old element-by-element strategies: a link reading 次へ,
+# a.next, a next link inside a pagination container, then other "next" texts.
+PAGINATION = r"""
+var visible = function (el) {
+    return !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+};
+var usable = function (a) {
+    return a.href && a.href.indexOf('javascript:void(0)') === -1 && visible(a);
+};
+var text = function (el) {
+    return (el.textContent || '').replace(/\s+/g, ' ').trim();
+};
+var links = Array.prototype.slice.call(document.querySelectorAll('a'));
+var containers = Array.prototype.slice.call(document.querySelectorAll(
+    'ul.pageing, ul.pagination, div.pagination, nav.pagination, .pagination, .pageing'));
+var inContainer = function (a) {
+    return containers.some(function (c) { return c.contains(a); });
+};
+
+var next = null;
+var candidates = [
+    function (a) { return text(a).indexOf('次へ') !== -1; },
+    function (a) { return a.classList.contains('next'); },
+    function (a) { return inContainer(a) && (a.className.toLowerCase().indexOf('next') !== -1 || text(a).indexOf('次へ') !== -1); },
+    function (a) {
+        var t = text(a);
+        return ['next', 'Next', 'NEXT', '次のページ', '次ページ', '>', '→'].some(function (s) { return t.indexOf(s) !== -1; });
+    }
+];
+for (var i = 0; i < candidates.length && !next; i++) {
+    for (var j = 0; j < links.length; j++) {
+        if (candidates[i](links[j]) && usable(links[j])) { next = links[j]; break; }
+    }
+}
+
+var currentPage = null;
+var totalPages = null;
+containers.forEach(function (c) {
+    c.querySelectorAll('a, span, li').forEach(function (el) {
+        var n = parseInt(text(el), 10);
+        if (isNaN(n) || String(n) !== text(el)) { return; }
+        if (totalPages === null || n > totalPages) { totalPages = n; }
+        if (el.classList.contains('active') || el.classList.contains('current')) { currentPage = n; }
+    });
+});
+
+var resultTotal = null;
+var count = document.querySelector('p.number');
+var match = count && text(count).match(/([\d,]+)\s*[～〜~\-]\s*([\d,]+)\s*\/\s*([\d,]+)\s*件/);
+if (match) {
+    var first = parseInt(match[1].replace(/,/g, ''), 10);
+    var last = parseInt(match[2].replace(/,/g, ''), 10);
+    resultTotal = parseInt(match[3].replace(/,/g, ''), 10);
+    var size = last - first + 1;
+    if (size > 0) {
+        totalPages = Math.max(totalPages || 1, Math.ceil(resultTotal / size));
+        currentPage = currentPage || Math.ceil(last / size);
+    }
+}
+
+return {
+    found: containers.length > 0 || next !== null || resultTotal !== null,
+    next: next,
+    next_url: next ? next.href : null,
+    current_page: currentPage,
+    total_pages: totalPages,
+    result_total: resultTotal
+};
+"""
+
+# Async script: fetch arguments[0] with the page's cookies and keep the body
+# in the page under the key arguments[1]. Calls back with {size, type} or
+# {error}. The body is then read with READ_FETCHED_BASE64 and freed with
+# RELEASE_FETCHED, so large files cross the WebDriver connection as a few
+# base64 strings instead of one JSON array with an integer per byte.
+FETCH_TO_PAGE = r"""
+var callback = arguments[arguments.length - 1];
+var url = arguments[0];
+var key = arguments[1];
+window.__cometFetched = window.__cometFetched || {};
+fetch(url, {credentials: 'include'})
+    .then(function (response) {
+        if (!response.ok) {
+            throw new Error('Network response was not ok: ' + response.status + ' ' + response.statusText);
+        }
+        var type = response.headers.get('content-type') || '';
+        return response.arrayBuffer().then(function (buffer) {
+            window.__cometFetched[key] = new Uint8Array(buffer);
+            callback({size: buffer.byteLength, type: type});
+        });
+    })
+    .catch(function (error) { callback({error: error.message}); });
+"""
+
+# Returns bytes [arguments[1], arguments[2]) of the fetched body under key
+# arguments[0] as a base64 string.
+READ_FETCHED_BASE64 = r"""
+var bytes = window.__cometFetched[arguments[0]].subarray(arguments[1], arguments[2]);
+var parts = [];
+for (var i = 0; i < bytes.length; i += 0x8000) {
+    parts.push(String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000)));
+}
+return btoa(parts.join(''));
+"""
+
+# Frees the fetched body under key arguments[0].
+RELEASE_FETCHED = r"""
+if (window.__cometFetched) { delete window.__cometFetched[arguments[0]]; }
+"""
+
+# Shared by the structure scripts below: an element's rendered text with
+# non-breaking spaces as plain spaces, trimmed like Selenium's element.text.
+_TEXT = r"""
+var text = function (el) {
+    return (el.innerText || el.textContent || '').replace(/\u00a0/g, ' ').trim();
+};
+"""
+
+# Returns the rows of the table arguments[0] as
+# [{row_index, cells: [{text, rowspan, colspan, type}]}], th cells before td
+# cells as in CrawlEngine.extract_table_data. Rows without cells are skipped
+# but still counted in row_index.
+TABLE_DATA = _TEXT + r"""
+var rows = arguments[0].querySelectorAll('tr');
+var tableData = [];
+for (var i = 0; i < rows.length; i++) {
+    var cells = Array.prototype.slice.call(rows[i].querySelectorAll('th'))
+        .concat(Array.prototype.slice.call(rows[i].querySelectorAll('td')));
+    if (!cells.length) { continue; }
+    tableData.push({
+        row_index: i,
+        cells: cells.map(function (cell) {
+            return {
+                text: text(cell),
+                rowspan: parseInt(cell.getAttribute('rowspan'), 10) || 1,
+                colspan: parseInt(cell.getAttribute('colspan'), 10) || 1,
+                type: cell.tagName.toLowerCase()
+            };
+        })
+    });
+}
+return tableData;
+"""
+
+# Returns [{category, functions}] for every row of section.spec
+# table.facultyTable that has a th: the text of its first th and the
+# non-empty texts of its ul.faculty li items.
+FEATURE_ROWS = _TEXT + r"""
+var result = [];
+document.querySelectorAll('section.spec').forEach(function (section) {
+    section.querySelectorAll('table.facultyTable').forEach(function (table) {
+        table.querySelectorAll('tr').forEach(function (row) {
+            var th = row.querySelector('th');
+            if (!th) { return; }
+            var functions = [];
+            row.querySelectorAll('ul.faculty li').forEach(function (li) {
+                var t = text(li);
+                if (t) { functions.push(t); }
+            });
+            result.push({category: text(th), functions: functions});
+        });
+    });
+});
+return result;
+"""
+
+# Returns one list per .setPartsBox_content .partsSet .info block with the
+# [dt text, dd text] pairs of its first two dl elements that have both.
+COMPONENT_SETS = _TEXT + r"""
+var result = [];
+document.querySelectorAll('.setPartsBox_content').forEach(function (container) {
+    container.querySelectorAll('.partsSet').forEach(function (partsSet) {
+        partsSet.querySelectorAll('.info').forEach(function (info) {
+            var pairs = [];
+            Array.prototype.slice.call(info.querySelectorAll('dl'), 0, 2).forEach(function (dl) {
+                var dt = dl.querySelector('dt');
+                var dd = dl.querySelector('dd');
+                if (dt && dd) { pairs.push([text(dt), text(dd)]); }
+            });
+            result.push(pairs);
+        });
+    });
+});
+return result;
+"""
@@ -0,0 +1,185 @@
+"""
+URL-keyed cache of parsed pages
+
+Set products of one series share 構成品 (item_view_set) pages and often
+仕様一覧 pages, and color variants share their カラー page. ParseCache keeps
+the parsed result of such pages, keyed by kind and URL: an in-memory LRU in
+front of an SQLite tier on disk, both limited by age and size. Callers that
+ask for a key while another thread is loading it wait for that load instead
+of fetching the page again.
+
+Values must be JSON-serialisable. They are shared between callers, who must
+not modify them.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Kinds of cached pages
+KIND_SPECS = "specs"
+KIND_COMPONENTS = "components"
+KIND_COLOR_VARIATIONS = "color_variations"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at);
+"""
+
+_MISSING = object()
+
+
+class ParseCache:
+    """Two-tier cache of parsed page results with single-flight loading.
+
+    path is the SQLite file of the disk tier, or None to keep entries in
+    memory only. Entries older than ttl_seconds are dropped from both tiers;
+    the memory tier keeps at most memory_entries entries and the disk tier at
+    most max_bytes of serialised values, evicting the least recently used.
+    """
+
+    def __init__(self, path=None, memory_entries=256, max_bytes=64 * 1024 * 1024, ttl_seconds=24 * 3600):
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # key -> (stored_at, value)
+        self.loading = {}  # key -> Future of the load in progress
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'shared_loads': 0, 'loads': 0}
+
+        self.db_lock = threading.Lock()
+        self.conn = None
+        self.disk_bytes = 0
+        if path:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            with self.db_lock:
+                self.conn.execute("PRAGMA journal_mode=WAL")
+                self.conn.executescript(SCHEMA)
+                self.conn.execute("DELETE FROM entries WHERE stored_at < ?", (time.time() - self.ttl_seconds,))
+                self.conn.commit()
+                self.disk_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def close(self):
+        if self.conn is not None:
+            with self.db_lock:
+                self.conn.close()
+                self.conn = None
+
+    def get_or_load(self, kind, url, loader):
+        """Return the cached value for (kind, url), calling loader() to produce it on a miss.
+
+        A None result from loader is returned but not cached, so a failed
+        page is tried again by the next caller. If loader raises, the callers
+        waiting on the same key get the same exception.
+        """
+        key = f"{kind} {url}"
+        with self.lock:
+            value = self._memory_get(key)
+            if value is not _MISSING:
+                self.stats['memory_hits'] += 1
+                return value
+            future = self.loading.get(key)
+            if future is None:
+                future = self.loading[key] = Future()
+                leader = True
+            else:
+                self.stats['shared_loads'] += 1
+                leader = False
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = self._disk_get(key)
+            if value is _MISSING:
+                with self.lock:
+                    self.stats['loads'] += 1
+                value = loader()
+                if value is not None:
+                    self._disk_put(key, value)
+            else:
+                with self.lock:
+                    self.stats['disk_hits'] += 1
+            if value is not None:
+                with self.lock:
+                    self._memory_put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                self.loading.pop(key, None)
+
+    def _memory_get(self, key):
+        entry = self.memory.get(key)
+        if entry is None:
+            return _MISSING
+        stored_at, value = entry
+        if stored_at < time.time() - self.ttl_seconds:
+            del self.memory[key]
+            return _MISSING
+        self.memory.move_to_end(key)
+        return value
+
+    def _memory_put(self, key, value):
+        self.memory[key] = (time.time(), value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _disk_get(self, key):
+        if self.conn is None:
+            return _MISSING
+        now = time.time()
+        with self.db_lock:
+            row = self.conn.execute("SELECT value, stored_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return _MISSING
+            if row[1] < now - self.ttl_seconds:
+                self._disk_delete(key)
+                self.conn.commit()
+                return _MISSING
+            self.conn.execute("UPDATE entries SET used_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+        return json.loads(row[0])
+
+    def _disk_put(self, key, value):
+        if self.conn is None:
+            return
+        text = json.dumps(value, ensure_ascii=False)
+        size = len(text.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self.db_lock:
+            self._disk_delete(key)
+            self.conn.execute(
+                "INSERT INTO entries (key, value, size, stored_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, text, size, now, now)
+            )
+            self.disk_bytes += size
+            while self.disk_bytes > self.max_bytes:
+                oldest = self.conn.execute("SELECT key FROM entries ORDER BY used_at LIMIT 1").fetchone()
+                if oldest is None:
+                    break
+                self._disk_delete(oldest[0])
+            self.conn.commit()
+
+    def _disk_delete(self, key):
+        """Delete one disk entry; the caller holds db_lock and commits"""
+        row = self.conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.disk_bytes -= row[0]
@@ -0,0 +1,232 @@
+"""
+Offline benchmark of the page extractors on the saved pages in ref/
+
+Times the static parsers in page_parsers.py and, with --browser, the
+WebDriver extractors of CrawlEngine on the same fixtures loaded from disk,
+counting the WebDriver commands each call sends. No network access is needed.
+
+Usage:
+    python -m parser_benchmark
+    python -m parser_benchmark --browser --repeat 5 --output bench.json
+
+Results are written as one JSON document (to stdout unless --output is
+given) so runs from different releases can be compared.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import config
+import page_parsers
+
+REF_DIR = Path(__file__).resolve().parent / 'ref'
+SEARCH_PAGE = '品番・商品名検索結果 _ TOTO_COM-ET [コメット] 建築専門家向けサイト'
+BASE_URL = config.SEARCH_URL
+
+# name -> file in ref/
+FIXTURES = {
+    'search_results': f'{SEARCH_PAGE}.html',
+    'search_results_paged': f'{SEARCH_PAGE}_pagenumber.html',
+    'color_variations': '全カラー検索結果 _ TOTO_COM-ET [コメット] 建築専門家向けサイト_kouseihin.html',
+    'bunkaizu': f'{SEARCH_PAGE}_bunkaizu.html',
+    'features': f'{SEARCH_PAGE}_kinouichiran.html',
+    'specs': 'toto-tcf5831adyr-sc1.html',
+    'components': 'kouseihindetails.html',
+}
+
+# (extractor, fixtures) pairs measured in both modes
+CASES = [
+    ('product_info', ['search_results', 'search_results_paged', 'color_variations']),
+    ('table_data', ['specs', 'features']),
+    ('features_data', ['features']),
+    ('component_data', ['components']),
+    ('pagination', ['search_results', 'search_results_paged']),
+]
+
+
+def summarize(name, mode, fixture, timings, commands=None):
+    """Return the result record for a list of per-call timings in seconds"""
+    timings_ms = sorted(t * 1000 for t in timings)
+    record = {
+        'name': name,
+        'mode': mode,
+        'fixture': fixture,
+        'calls': len(timings_ms),
+        'mean_ms': round(statistics.mean(timings_ms), 3) if timings_ms else None,
+        'p50_ms': round(statistics.median(timings_ms), 3) if timings_ms else None,
+        'min_ms': round(timings_ms[0], 3) if timings_ms else None,
+        'max_ms': round(timings_ms[-1], 3) if timings_ms else None,
+    }
+    if commands is not None:
+        record['webdriver_commands_per_call'] = round(commands / len(timings_ms), 1) if timings_ms else None
+    return record
+
+
+def time_calls(func, args_list, repeat):
+    """Call func(*args) for every args tuple, repeat times, and return the per-call timings"""
+    timings = []
+    for _ in range(repeat):
+        for args in args_list:
+            started = time.perf_counter()
+            func(*args)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def read_fixture(fixture):
+    with open(REF_DIR / FIXTURES[fixture], 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def static_calls(name, soup):
+    """Return (func, args_list) running the static parser for name on soup"""
+    if name == 'product_info':
+        containers = page_parsers.find_product_containers(soup)
+        return page_parsers.parse_product_container, [(c, BASE_URL) for c in containers]
+    if name == 'table_data':
+        table = page_parsers.find_specs_table(soup)
+        return page_parsers.parse_table_data, [(table,)] if table is not None else []
+    if name == 'features_data':
+        return page_parsers.parse_features_data, [(soup,)]
+    if name == 'component_data':
+        return page_parsers.parse_components, [(soup,)]
+    if name == 'pagination':
+        return page_parsers.parse_pagination, [(soup, BASE_URL)]
+    raise ValueError(name)
+
+
+def run_static(repeat):
+    results = []
+    for fixture in FIXTURES:
+        html = read_fixture(fixture)
+        results.append(summarize('parse_html', 'static', fixture, time_calls(page_parsers.parse_html, [(html,)], repeat)))
+
+    for name, fixtures in CASES:
+        for fixture in fixtures:
+            soup = page_parsers.parse_html(read_fixture(fixture))
+            func, args_list = static_calls(name, soup)
+            results.append(summarize(name, 'static', fixture, time_calls(func, args_list, repeat)))
+    return results
+
+
+class CommandCounter:
+    """Counts the WebDriver commands a driver sends, including those of its elements"""
+
+    def __init__(self, driver):
+        self.count = 0
+        self.execute = driver.execute
+        driver.execute = self._counted
+
+    def _counted(self, driver_command, params=None):
+        self.count += 1
+        return self.execute(driver_command, params)
+
+
+def browser_calls(engine, driver, name, fixture):
+    """Return (func, args_list) running the CrawlEngine extractor for name on the loaded fixture"""
+    from selenium.webdriver.common.by import By
+
+    if name == 'product_info':
+        for selector in page_parsers.PRODUCT_CONTAINER_SELECTORS:
+            containers = [
+                c for c in driver.find_elements(By.CSS_SELECTOR, selector)
+                if any(k in c.text for k in page_parsers.PRODUCT_CONTAINER_KEYWORDS)
+            ]
+            if containers:
+                return engine.extract_product_info, [(c, driver) for c in containers]
+        return None, []
+    if name == 'table_data':
+        for table in driver.find_elements(By.TAG_NAME, 'table'):
+            if any(k in table.text for k in page_parsers.SPECS_TABLE_KEYWORDS):
+                return engine.extract_table_data, [(table,)]
+        return None, []
+    if name == 'features_data':
+        return engine.extract_features_data, [(driver,)]
+    if name == 'component_data':
+        # Includes loading the page again: the extractor navigates itself
+        return engine.extract_component_data, [(driver, None, fixture_url(fixture), 'BENCHMARK')]
+    if name == 'pagination':
+        return engine.detect_pagination, [(driver,)]
+    raise ValueError(name)
+
+
+def fixture_url(fixture):
+    return (REF_DIR / FIXTURES[fixture]).as_uri()
+
+
+def run_browser(repeat):
+    from crawl_engine import CrawlEngine
+
+    config.BROWSER_OPTIONS['headless'] = True
+    config.HTTP_FAST_PATH = False
+    engine = CrawlEngine(output_dir=tempfile.mkdtemp(prefix='parser_benchmark_'))
+    driver = engine.create_driver()
+    if driver is None:
+        raise RuntimeError("Could not start Chrome")
+
+    results = []
+    try:
+        counter = CommandCounter(driver)
+        for name, fixtures in CASES:
+            for fixture in fixtures:
+                driver.get(fixture_url(fixture))
+                func, args_list = browser_calls(engine, driver, name, fixture)
+                if func is None:
+                    continue
+                before = counter.count
+                timings = time_calls(func, args_list, repeat)
+                results.append(summarize(name, 'browser', fixture, timings, counter.count - before))
+    finally:
+        driver.quit()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m parser_benchmark',
+        description="Time the page extractors on the saved pages in ref/."
+    )
+    parser.add_argument('--repeat', type=int, default=20,
+                        help="times each extractor runs on each fixture (default: 20)")
+    parser.add_argument('--browser', action='store_true',
+                        help="also time the WebDriver extractors in headless Chrome")
+    parser.add_argument('--browser-repeat', type=int, default=3,
+                        help="times each WebDriver extractor runs on each fixture (default: 3)")
+    parser.add_argument('--output', default=None,
+                        help="write the JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    repeat = max(1, args.repeat)
+
+    results = run_static(repeat)
+    if args.browser:
+        results.extend(run_browser(max(1, args.browser_repeat)))
+
+    report = {
+        'created': round(time.time(), 3),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'browser_repeat': args.browser_repeat if args.browser else None,
+        'results': results
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+Product ID analysis
+
+ProductIdClassifier turns a product ID such as TCF5831ADYR#NW1 into its base
+ID, color code and color name, manufacturer and series. The color codes of
+colorcode.json are compiled into two regular expressions once, when the
+classifier is built, and every parse is cached, so IDs seen again (color
+variants, templates, logs) cost a dictionary lookup.
+
+A color code is found the way CrawlEngine always looked for it: the first
+#CODE in the ID that is a known code, otherwise the trailing run of capital
+letters and digits read as #CODE.
+"""
+
+import functools
+import json
+import os
+import re
+from collections import namedtuple
+
+COLOR_CODE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'colorcode.json')
+
+DEFAULT_MANUFACTURER = "TOTO（トートー）"
+LIXIL_MANUFACTURER = "LIXIL（リクシル）"
+LIXIL_PREFIXES = ('LIXIL', 'INAX')
+
+UNKNOWN_SERIES = "Unknown Series"
+# (text in the product name, series), checked in order
+SERIES_KEYWORDS = [
+    ("アプリコット", "アプリコットシリーズ"),
+    ("ネオレスト", "ネオレストシリーズ"),
+    ("サティス", "サティスシリーズ"),
+    ("パブリック", "パブリック向ウォシュレット"),
+]
+
+# Codes that product IDs can contain: # followed by capital letters and digits
+CODE_PATTERN = re.compile(r'#[A-Z0-9]+')
+
+ProductIdInfo = namedtuple(
+    'ProductIdInfo',
+    ['product_id', 'base_id', 'color_code', 'color_name', 'manufacturer', 'series']
+)
+
+
+def manufacturer_for(product_id):
+    """Return the manufacturer of a product ID; everything but LIXIL/INAX IDs is TOTO"""
+    if isinstance(product_id, str) and product_id.startswith(LIXIL_PREFIXES):
+        return LIXIL_MANUFACTURER
+    return DEFAULT_MANUFACTURER
+
+
+def series_for(product_name):
+    """Return the series a product name belongs to, or Unknown Series"""
+    if not product_name:
+        return UNKNOWN_SERIES
+    for keyword, series in SERIES_KEYWORDS:
+        if keyword in product_name:
+            return series
+    return UNKNOWN_SERIES
+
+
+def load_color_codes(path=COLOR_CODE_FILE):
+    """Read the color code -> color name mapping"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ProductIdClassifier:
+    """Cached product ID parser built from a color code mapping"""
+
+    def __init__(self, color_codes, cache_size=8192):
+        self.color_codes = dict(color_codes)
+        codes = sorted(
+            (code[1:] for code in self.color_codes if CODE_PATTERN.fullmatch(code)),
+            key=len, reverse=True
+        )
+        if codes:
+            alternation = '|'.join(re.escape(code) for code in codes)
+            # A known code filling a whole #... run, and a known code filling the trailing run
+            self.hash_code = re.compile(r'#(' + alternation + r')(?![A-Z0-9])')
+            self.trailing_code = re.compile(r'(?<![A-Z0-9])(' + alternation + r')$')
+        else:
+            self.hash_code = self.trailing_code = None
+        self.classify = functools.lru_cache(maxsize=cache_size)(self._classify)
+
+    def color_code(self, product_id):
+        """Return the known color code of a product ID, such as #NW1, or an empty string"""
+        if not product_id or self.hash_code is None:
+            return ""
+        match = self.hash_code.search(product_id) or self.trailing_code.search(product_id)
+        return f"#{match.group(1)}" if match else ""
+
+    def _classify(self, product_id, product_name=""):
+        color_code = self.color_code(product_id)
+        return ProductIdInfo(
+            product_id=product_id,
+            base_id=product_id.split('#')[0] if product_id else product_id,
+            color_code=color_code,
+            color_name=self.color_codes.get(color_code, "") if color_code else "",
+            manufacturer=manufacturer_for(product_id),
+            series=series_for(product_name)
+        )
+
+    def classify_many(self, product_ids, product_names=None):
+        """Classify a list of IDs (with optional matching product names), parsing each distinct pair once"""
+        if product_names is None:
+            product_names = [""] * len(product_ids)
+        parsed = {}
+        for pair in zip(product_ids, product_names):
+            if pair not in parsed:
+                parsed[pair] = self.classify(*pair)
+        return [parsed[pair] for pair in zip(product_ids, product_names)]
+
+    def format_with_color(self, product_id):
+        """Return product_id followed by its color name in parentheses, when it has one"""
+        color_name = self.classify(product_id).color_name
+        return f"{product_id}({color_name})" if color_name else product_id
@@ -0,0 +1,94 @@
+"""
+Compact product records
+
+A product found on a search results page is kept as a ProductRecord: the
+IDs, names, URLs and flags the later steps need, and nothing tied to the
+browser session it was found in. Records use __slots__ so tens of thousands
+fit in memory cheaply, pickle for use in other processes and convert to
+plain dicts for the crawl state.
+
+Fields can be read as attributes or with the dict-style product['key'] and
+product.get('key') the engine has always used.
+"""
+
+
+class _SlotRecord:
+    """Read-only mapping access to the fields of a slotted record"""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def keys(self):
+        return self.__slots__
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class ImageLink(_SlotRecord):
+    """A product image URL and its alt text"""
+
+    __slots__ = ('href', 'alt')
+
+    def __init__(self, href, alt=""):
+        self.href = href
+        self.alt = alt or ""
+
+    def to_dict(self):
+        return {'href': self.href, 'alt': self.alt}
+
+
+class ProductRecord(_SlotRecord):
+    """One product of a search results page"""
+
+    __slots__ = (
+        'product_id', 'product_name', 'series_name',
+        'diagram_href', 'bunkaizu_href', 'specs_href', 'component_href',
+        'has_components', 'product_images', 'color_variation_href'
+    )
+
+    def __init__(self, product_id, product_name="Unknown Product", series_name="Unknown Series",
+                 diagram_href=None, bunkaizu_href=None, specs_href=None, component_href=None,
+                 has_components=False, product_images=(), color_variation_href=None):
+        self.product_id = product_id
+        self.product_name = product_name
+        self.series_name = series_name
+        self.diagram_href = diagram_href
+        self.bunkaizu_href = bunkaizu_href
+        self.specs_href = specs_href
+        self.component_href = component_href
+        self.has_components = bool(has_components)
+        self.product_images = tuple(
+            image if isinstance(image, ImageLink) else ImageLink(image['href'], image.get('alt', ""))
+            for image in product_images or ()
+        )
+        self.color_variation_href = color_variation_href
+
+    def to_dict(self):
+        """Return the record as a JSON-serialisable dict"""
+        record = {key: getattr(self, key) for key in self.__slots__}
+        record['product_images'] = [image.to_dict() for image in self.product_images]
+        return record
+
+    @classmethod
+    def from_dict(cls, record):
+        """Build a record from a dict, ignoring keys that are not fields (such as old WebElement entries)"""
+        return cls(**{key: record[key] for key in cls.__slots__ if key in record})
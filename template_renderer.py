@@ -0,0 +1,416 @@
+"""
+Renderer for the product template HTML
+
+The page layouts are compiled once, at import, into render plans: the static
+text between placeholders, split up front. Rendering a product walks the plan
+and appends fragments to a list that is joined once, or writes them straight
+to an open file, so no intermediate strings are built by concatenation. The
+output is byte-for-byte what CrawlEngine's generate_* methods have always
+produced, including their fallbacks for malformed data.
+"""
+
+import os
+import string
+
+# Placeholders: product_id, color_search_id, base_id, manufacturer,
+# formatted_product_id, product_name, series, component_html,
+# specs_section_html
+TEMPLATE_PAGE = """<!DOCTYPE html>
+<html lang="en">
+
+<head>
+  <meta charset="UTF-8" />
+  <meta http-equiv="X-UA-Compatible" content="IE=edge" />
+  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+  <title>Document</title>
+</head>
+
+<body>
+
+  <!--  
+コメット　
+商品番号　{product_id}
+https://www.com-et.com/jp/item_color_search/searchStr={color_search_id}/isHaiban=1/kensaku_info=2/hinban={base_id}/renban=1/isFromScale=0/isNC=1/datatype=1/
+-->
+
+
+  <!-- ●●●●● コメットから情報取得 -->
+  <br>
+  <br>
+  <font size="+1">
+    <b>
+      メーカー：{manufacturer}
+      <br>
+      品&nbsp;&nbsp;番&nbsp;&nbsp;&nbsp;：◆{formatted_product_id}
+      <br>
+      商&nbsp;品&nbsp;名&nbsp;{product_name}
+      <br>
+      シリーズ：{series}
+      <br>
+    </b>
+  </font>
+  <br>
+  <br>
+  <!-- /// ●●●●● コメットから情報取得 -->
+
+
+  <!-- ◆◆◆　定型文 -->
+  ※商品画像・カラーは、イメージです。
+  <br>
+  ※詳しい施工方法や商品詳細については、カタログやメーカー様にてご確認ください。
+  <br>
+  <!-- ◆◆◆　ここに納期等入れる -->
+  <b><font color="#FF0000">※商品の納期は、およそ___かかります。</font></b>
+  <br>
+  <!-- /// ◆◆◆　定型文 -->
+  <br>
+  <br>
+
+  <!-- ●●●●● コメットから情報取得 ●●●●● 構成品 -->
+{component_html}
+  <!-- /// コメットから情報取得 ●●●●● 構成品 -->
+
+
+  <!-- ●●●●● コメットから情報取得 ●●●●● 仕様一覧 -->
+{specs_section_html}
+  <!-- /// コメットから情報取得 ●●●●● 仕様一覧 -->
+
+
+
+
+</html>"""
+
+# Placeholders: formatted_product_id, product_name
+COMPONENT_FALLBACK = """  【 セット品番 ：{formatted_product_id} 】
+  <br>
+  <br>{formatted_product_id}
+  <br>
+  -------------------------------------------------------
+  <br>
+  構成品番 ： ◆{formatted_product_id}
+  <br>
+  商品名 ： {product_name}
+  <br>
+  -------------------------------------------------------
+  <br>
+  <br>"""
+
+# Placeholder: product_id
+RAKUTEN_HEADER = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>{product_id} - 商品仕様</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }}
+        .container {{ max-width: 1000px; margin: 0 auto; background-color: white; padding: 20px; border-radius: 8px; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
+        h1 {{ color: #333; text-align: center; border-bottom: 2px solid #007bff; padding-bottom: 10px; }}
+        .section-title {{ background-color: #333; color: white; padding: 10px; font-weight: bold; border-radius: 4px; margin-top: 20px; }}
+        table {{ width: 100%; border-collapse: collapse; margin: 10px 0; }}
+        th, td {{ border: 1px solid #ddd; padding: 12px; text-align: left; }}
+        th {{ background-color: #f8f9fa; font-weight: bold; width: 25%; }}
+        td.primary {{ background-color: #f8f9fa; width: 35%; }}
+        td.secondary {{ background-color: #f8f9fa; width: 40%; }}
+        .product-info {{ background-color: #e9ecef; padding: 15px; border-radius: 4px; margin-bottom: 20px; }}
+        .product-id {{ font-size: 18px; font-weight: bold; color: #007bff; }}
+        .table-header {{ background-color: #333; color: white; font-weight: bold; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>商品仕様書</h1>
+        <div class="product-info">
+            <div class="product-id">品番: {product_id}</div>
+        </div>
+"""
+
+RAKUTEN_FOOTER = """
+    </div>
+</body>
+</html>"""
+
+SPECS_TABLE_OPEN = '  <table bgcolor="#000000" cellspacing="1" cellpadding="3">\n\n'
+SPECS_TABLE_CLOSE = "  </table>"
+SPECS_TABLE_FALLBACK = '  <table bgcolor="#000000" cellspacing="1" cellpadding="3">\n  </table>'
+# Start of a specs table cell by cell type, up to the optional span attributes
+SPECS_CELL_OPEN = {
+    'th': '      <th align="left" bgcolor="#F5F5F5"',
+    'td': '      <td align="left" bgcolor="#FFFFFF"',
+}
+COMPONENT_RULE = "  -------------------------------------------------------"
+
+HTML_ESCAPES = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+
+def compile_template(text):
+    """Split a str.format template into a render plan of (is_placeholder, text) steps"""
+    plan = []
+    for literal, field, _, _ in string.Formatter().parse(text):
+        if literal:
+            plan.append((False, literal))
+        if field is not None:
+            plan.append((True, field))
+    return tuple(plan)
+
+
+def render_plan(plan, values, write):
+    """Write the fragments of a render plan; a value may be a string or a list of fragments"""
+    for is_placeholder, text in plan:
+        if not is_placeholder:
+            write(text)
+            continue
+        value = values[text]
+        if isinstance(value, list):
+            for fragment in value:
+                write(fragment)
+        else:
+            write(value)
+
+
+def escape_html(text):
+    return text.translate(HTML_ESCAPES)
+
+
+TEMPLATE_PAGE_PLAN = compile_template(TEMPLATE_PAGE)
+COMPONENT_FALLBACK_PLAN = compile_template(COMPONENT_FALLBACK)
+RAKUTEN_HEADER_PLAN = compile_template(RAKUTEN_HEADER)
+
+
+class TemplateRenderer:
+    """Renders product template pages from specs, features and component data.
+
+    format_product_id turns a product ID into the 品番 shown on the page (the
+    engine passes format_product_id_with_color); log receives error messages.
+    """
+
+    def __init__(self, format_product_id=None, log=None):
+        self.format_product_id = format_product_id or (lambda product_id: product_id)
+        self.log = log or (lambda message: None)
+
+    # Whole pages
+
+    def render_template(self, specs_data, product_id, product_name="", manufacturer="", series="",
+                        components=None, has_components=False):
+        """Return the template page of one product as a string"""
+        parts = []
+        self.write_template(parts.append, specs_data, product_id, product_name, manufacturer, series,
+                            components, has_components)
+        return "".join(parts)
+
+    def render_template_to_file(self, path, specs_data, product_id, product_name="", manufacturer="", series="",
+                                components=None, has_components=False):
+        """Write the template page of one product straight to path"""
+        values = self.template_values(specs_data, product_id, product_name, manufacturer, series,
+                                      components, has_components)
+        with open(path, 'w', encoding='utf-8') as f:
+            render_plan(TEMPLATE_PAGE_PLAN, values, f.write)
+        return path
+
+    def write_template(self, write, specs_data, product_id, product_name="", manufacturer="", series="",
+                       components=None, has_components=False):
+        """Pass the fragments of one product's template page to write"""
+        values = self.template_values(specs_data, product_id, product_name, manufacturer, series,
+                                      components, has_components)
+        render_plan(TEMPLATE_PAGE_PLAN, values, write)
+
+    def render_many(self, records, output_dir=None):
+        """Render the template pages of many products.
+
+        Each record is a dict of render_template arguments. Without
+        output_dir the pages are returned as strings; with it each page is
+        written to <output_dir>/<product_id>/<product_id>_template.html, as
+        the crawl saves them, and the paths are returned. A record that
+        cannot be rendered gives None.
+        """
+        results = []
+        for record in records:
+            try:
+                if output_dir is None:
+                    results.append(self.render_template(**record))
+                    continue
+                product_dir = os.path.join(output_dir, record['product_id'])
+                os.makedirs(product_dir, exist_ok=True)
+                path = os.path.join(product_dir, f"{record['product_id']}_template.html")
+                results.append(self.render_template_to_file(path, **record))
+            except Exception as e:
+                self.log(f"      Error rendering template for {record.get('product_id')}: {str(e)}")
+                results.append(None)
+        return results
+
+    def template_values(self, specs_data, product_id, product_name, manufacturer, series, components, has_components):
+        """Compute every placeholder of the template page; raises before anything is written"""
+        # Extract manufacturer from product_id if not provided
+        if not manufacturer:
+            if product_id.startswith('TCF') or product_id.startswith('TCA'):
+                manufacturer = "TOTO（トートー）"
+            else:
+                manufacturer = "Unknown Manufacturer"
+
+        formatted_product_id = self.format_product_id(product_id)
+
+        # Handle both old format (table_data) and new format (specs_data dict)
+        if specs_data is None:
+            table_data = []
+            features_data = {}
+        elif isinstance(specs_data, dict):
+            table_data = specs_data.get('table_data', [])
+            features_data = specs_data.get('features_data', {})
+        else:
+            table_data = specs_data
+            features_data = {}
+
+        return {
+            'product_id': product_id,
+            'color_search_id': product_id.replace('#', '%23'),
+            'base_id': product_id.split('#')[0],
+            'manufacturer': manufacturer,
+            'formatted_product_id': formatted_product_id,
+            'product_name': product_name if product_name else 'Unknown Product',
+            'series': series if series else 'Unknown Series',
+            'component_html': self.component_parts(components, formatted_product_id, product_name, has_components),
+            'specs_section_html': self.specs_section_parts(table_data, features_data),
+        }
+
+    # Sections, each as a list of fragments
+
+    def specs_table_parts(self, table_data):
+        """The specifications table, row by row as in the original table"""
+        try:
+            parts = [SPECS_TABLE_OPEN]
+            for row_data in table_data:
+                cells = row_data['cells']
+                if not cells:
+                    continue
+
+                parts.append("    <tr>\n")
+                for cell in cells:
+                    cell_text = escape_html(cell['text'])
+                    rowspan = cell['rowspan']
+                    colspan = cell['colspan']
+                    cell_type = cell['type']
+
+                    cell_open = SPECS_CELL_OPEN.get(cell_type)
+                    if cell_open is None:
+                        cell_open = f'      <{cell_type} align="left" bgcolor="#FFFFFF"'
+                    parts.append(cell_open)
+                    if rowspan > 1:
+                        parts.append(f' rowspan="{rowspan}"')
+                    if colspan > 1:
+                        parts.append(f' colspan="{colspan}"')
+                    parts.extend((">", cell_text, "</", cell_type, ">\n"))
+                parts.append("    </tr>\n\n")
+
+            parts.append(SPECS_TABLE_CLOSE)
+            return parts
+        except Exception as e:
+            self.log(f"      Error generating specs table HTML: {str(e)}")
+            return [SPECS_TABLE_FALLBACK]
+
+    def features_parts(self, features_data):
+        """The 機能 categories with their functions as ・ items"""
+        try:
+            if not features_data:
+                return []
+
+            parts = []
+            for category, functions in features_data.items():
+                if functions:
+                    parts.append(f"  <br><b>{category}</b><br>")
+                    parts.append("<br>".join(f"・{func}" for func in functions))
+            return parts
+        except Exception as e:
+            self.log(f"      Error generating features HTML: {str(e)}")
+            return []
+
+    def component_parts(self, components, formatted_product_id, product_name, has_components=False):
+        """The セット品番 section, empty for products without components"""
+        try:
+            if not has_components:
+                return []
+
+            if not components:
+                return self.component_fallback_parts(formatted_product_id, product_name)
+
+            component_list = " + ".join(comp['component_id'] for comp in components)
+            if not component_list:
+                component_list = formatted_product_id
+
+            parts = [f"  【 セット品番 ：{formatted_product_id} 】\n  <br>\n  <br>{component_list}\n  <br>"]
+            for component in components:
+                parts.append(f"\n{COMPONENT_RULE}\n  <br>\n  構成品番 ： ◆{component['component_id']}\n  <br>\n  商品名 ： {component['component_name']}\n  <br>")
+            parts.extend(("\n", COMPONENT_RULE, "\n  <br>\n  <br>"))
+            return parts
+
+        except Exception as e:
+            self.log(f"      Error generating component HTML: {str(e)}")
+            if has_components:
+                return self.component_fallback_parts(formatted_product_id, product_name)
+            return []
+
+    def component_fallback_parts(self, formatted_product_id, product_name):
+        parts = []
+        render_plan(COMPONENT_FALLBACK_PLAN, {
+            'formatted_product_id': formatted_product_id,
+            'product_name': product_name if product_name else 'Unknown Product'
+        }, parts.append)
+        return parts
+
+    def specs_section_parts(self, table_data, features_data):
+        """The 仕様 section with the table and the features, empty when there is neither"""
+        try:
+            has_table_data = table_data and len(table_data) > 0
+            has_features_data = features_data and len(features_data) > 0
+            if not has_table_data and not has_features_data:
+                return []
+
+            parts = []
+            if has_table_data:
+                parts.append("  【 仕様 】\n  <br>\n")
+                parts.extend(self.specs_table_parts(table_data))
+                parts.append("\n  <br><br>")
+            if has_features_data:
+                if parts:
+                    parts.append("\n")
+                parts.append("  【 仕様 】\n")
+                parts.extend(self.features_parts(features_data))
+            return parts
+
+        except Exception as e:
+            self.log(f"      Error generating specs section HTML: {str(e)}")
+            return []
+
+    # Rakuten page
+
+    def rakuten_parts(self, table_data, product_id):
+        """The Rakuten specification page for 3-column (section, item, values) rows"""
+        parts = []
+        render_plan(RAKUTEN_HEADER_PLAN, {'product_id': product_id}, parts.append)
+
+        last_section = None
+        for item in table_data:
+            section = item['section']
+            if section != last_section:
+                if last_section is not None:
+                    parts.append("        </table>\n")
+                parts.append(f"        <div class=\"section-title\">{section}</div>\n        <table>\n            </tr>\n")
+                last_section = section
+
+            item_name = escape_html(item['item'])
+            primary_value = escape_html(item['primary_value'])
+            secondary_value = escape_html(item['secondary_value'])
+
+            # Use dash for empty secondary values
+            if not secondary_value:
+                secondary_value = "-"
+
+            parts.extend((
+                "            <tr>\n                <th>", item_name,
+                "</th>\n                <td class=\"primary\">", primary_value,
+                "</td>\n                <td class=\"secondary\">", secondary_value,
+                "</td>\n            </tr>\n"
+            ))
+
+        if last_section is not None:
+            parts.append("        </table>\n")
+        parts.append(RAKUTEN_FOOTER)
+        return parts
@@ -0,0 +1,51 @@
+"""
+Shared fixtures for the test suite
+
+The tests run offline: pages come from the saved COM-ET pages in ref/ and no
+browser is started.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import page_parsers  # noqa: E402
+import parser_benchmark  # noqa: E402
+
+EXPECTED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'expected')
+BASE_URL = parser_benchmark.BASE_URL
+
+
+@pytest.fixture(scope='session')
+def ref_soup():
+    """Return the parsed ref/ page for a parser_benchmark.FIXTURES name"""
+    cache = {}
+
+    def load(name):
+        if name not in cache:
+            path = parser_benchmark.REF_DIR / parser_benchmark.FIXTURES[name]
+            cache[name] = page_parsers.parse_html(path.read_text(encoding='utf-8'))
+        return cache[name]
+    return load
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A CrawlEngine writing to a temporary output directory"""
+    import crawl_engine
+    crawler = crawl_engine.CrawlEngine(output_dir=str(tmp_path / 'output'))
+    yield crawler
+    crawler.downloads.shutdown()
+    crawler.page_cache.close()
+    if crawler.blobs:
+        crawler.blobs.close()
+    if crawler.crawl_state:
+        crawler.crawl_state.close()
+
+
+def read_expected(name):
+    with open(os.path.join(EXPECTED_DIR, name), 'r', encoding='utf-8', newline='') as f:
+        return f.read()
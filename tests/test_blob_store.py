@@ -0,0 +1,200 @@
+"""BlobStore links, index migration and conditional re-downloads"""
+
+import hashlib
+import os
+import sqlite3
+
+import config
+import blob_store
+from blob_store import BlobStore
+
+PDF_URL = 'https://search.toto.jp/item/783/10_CS902B_7947_101.pdf'
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, body=b'', headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise OSError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+
+class FakeSession:
+    """Answers every GET with the next queued response and records the request headers"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+
+def store_bytes(store, data):
+    return store.write_stream([data[:3], data[3:]])
+
+
+def test_write_stream_is_content_addressed(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    sha256, size = store_bytes(store, b'%PDF-1.4 diagram')
+
+    assert sha256 == hashlib.sha256(b'%PDF-1.4 diagram').hexdigest()
+    assert size == 16
+    assert store_bytes(store, b'%PDF-1.4 diagram') == (sha256, size)
+    assert os.listdir(store.tmp_dir) == []
+    store.close()
+
+
+def test_link_hardlinks_into_product_folders(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    sha256, _ = store_bytes(store, b'image bytes')
+    first, second = tmp_path / 'A' / 'a.jpg', tmp_path / 'B' / 'a.jpg'
+    first.parent.mkdir()
+    second.parent.mkdir()
+
+    assert store.link(sha256, str(first)) == 'hardlink'
+    assert store.link(sha256, str(second)) == 'hardlink'
+    assert os.path.samefile(first, store.blob_path(sha256))
+    assert os.path.samefile(second, store.blob_path(sha256))
+    assert store.holds(str(first), sha256)
+    store.close()
+
+
+def test_link_falls_back_to_symlink_then_copy(tmp_path, monkeypatch):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    sha256, _ = store_bytes(store, b'pdf bytes')
+
+    def refuse(*args):
+        raise OSError("not supported")
+
+    monkeypatch.setattr(blob_store.os, 'link', refuse)
+    assert store.link(sha256, str(tmp_path / 'sym.pdf')) == 'symlink'
+    assert os.path.islink(tmp_path / 'sym.pdf')
+
+    monkeypatch.setattr(blob_store.os, 'symlink', refuse)
+    assert store.link(sha256, str(tmp_path / 'copy.pdf')) == 'copy'
+    assert (tmp_path / 'copy.pdf').read_bytes() == b'pdf bytes'
+    assert not store.holds(str(tmp_path / 'copy.pdf'), hashlib.sha256(b'other').hexdigest())
+    store.close()
+
+
+def test_lookup_needs_the_blob(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs'))
+    sha256, size = store_bytes(store, b'x' * 10)
+    store.remember(PDF_URL, sha256, size, 'a.pdf', etag='"v1"', last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+
+    row = store.lookup(PDF_URL)
+    assert (row['sha256'], row['size'], row['filename'], row['etag']) == (sha256, 10, 'a.pdf', '"v1"')
+
+    os.remove(store.blob_path(sha256))
+    assert store.lookup(PDF_URL) is None
+    store.close()
+
+
+def test_index_without_validator_columns_is_migrated(tmp_path):
+    root = tmp_path / 'blobs'
+    root.mkdir()
+    conn = sqlite3.connect(str(root / blob_store.INDEX_FILE))
+    conn.execute("CREATE TABLE urls (url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, size INTEGER NOT NULL, "
+                 "filename TEXT, fetched_at REAL NOT NULL)")
+    conn.execute("INSERT INTO urls VALUES (?, ?, ?, ?, ?)", (PDF_URL, 'ab' * 32, 3, 'a.pdf', 1.0))
+    conn.commit()
+    conn.close()
+
+    store = BlobStore(str(root))
+    columns = {row['name'] for row in store.conn.execute("PRAGMA table_info(urls)")}
+    assert set(blob_store.ADDED_COLUMNS) <= columns
+    row = store.conn.execute("SELECT * FROM urls WHERE url = ?", (PDF_URL,)).fetchone()
+    assert (row['filename'], row['etag'], row['last_modified']) == ('a.pdf', None, None)
+    store.close()
+    BlobStore(str(root)).close()
+
+
+def test_not_modified_response_links_the_stored_copy(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'DOWNLOAD_REVALIDATE_SECONDS', 0)
+    sha256, size = store_bytes(engine.blobs, b'%PDF stored')
+    engine.blobs.remember(PDF_URL, sha256, size, '10_CS902B_7947_101.pdf', etag='"v1"',
+                          last_modified='Mon, 01 Jan 2024 00:00:00 GMT')
+    fetched_at = engine.blobs.lookup(PDF_URL)['fetched_at']
+    engine.http_session = FakeSession(FakeResponse(304))
+    directory = tmp_path / 'product'
+    directory.mkdir()
+
+    assert engine.download_file(PDF_URL, str(directory)) == '10_CS902B_7947_101.pdf'
+
+    headers = engine.http_session.requests[0][1]
+    assert headers == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+    assert (directory / '10_CS902B_7947_101.pdf').read_bytes() == b'%PDF stored'
+    assert engine.blobs.lookup(PDF_URL)['fetched_at'] >= fetched_at
+
+
+def test_changed_file_replaces_the_old_version(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'DOWNLOAD_REVALIDATE_SECONDS', 0)
+    directory = tmp_path / 'product'
+    directory.mkdir()
+    engine.http_session = FakeSession(
+        FakeResponse(200, b'%PDF v1', {'content-type': 'application/pdf', 'ETag': '"v1"'}),
+        FakeResponse(200, b'%PDF v2', {'content-type': 'application/pdf', 'ETag': '"v2"'}),
+    )
+
+    assert engine.download_file(PDF_URL, str(directory)) == '10_CS902B_7947_101.pdf'
+    assert engine.download_file(PDF_URL, str(directory)) == '10_CS902B_7947_101.pdf'
+
+    assert engine.http_session.requests[1][1] == {'If-None-Match': '"v1"'}
+    assert os.listdir(directory) == ['10_CS902B_7947_101.pdf']
+    assert (directory / '10_CS902B_7947_101.pdf').read_bytes() == b'%PDF v2'
+    assert engine.blobs.lookup(PDF_URL)['etag'] == '"v2"'
+
+
+def test_recent_download_is_reused_without_a_request(engine, tmp_path):
+    sha256, size = store_bytes(engine.blobs, b'%PDF stored')
+    engine.blobs.remember(PDF_URL, sha256, size, '10_CS902B_7947_101.pdf')
+    engine.http_session = FakeSession()
+    directory = tmp_path / 'variant'
+    directory.mkdir()
+
+    assert engine.download_file(PDF_URL, str(directory)) == '10_CS902B_7947_101.pdf'
+    assert engine.http_session.requests == []
+
+
+def test_completed_product_is_revalidated_once_its_downloads_age(engine, monkeypatch):
+    monkeypatch.setattr(config, 'SKIP_COMPLETED_PRODUCTS', True)
+    product = {'product_id': 'CS902B', 'diagram_href': PDF_URL, 'product_images': []}
+    engine.crawl_state.add_product('CS902B', product)
+    engine.crawl_state.mark_product_complete('CS902B')
+    sha256, size = store_bytes(engine.blobs, b'%PDF stored')
+    engine.blobs.remember(PDF_URL, sha256, size, '10_CS902B_7947_101.pdf')
+
+    assert engine.skip_completed_product(product)
+
+    monkeypatch.setattr(config, 'DOWNLOAD_REVALIDATE_SECONDS', 0)
+    assert engine.downloads_due(product)
+    assert not engine.skip_completed_product(product)
+    assert engine.blobs.last_fetched(filenames=['10_CS902B_7947_101.pdf']) == engine.blobs.lookup(PDF_URL)['fetched_at']
+
+
+def test_clashing_name_without_a_blob_store_gets_the_hash_suffix(engine, tmp_path):
+    directory = tmp_path / 'product'
+    directory.mkdir()
+    (directory / 'a.pdf').write_bytes(b'%PDF other')
+    sha256 = hashlib.sha256(b'%PDF new').hexdigest()
+
+    assert engine.write_named_by_hash([b'%PDF ', b'new'], str(directory), 'a.pdf') == f'a_{sha256[:8]}.pdf'
+    assert engine.write_named_by_hash([b'%PDF new'], str(directory), 'a.pdf') == f'a_{sha256[:8]}.pdf'
+    assert engine.write_named_by_hash([b'%PDF other'], str(directory), 'a.pdf') == 'a.pdf'
+    assert sorted(os.listdir(directory)) == ['a.pdf', f'a_{sha256[:8]}.pdf']
+    assert (directory / f'a_{sha256[:8]}.pdf').read_bytes() == b'%PDF new'
@@ -0,0 +1,186 @@
+"""Batch CLI input reading, events and exit codes"""
+
+import io
+import json
+
+import pytest
+
+import config
+import crawl_cli
+from crawl_engine import SearchSummary
+
+DOWNLOADED = SearchSummary(downloaded=1, skipped=0, failed=0)
+
+
+class ScriptedCrawler(crawl_cli.BatchCrawler):
+    """BatchCrawler whose searches return (or raise) scripted outcomes instead of driving Chrome"""
+
+    outcomes = {}
+
+    def __init__(self, output_dir=None, stream=None, verbose=False):
+        super().__init__(output_dir, stream or io.StringIO(), verbose)
+        self.outcomes = dict(self.outcomes)
+        self.searched = []
+
+    def perform_search(self, product_id):
+        self.searched.append(product_id)
+        outcome = self.outcomes.get(product_id, DOWNLOADED)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    def emitted(self):
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+
+@pytest.fixture
+def crawlers(monkeypatch):
+    """Make main() build ScriptedCrawlers and collect them; set outcomes on crawlers.outcomes"""
+    created = CreatedCrawlers()
+
+    class Crawler(ScriptedCrawler):
+        outcomes = created.outcomes
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(crawl_cli, 'BatchCrawler', Crawler)
+    monkeypatch.setattr(config, 'BROWSER_OPTIONS', dict(config.BROWSER_OPTIONS))
+    monkeypatch.setattr(config, 'WORKER_COUNT', config.WORKER_COUNT)
+    return created
+
+
+class CreatedCrawlers(list):
+    def __init__(self):
+        super().__init__()
+        self.outcomes = {}
+
+
+def write_ids(tmp_path, *lines):
+    path = tmp_path / 'ids.txt'
+    path.write_text("\n".join(lines) + "\n", encoding='utf-8')
+    return str(path)
+
+
+def test_read_product_ids_skips_blanks_comments_and_repeats():
+    stream = io.StringIO("CS902B\n\n# neorest\n  TCF5831ADYR#NW1  \nCS902B\n#CS902BK\nCS902BK\n")
+    assert list(crawl_cli.read_product_ids(stream)) == ['CS902B', 'TCF5831ADYR#NW1', 'CS902BK']
+
+
+def test_read_product_ids_is_lazy():
+    consumed = []
+
+    def lines():
+        for line in ['CS902B\n', 'CS902B\n', 'CS902BK\n']:
+            consumed.append(line)
+            yield line
+
+    product_ids = crawl_cli.read_product_ids(lines())
+    assert next(product_ids) == 'CS902B'
+    assert consumed == ['CS902B\n']
+    assert list(product_ids) == ['CS902BK']
+
+
+def test_first_search_starts_before_the_input_ends(tmp_path):
+    crawler = ScriptedCrawler(output_dir=str(tmp_path))
+    read = []
+
+    def stdin():
+        for line in ['CS902B\n', 'CS902BK\n']:
+            read.append(line)
+            yield line
+
+    searched_after = []
+    perform_search = crawler.perform_search
+
+    def search(product_id):
+        searched_after.append(len(read))
+        return perform_search(product_id)
+
+    crawler.perform_search = search
+    assert crawler.crawl(crawl_cli.read_product_ids(stdin())) == 0
+    assert searched_after == [1, 2]
+
+
+def test_events(tmp_path):
+    crawler = ScriptedCrawler(output_dir=str(tmp_path))
+    crawler.outcomes = {'CS902B': SearchSummary(3, 0, 1), 'CS902BK': SearchSummary(0, 0, 2),
+                        'CS902BL': SearchSummary(0, 0, 0), 'X': RuntimeError("Chrome crashed")}
+
+    assert crawler.crawl(iter(['CS902B', 'CS902BK', 'CS902BL', 'X'])) == 2
+
+    events = crawler.emitted()
+    done = [e for e in events if e['event'] == 'search_done']
+    assert [(e['product_id'], e['status']) for e in done] == [
+        ('CS902B', 'ok'), ('CS902BK', 'no_downloads'), ('CS902BL', 'no_results'), ('X', 'error')]
+    assert (done[0]['downloaded'], done[0]['skipped'], done[0]['failed']) == (3, 0, 1)
+    assert done[3]['error'] == "Chrome crashed"
+    assert [e['index'] for e in events if e['event'] == 'search_start'] == [1, 2, 3, 4]
+    batch_done = events[-1]
+    assert (batch_done['event'], batch_done['total'], batch_done['failed']) == ('batch_done', 4, 2)
+    assert (batch_done['errors'], batch_done['no_downloads']) == (1, 1)
+    assert 'product_id' not in batch_done
+
+
+def test_exit_code_is_zero_when_every_search_downloads(tmp_path, crawlers):
+    assert crawl_cli.main([write_ids(tmp_path, 'CS902B', 'CS902BK'), '--output-dir', str(tmp_path / 'out')]) == 0
+    assert crawlers[0].searched == ['CS902B', 'CS902BK']
+    assert config.BROWSER_OPTIONS['headless'] is True
+
+
+def test_exit_code_is_one_when_a_search_raises(tmp_path, crawlers):
+    crawlers.outcomes['CS902BK'] = RuntimeError("timeout")
+    assert crawl_cli.main([write_ids(tmp_path, 'CS902B', 'CS902BK'), '--output-dir', str(tmp_path / 'out')]) == 1
+
+
+def test_exit_code_is_one_when_a_search_downloads_nothing(tmp_path, crawlers):
+    crawlers.outcomes['CS902B'] = SearchSummary(0, 0, 1)
+    assert crawl_cli.main([write_ids(tmp_path, 'CS902B'), '--output-dir', str(tmp_path / 'out')]) == 1
+
+
+def test_rerun_of_completed_products_succeeds(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'SKIP_COMPLETED_PRODUCTS', True)
+    products = [{'product_id': 'CS902B'}, {'product_id': 'CS902BK'}]
+
+    class RerunCrawler(crawl_cli.BatchCrawler):
+        """Runs the real per-product step on every product of the search instead of driving Chrome"""
+
+        def perform_search(self, product_id):
+            with self.outcome_lock:
+                self.product_outcomes.clear()
+            for product in products:
+                self.process_product_diagrams(None, product)
+            return self.search_summary()
+
+    crawler = RerunCrawler(output_dir=str(tmp_path), stream=io.StringIO())
+    try:
+        for product in products:
+            crawler.crawl_state.add_product('CS90', product)
+            crawler.crawl_state.mark_product_complete(product['product_id'])
+
+        assert crawler.crawl(iter(['CS90'])) == 0
+    finally:
+        crawler.close_browsers()
+        crawler.crawl_state.close()
+
+    events = [json.loads(line) for line in crawler.stream.getvalue().splitlines()]
+    done = [e for e in events if e['event'] == 'search_done'][0]
+    assert (done['status'], done['downloaded'], done['skipped'], done['failed']) == ('ok', 0, 2, 0)
+    assert (events[-1]['failed'], events[-1]['no_downloads']) == (0, 0)
+
+
+def test_exit_code_on_interrupt(tmp_path, crawlers):
+    crawlers.outcomes['CS902BK'] = KeyboardInterrupt()
+    assert crawl_cli.main([write_ids(tmp_path, 'CS902B', 'CS902BK', 'CS902BL'),
+                           '--output-dir', str(tmp_path / 'out'), '--workers', '0']) == 130
+    assert crawlers[0].searched == ['CS902B', 'CS902BK']
+    assert crawlers[0].emitted()[-1]['event'] == 'interrupted'
+    assert config.WORKER_COUNT == 1
+
+
+def test_stdin_input(tmp_path, crawlers, monkeypatch):
+    monkeypatch.setattr(crawl_cli.sys, 'stdin', io.StringIO("CS902B\n# comment\nCS902B\n"))
+    assert crawl_cli.main(['-', '--output-dir', str(tmp_path / 'out'), '--show-browser']) == 0
+    assert crawlers[0].searched == ['CS902B']
+    assert config.BROWSER_OPTIONS['headless'] is False
@@ -0,0 +1,49 @@
+"""RunMetrics stage samples, byte attribution and the run report"""
+
+import json
+import threading
+
+import crawl_metrics
+from crawl_metrics import RunMetrics
+
+REPORT_KEYS = {'count', 'total_seconds', 'p50_seconds', 'p95_seconds', 'max_seconds', 'webdriver_commands', 'http_bytes'}
+
+
+def test_stage_samples_are_summarised():
+    metrics = RunMetrics()
+    for _ in range(3):
+        with metrics.stage(crawl_metrics.STAGE_PRODUCT, 'CS902B'):
+            metrics.add_bytes(10)
+
+    stats = metrics.report()['stages'][crawl_metrics.STAGE_PRODUCT]
+    assert set(stats) == REPORT_KEYS
+    assert (stats['count'], stats['http_bytes']) == (3, 30)
+    assert metrics.report()['slowest_products'][0]['product_id'] == 'CS902B'
+
+
+def test_bytes_only_stage_reports_every_key():
+    metrics = RunMetrics()
+    download = metrics.bind(crawl_metrics.STAGE_DIAGRAM, metrics.add_bytes)
+    thread = threading.Thread(target=download, args=(2048,))
+    thread.start()
+    thread.join()
+
+    stats = metrics.report()['stages'][crawl_metrics.STAGE_DIAGRAM]
+    assert set(stats) == REPORT_KEYS
+    assert (stats['count'], stats['total_seconds'], stats['http_bytes']) == (0, 0, 2048)
+
+
+def test_run_report_with_a_bytes_only_stage(engine, tmp_path):
+    engine.log_file_path = str(tmp_path / 'log_CS902B_1.txt')
+    with engine.metrics.stage(crawl_metrics.STAGE_SEARCH_SUBMIT):
+        pass
+    with engine.metrics.attribute_to(crawl_metrics.STAGE_BUNKAIZU):
+        engine.metrics.add_bytes(512)
+    messages = []
+    engine.log_and_update = messages.append
+
+    engine.write_run_report()
+
+    assert messages[0].startswith("Run report saved:")
+    report = json.loads((tmp_path / 'log_CS902B_1_report.json').read_text(encoding='utf-8'))
+    assert report['stages'][crawl_metrics.STAGE_BUNKAIZU]['http_bytes'] == 512
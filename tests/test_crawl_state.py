@@ -0,0 +1,100 @@
+"""CrawlState runs, pending products and step hashes"""
+
+import pytest
+
+import crawl_state
+from crawl_state import CrawlState
+
+SEARCH_URL = 'https://www.com-et.com/jp/item_search/?searchStr=CS90'
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = CrawlState(str(tmp_path / 'state' / 'crawl_state.sqlite3'))
+    yield state
+    state.close()
+
+
+def record(product_id):
+    return {'product_id': product_id, 'product_name': 'ネオレスト', 'specs_href': f'https://example.test/{product_id}'}
+
+
+def test_interrupted_run_resumes_at_its_page(state):
+    assert state.start_run('CS90', SEARCH_URL) is None
+    state.record_page('CS90', 2, SEARCH_URL + '&page_num=1')
+
+    resumed = state.start_run('CS90', SEARCH_URL)
+    assert resumed['status'] == 'running'
+    assert resumed['page_index'] == 2
+    assert resumed['page_url'] == SEARCH_URL + '&page_num=1'
+
+
+def test_finished_run_starts_again_from_the_first_page(state):
+    state.start_run('CS90', SEARCH_URL)
+    state.record_page('CS90', 2, SEARCH_URL + '&page_num=1')
+    state.finish_run('CS90')
+
+    assert state.start_run('CS90', SEARCH_URL) is None
+    assert state.start_run('CS90', SEARCH_URL)['page_index'] == 1
+
+
+def test_state_survives_reopening(tmp_path):
+    path = str(tmp_path / 'crawl_state.sqlite3')
+    state = CrawlState(path)
+    state.start_run('CS90', SEARCH_URL)
+    state.add_product('CS90', record('CS902B'))
+    state.close()
+
+    state = CrawlState(path)
+    assert state.start_run('CS90', SEARCH_URL)['search_id'] == 'CS90'
+    assert state.pending_products('CS90') == [record('CS902B')]
+    state.close()
+
+
+def test_pending_products(state):
+    for product_id in ('CS902B', 'CS902BK', 'CS902BL'):
+        state.add_product('CS90', record(product_id))
+    state.add_product('TCF', record('TCF5831ADYR#NW1'))
+    state.mark_product_complete('CS902BK')
+
+    assert [r['product_id'] for r in state.pending_products('CS90')] == ['CS902B', 'CS902BL']
+    assert [r['product_id'] for r in state.pending_products('TCF')] == ['TCF5831ADYR#NW1']
+
+
+def test_product_complete_needs_its_files(state, tmp_path):
+    pdf = tmp_path / 'diagram.pdf'
+    pdf.write_bytes(b'%PDF')
+    state.add_product('CS90', record('CS902B'))
+    assert not state.is_product_complete('CS902B')
+
+    state.record_step('CS902B', crawl_state.STEP_DIAGRAM, [str(pdf)])
+    state.mark_product_complete('CS902B')
+    assert state.is_product_complete('CS902B')
+
+    pdf.unlink()
+    assert not state.is_product_complete('CS902B')
+    assert state.get_step('CS902B', crawl_state.STEP_DIAGRAM) is None
+
+
+def test_step_hash_covers_file_content(state, tmp_path):
+    image = tmp_path / 'a.jpg'
+    pdf = tmp_path / 'b.pdf'
+    image.write_bytes(b'jpeg')
+    pdf.write_bytes(b'%PDF')
+
+    state.record_step('CS902B', crawl_state.STEP_IMAGES, [str(pdf), str(image)], data={'count': 2})
+    step = state.get_step('CS902B', crawl_state.STEP_IMAGES)
+    assert step['files'] == [str(pdf), str(image)]
+    assert step['data'] == {'count': 2}
+    assert step['content_hash'] == crawl_state.hash_files([str(image), str(pdf)])
+
+    image.write_bytes(b'jpeg, new version')
+    assert crawl_state.hash_files([str(image), str(pdf)]) != step['content_hash']
+
+
+def test_step_without_files(state, tmp_path):
+    state.record_step('CS902B', crawl_state.STEP_TEMPLATE, [str(tmp_path / 'missing.html')])
+    step = state.get_step('CS902B', crawl_state.STEP_TEMPLATE)
+    assert step['files'] == []
+    assert step['content_hash'] is None
+    assert crawl_state.hash_files([]) is None
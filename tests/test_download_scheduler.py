@@ -0,0 +1,97 @@
+"""DownloadScheduler host limits and back-pressure"""
+
+import logging
+import threading
+import time
+
+import download_scheduler
+from download_scheduler import DownloadScheduler
+
+
+class Recorder:
+    """Download function that tracks how many calls run at once, per host and overall"""
+
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+        self.total = 0
+        self.peak_total = 0
+
+    def __call__(self, url, directory, *args):
+        host = url.split('/')[2].lower()
+        with self.lock:
+            self.running[host] = self.running.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.running[host])
+            self.total += 1
+            self.peak_total = max(self.peak_total, self.total)
+        time.sleep(self.seconds)
+        with self.lock:
+            self.running[host] -= 1
+            self.total -= 1
+        return f"{url.rsplit('/', 1)[-1]}{''.join(args)}"
+
+
+def test_each_host_has_its_own_limit():
+    download = Recorder()
+    scheduler = DownloadScheduler(download, max_workers=6, per_host_limit=2, max_pending=20)
+    futures = [scheduler.submit(f"https://{host}/file{i}.pdf", '/tmp')
+               for i in range(6) for host in ('search.toto.jp', 'www.com-et.com', 'SEARCH.TOTO.JP')]
+    results = [future.result(5) for future in futures]
+    scheduler.shutdown()
+
+    assert results[:3] == ['file0.pdf'] * 3
+    # Host names differing only in case share one limit
+    assert set(download.peak) == {'search.toto.jp', 'www.com-et.com'}
+    assert max(download.peak.values()) <= 2
+    assert download.peak_total > 2
+
+
+def test_submit_blocks_while_the_queue_is_full():
+    release = threading.Event()
+
+    def download(url, directory):
+        release.wait(5)
+        return url
+
+    scheduler = DownloadScheduler(download, max_workers=1, per_host_limit=1, max_pending=2)
+    first = scheduler.submit('https://search.toto.jp/1.pdf', '/tmp')
+    second = scheduler.submit('https://search.toto.jp/2.pdf', '/tmp')
+
+    submitted = threading.Event()
+    third = []
+
+    def submit_third():
+        third.append(scheduler.submit('https://search.toto.jp/3.pdf', '/tmp'))
+        submitted.set()
+
+    threading.Thread(target=submit_third, daemon=True).start()
+    assert not submitted.wait(0.2)
+
+    release.set()
+    assert submitted.wait(5)
+    assert [f.result(5) for f in (first, second, third[0])] == [
+        'https://search.toto.jp/1.pdf', 'https://search.toto.jp/2.pdf', 'https://search.toto.jp/3.pdf']
+    scheduler.shutdown()
+
+
+def test_extra_arguments_and_errors(caplog, monkeypatch):
+    def download(url, directory, stage=None):
+        if url.endswith('bad.pdf'):
+            raise OSError("connection reset")
+        return (directory, stage)
+
+    # The crawl logger may not propagate to the root logger caplog listens on
+    monkeypatch.setattr(download_scheduler.logger, 'handlers', [caplog.handler])
+    monkeypatch.setattr(download_scheduler.logger, 'level', logging.INFO)
+    monkeypatch.setattr(download_scheduler.logger, 'propagate', False)
+
+    scheduler = DownloadScheduler(download, max_workers=2, per_host_limit=1, max_pending=4)
+    assert scheduler.submit('https://search.toto.jp/a.pdf', '/out', 'bunkaizu').result(5) == ('/out', 'bunkaizu')
+    assert scheduler.submit('https://search.toto.jp/bad.pdf', '/out').result(5) is None
+    scheduler.shutdown()
+
+    failed = [record for record in caplog.records if record.levelno == logging.ERROR]
+    assert [record.getMessage() for record in failed] == ["Download of https://search.toto.jp/bad.pdf failed"]
+    assert isinstance(failed[0].exc_info[1], OSError)
@@ -0,0 +1,95 @@
+"""Static parsers on the saved pages in ref/"""
+
+import page_parsers
+from conftest import BASE_URL
+from product_record import ImageLink, ProductRecord
+
+
+def test_spec_table(ref_soup):
+    table = page_parsers.find_specs_table(ref_soup('specs'))
+    rows = page_parsers.parse_table_data(table)
+
+    assert len(rows) == 17
+    assert [row['row_index'] for row in rows] == list(range(17))
+    assert rows[0] == {'row_index': 0, 'cells': [
+        {'text': '発売時期', 'rowspan': 1, 'colspan': 2, 'type': 'th'},
+        {'text': '2025年08月', 'rowspan': 1, 'colspan': 1, 'type': 'td'},
+    ]}
+    assert rows[1]['cells'][0]['text'] == '生産終了時期'
+
+
+def test_features(ref_soup):
+    features = page_parsers.parse_features_data(ref_soup('features'))
+
+    assert list(features) == ['洗浄機能', '快適機能', 'エコ機能', '清潔機能']
+    assert all(features[category] for category in features)
+    assert all(isinstance(name, str) and name for names in features.values() for name in names)
+
+
+def test_features_missing(ref_soup):
+    assert not page_parsers.parse_features_data(ref_soup('components'))
+
+
+def test_components(ref_soup):
+    assert page_parsers.parse_components(ref_soup('components')) == [
+        {'component_id': 'CS921BF#NG2', 'component_name': '床置床排水大便器（ネオレスト）'},
+        {'component_id': 'TCF9520R#NG2', 'component_name': 'ウォシュレット一体形機能部ネオレストRS2'},
+    ]
+
+
+def test_bunkaizu_links(ref_soup):
+    links = page_parsers.parse_bunkaizu_pdf_links(ref_soup('bunkaizu'), BASE_URL)
+    assert links == ['https://search.toto.jp/scale_cnv/20_CS_90.pdf']
+
+
+def test_parse_html_reads_meta_charset():
+    html = '<html><head><meta charset="shift_jis"></head><body><p>仕様一覧</p></body></html>'
+    assert page_parsers.parse_html(html.encode('shift_jis')).p.text == '仕様一覧'
+
+
+
+def test_search_results(ref_soup):
+    products = page_parsers.parse_search_results(ref_soup('search_results'), BASE_URL)
+
+    assert [p.product_id for p in products] == ['CS902B', 'CS902BK', 'CS902BKVN', 'CS902BL', 'CS902BVN']
+    assert all(isinstance(p, ProductRecord) for p in products)
+    first = products[0]
+    assert first.product_name == '： ウォシュレット一体形便器ネオレスト'
+    assert first.series_name == 'ネオレストハイブリッドシリーズNXタイプ'
+    assert first.diagram_href == 'https://search.toto.jp/item/783/10_CS902B_7947_101.pdf'
+    assert first.specs_href.startswith('https://www.com-et.com/jp/item_view_spec/?searchStr=CS902B')
+    assert first.bunkaizu_href.startswith('https://www.com-et.com/jp/item_view_scale/?searchStr=CS902B')
+    assert first.color_variation_href.startswith('https://www.com-et.com/jp/item_color_search/?searchStr=CS902B')
+    assert first.product_images == (
+        ImageLink('https://search.toto.jp/img/00BWEU-small.jpg'),
+        ImageLink('https://search.toto.jp/img/00BWEV-small.jpg'),
+    )
+    assert not first.has_components
+
+
+def test_color_variation_results(ref_soup):
+    products = page_parsers.parse_search_results(ref_soup('color_variations'), BASE_URL)
+    assert [p.product_id for p in products] == ['TCF5831ADYR#NW1', 'TCF5831ADYR#SC1']
+
+
+def test_search_results_from_html_string(ref_soup):
+    html = str(ref_soup('search_results'))
+    assert len(page_parsers.parse_search_results(html, BASE_URL)) == 5
+
+
+def test_result_count(ref_soup):
+    assert page_parsers.parse_result_count(ref_soup('search_results')) == (1, 5, 5)
+    assert page_parsers.parse_result_count(ref_soup('search_results_paged')) == (1, 10, 19)
+    assert page_parsers.parse_result_count(page_parsers.parse_html('<p>該当する商品はありません</p>')) is None
+
+
+def test_pagination(ref_soup):
+    single = page_parsers.parse_pagination(ref_soup('search_results'), BASE_URL)
+    assert single == {'next_url': None, 'current_page': 1, 'total_pages': 1, 'result_total': 5}
+
+    paged = page_parsers.parse_pagination(ref_soup('search_results_paged'), BASE_URL)
+    assert paged['current_page'] == 1
+    assert paged['total_pages'] == 2
+    assert paged['result_total'] == 19
+    assert paged['next_url'].startswith('https://www.com-et.com/jp/item_search/?searchStr=CS90')
+    assert 'page_num=1' in paged['next_url']
@@ -0,0 +1,188 @@
+"""ParseCache tiers, expiry, eviction and single-flight loading"""
+
+import threading
+import time
+
+import pytest
+
+import parse_cache
+from parse_cache import KIND_COMPONENTS, KIND_SPECS, ParseCache
+
+SPECS_URL = 'https://www.com-et.com/jp/item_view_spec/?hinban=CS902B'
+
+
+class Loader:
+    """Counts its calls and returns the URL's value"""
+
+    def __init__(self, value=None):
+        self.calls = 0
+        self.value = value
+
+    def __call__(self, url=SPECS_URL):
+        self.calls += 1
+        return self.value if self.value is not None else {'url': url, 'rows': [1, 2, 3]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's time.time() with a settable clock"""
+    now = [1000000.0]
+    monkeypatch.setattr(parse_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def test_memory_hit(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache.sqlite3'))
+    load = Loader()
+    first = cache.get_or_load(KIND_SPECS, SPECS_URL, load)
+
+    assert cache.get_or_load(KIND_SPECS, SPECS_URL, load) is first
+    assert load.calls == 1
+    assert cache.stats['memory_hits'] == 1
+    cache.close()
+
+
+def test_kinds_are_separate_keys():
+    cache = ParseCache()
+    cache.get_or_load(KIND_SPECS, SPECS_URL, lambda: 'specs')
+    assert cache.get_or_load(KIND_COMPONENTS, SPECS_URL, lambda: 'components') == 'components'
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = ParseCache(path)
+    cache.get_or_load(KIND_SPECS, SPECS_URL, Loader())
+    cache.close()
+
+    cache = ParseCache(path)
+    load = Loader()
+    assert cache.get_or_load(KIND_SPECS, SPECS_URL, load) == {'url': SPECS_URL, 'rows': [1, 2, 3]}
+    assert load.calls == 0
+    assert cache.stats['disk_hits'] == 1
+    cache.close()
+
+
+def test_ttl_expires_both_tiers(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite3')
+    cache = ParseCache(path, ttl_seconds=60)
+    load = Loader()
+    cache.get_or_load(KIND_SPECS, SPECS_URL, load)
+
+    clock[0] += 59
+    cache.get_or_load(KIND_SPECS, SPECS_URL, load)
+    assert load.calls == 1
+
+    clock[0] += 2
+    cache.get_or_load(KIND_SPECS, SPECS_URL, load)
+    assert load.calls == 2
+    cache.close()
+
+    # Entries older than the TTL are dropped when the file is opened again
+    clock[0] += 61
+    cache = ParseCache(path, ttl_seconds=60)
+    assert cache.disk_bytes == 0
+    cache.close()
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ParseCache(memory_entries=2)
+    loads = {url: Loader() for url in 'abc'}
+    cache.get_or_load(KIND_SPECS, 'a', loads['a'])
+    cache.get_or_load(KIND_SPECS, 'b', loads['b'])
+    cache.get_or_load(KIND_SPECS, 'a', loads['a'])
+    cache.get_or_load(KIND_SPECS, 'c', loads['c'])
+
+    cache.get_or_load(KIND_SPECS, 'a', loads['a'])
+    cache.get_or_load(KIND_SPECS, 'b', loads['b'])
+    assert loads['a'].calls == 1
+    assert loads['b'].calls == 2
+
+
+def test_disk_tier_evicts_to_max_bytes(tmp_path, clock):
+    value = 'x' * 100
+    cache = ParseCache(str(tmp_path / 'cache.sqlite3'), memory_entries=1, max_bytes=250)
+    for url in ('a', 'b', 'c'):
+        clock[0] += 1
+        cache.get_or_load(KIND_SPECS, url, lambda: value)
+
+    assert cache.disk_bytes <= 250
+    keys = [row[0] for row in cache.conn.execute("SELECT key FROM entries ORDER BY key")]
+    assert keys == [f"{KIND_SPECS} b", f"{KIND_SPECS} c"]
+    cache.close()
+
+
+def test_values_larger_than_the_disk_tier_stay_in_memory(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache.sqlite3'), max_bytes=10)
+    cache.get_or_load(KIND_SPECS, SPECS_URL, lambda: 'y' * 100)
+    assert cache.disk_bytes == 0
+    assert cache.get_or_load(KIND_SPECS, SPECS_URL, Loader()) == 'y' * 100
+    cache.close()
+
+
+def test_none_is_not_cached():
+    cache = ParseCache()
+    assert cache.get_or_load(KIND_SPECS, SPECS_URL, lambda: None) is None
+    assert cache.get_or_load(KIND_SPECS, SPECS_URL, lambda: 'loaded') == 'loaded'
+
+
+def test_single_flight(tmp_path):
+    cache = ParseCache(str(tmp_path / 'cache.sqlite3'))
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_load():
+        calls.append(threading.current_thread().name)
+        started.set()
+        release.wait(5)
+        return ['component']
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load(KIND_COMPONENTS, 'set', slow_load)))
+               for _ in range(8)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while cache.stats['shared_loads'] < 7:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [['component']] * 8
+    cache.close()
+
+
+def test_single_flight_shares_the_exception():
+    cache = ParseCache()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing_load():
+        started.set()
+        release.wait(5)
+        raise ValueError("page changed")
+
+    errors = []
+
+    def get():
+        try:
+            cache.get_or_load(KIND_SPECS, SPECS_URL, failing_load)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=get)
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=get)
+    waiter.start()
+    while cache.stats['shared_loads'] < 1:
+        time.sleep(0.01)
+    release.set()
+    leader.join(5)
+    waiter.join(5)
+
+    assert errors == ["page changed"] * 2
+    assert cache.get_or_load(KIND_SPECS, SPECS_URL, lambda: 'retried') == 'retried'
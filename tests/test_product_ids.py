@@ -0,0 +1,118 @@
+"""ProductIdClassifier against the per-call lookups it replaced"""
+
+import random
+import re
+
+import pytest
+
+import page_parsers
+import product_ids
+from conftest import BASE_URL
+from product_ids import ProductIdClassifier
+
+
+def legacy_color_name(color_codes, product_id):
+    """The regex scan CrawlEngine.get_color_name_from_product_id ran on every call"""
+    if not product_id or not color_codes:
+        return ""
+    for pattern in [r'#([A-Z0-9]+)', r'([A-Z0-9]+)$']:
+        for match in re.findall(pattern, product_id):
+            if f"#{match}" in color_codes:
+                return color_codes[f"#{match}"]
+    return ""
+
+
+def legacy_manufacturer(product_id):
+    if product_id.startswith('LIXIL') or product_id.startswith('INAX'):
+        return "LIXIL（リクシル）"
+    return "TOTO（トートー）"
+
+
+def legacy_series(product_name):
+    if not product_name:
+        return "Unknown Series"
+    for keyword, series in [("アプリコット", "アプリコットシリーズ"), ("ネオレスト", "ネオレストシリーズ"),
+                            ("サティス", "サティスシリーズ"), ("パブリック", "パブリック向ウォシュレット")]:
+        if keyword in product_name:
+            return series
+    return "Unknown Series"
+
+
+@pytest.fixture(scope='module')
+def color_codes():
+    return product_ids.load_color_codes()
+
+
+@pytest.fixture(scope='module')
+def classifier(color_codes):
+    return ProductIdClassifier(color_codes)
+
+
+def sample_ids(color_codes, ref_soup):
+    codes = sorted(color_codes)
+    ids = [p.product_id for name in ('search_results', 'color_variations')
+           for p in page_parsers.parse_search_results(ref_soup(name), BASE_URL)]
+    ids += [c['component_id'] for c in page_parsers.parse_components(ref_soup('components'))]
+    ids += ['', 'TCF5831ADYR', 'LIXIL-ABC#NW1', 'INAX123', 'X#', '#', 'A#NW1#SC1', 'A#ZZZ#SC1', 'a#nw1']
+    rng = random.Random(0)
+    for _ in range(3000):
+        base = rng.choice(['TCF5831ADYR', 'CS902B', 'TCA573', 'CS921BF', 'INAX1', 'X'])
+        code = rng.choice(codes)
+        ids.append(rng.choice([
+            f"{base}{code}",
+            f"{base}{code[1:]}",
+            f"{base}-{code[1:]}",
+            f"{base}{code}{rng.choice(['', 'A', '#1', '_2'])}",
+            f"{base}#{rng.choice(['Q9', 'ZZ1', '1'])}{code[1:]}",
+        ]))
+    return ids
+
+
+def test_color_names_match_legacy_lookup(color_codes, classifier, ref_soup):
+    for product_id in sample_ids(color_codes, ref_soup):
+        assert classifier.classify(product_id).color_name == legacy_color_name(color_codes, product_id), product_id
+
+
+def test_classify_fields(classifier, color_codes):
+    info = classifier.classify('TCF5831ADYR#SC1', 'ウォシュレット ネオレスト')
+    assert info.product_id == 'TCF5831ADYR#SC1'
+    assert info.base_id == 'TCF5831ADYR'
+    assert info.color_code == '#SC1'
+    assert info.color_name == color_codes['#SC1']
+    assert info.manufacturer == legacy_manufacturer('TCF5831ADYR#SC1')
+    assert info.series == 'ネオレストシリーズ'
+
+    plain = classifier.classify('CS902B')
+    assert (plain.base_id, plain.color_code, plain.color_name) == ('CS902B', '', '')
+
+
+@pytest.mark.parametrize('product_id', ['TCF1', 'TCA1', 'TOTO1', 'LIXIL1', 'INAX1', 'X', ''])
+def test_manufacturer_matches_legacy(product_id):
+    assert product_ids.manufacturer_for(product_id) == legacy_manufacturer(product_id)
+
+
+@pytest.mark.parametrize('product_name', ['', None, 'アプリコットF3', 'ネオレスト', 'サティスS', 'パブリック', 'ネオレスト サティス', '便器'])
+def test_series_matches_legacy(product_name):
+    assert product_ids.series_for(product_name) == legacy_series(product_name)
+
+
+def test_format_with_color(classifier, color_codes):
+    assert classifier.format_with_color('CS921BF#NG2') == f"CS921BF#NG2({color_codes['#NG2']})"
+    assert classifier.format_with_color('CS902B') == 'CS902B'
+
+
+def test_classify_is_cached(classifier):
+    assert classifier.classify('TCF5831ADYR#NW1') is classifier.classify('TCF5831ADYR#NW1')
+
+
+def test_classify_many(classifier):
+    ids = ['TCF5831ADYR#NW1', 'CS902B', 'TCF5831ADYR#NW1']
+    names = ['ネオレスト', '', 'ネオレスト']
+    assert classifier.classify_many(ids, names) == [classifier.classify(i, n) for i, n in zip(ids, names)]
+    assert classifier.classify_many(ids) == [classifier.classify(i) for i in ids]
+
+
+def test_empty_color_codes():
+    classifier = ProductIdClassifier({})
+    assert classifier.classify('TCF5831ADYR#NW1').color_name == ''
+    assert classifier.format_with_color('TCF5831ADYR#NW1') == 'TCF5831ADYR#NW1'
@@ -0,0 +1,85 @@
+"""TemplateRenderer output against pages rendered by the old generate_* methods
+
+tests/expected/ holds the template and Rakuten pages that the string
+concatenation generate_*_html methods of CrawlEngine produced for the ref/
+fixtures before TemplateRenderer replaced them.
+"""
+
+import os
+
+import pytest
+
+import page_parsers
+from conftest import BASE_URL, read_expected
+from product_ids import ProductIdClassifier, load_color_codes
+from template_renderer import TemplateRenderer, compile_template, escape_html, render_plan
+
+RAKUTEN_ROWS = [
+    {'section': '寸法', 'item': '幅', 'primary_value': '400mm', 'secondary_value': ''},
+    {'section': '寸法', 'item': '奥行', 'primary_value': '650mm', 'secondary_value': '<注>'},
+    {'section': '電気', 'item': '電源', 'primary_value': 'AC100V', 'secondary_value': '50/60Hz'},
+]
+
+
+@pytest.fixture(scope='module')
+def renderer():
+    return TemplateRenderer(ProductIdClassifier(load_color_codes()).format_with_color)
+
+
+@pytest.fixture
+def full_args(ref_soup):
+    specs = {
+        'table_data': page_parsers.parse_table_data(page_parsers.find_specs_table(ref_soup('specs'))),
+        'features_data': page_parsers.parse_features_data(ref_soup('features')),
+    }
+    product = page_parsers.parse_search_results(ref_soup('color_variations'), BASE_URL)[1]
+    components = page_parsers.parse_components(ref_soup('components'))
+    return (specs, product.product_id, product.product_name, "TOTO（トートー）", "ネオレストシリーズ", components, True)
+
+
+EMPTY_ARGS = (None, 'CS902B', '： ウォシュレット一体形便器ネオレスト', "TOTO（トートー）", "Unknown Series", None, False)
+
+
+def test_template_matches_old_output(renderer, full_args):
+    assert renderer.render_template(*full_args) == read_expected('template_full.html')
+
+
+def test_template_without_data_matches_old_output(renderer):
+    assert renderer.render_template(*EMPTY_ARGS) == read_expected('template_empty.html')
+
+
+def test_rakuten_matches_old_output(renderer):
+    assert "".join(renderer.rakuten_parts(RAKUTEN_ROWS, 'TCF5831ADYR#SC1')) == read_expected('rakuten.html')
+
+
+def test_template_streamed_to_file(renderer, full_args, tmp_path):
+    path = renderer.render_template_to_file(str(tmp_path / 'template.html'), *full_args)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        assert f.read() == read_expected('template_full.html')
+
+
+def test_render_many(renderer, full_args, tmp_path):
+    specs, product_id, product_name, manufacturer, series, components, has_components = full_args
+    records = [
+        dict(specs_data=specs, product_id=product_id, product_name=product_name, manufacturer=manufacturer,
+             series=series, components=components, has_components=has_components),
+        dict(specs_data=None, product_id='CS902B', product_name='： ウォシュレット一体形便器ネオレスト',
+             manufacturer="TOTO（トートー）", series="Unknown Series"),
+    ]
+    paths = renderer.render_many(records, output_dir=str(tmp_path))
+
+    assert paths[0] == os.path.join(str(tmp_path), product_id, f"{product_id}_template.html")
+    with open(paths[1], 'r', encoding='utf-8', newline='') as f:
+        assert f.read() == read_expected('template_empty.html')
+
+
+def test_engine_delegates_to_renderer(engine, full_args):
+    assert engine.generate_template_html(*full_args) == read_expected('template_full.html')
+    assert engine.generate_rakuten_html(RAKUTEN_ROWS, 'TCF5831ADYR#SC1') == read_expected('rakuten.html')
+
+
+def test_compiled_plan():
+    parts = []
+    render_plan(compile_template("<p>{a}</p>{b}\n"), {'a': 'x', 'b': ['1', '2']}, parts.append)
+    assert "".join(parts) == "<p>x</p>12\n"
+    assert escape_html('<a href="x">&</a>') == '&lt;a href="x"&gt;&amp;&lt;/a&gt;'
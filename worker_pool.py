@@ -0,0 +1,92 @@
+"""
+Pool of browser workers for processing products in parallel
+"""
+
+import queue
+import threading
+
+
+class ProductWorkerPool:
+    """Process product records on several independent Chrome sessions.
+
+    Each worker owns its own WebDriver and pulls product records from a shared
+    queue. Records are ProductRecords, which only carry URLs and text, so any
+    browser can process them.
+    """
+
+    def __init__(self, crawler, worker_count):
+        self.crawler = crawler
+        self.worker_count = worker_count
+        self.tasks = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.downloaded_count = 0
+
+    def start(self):
+        """Start the worker threads"""
+        self.crawler.log_and_update(f"Starting {self.worker_count} browser workers...")
+        for index in range(self.worker_count):
+            thread = threading.Thread(target=self._worker_loop, args=(index + 1,))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, product):
+        """Queue a product record for processing"""
+        self.tasks.put(product)
+
+    def join(self, fallback_driver=None):
+        """Wait for all queued products and return how many downloaded something.
+
+        Products left in the queue because no worker could start a browser are
+        processed on fallback_driver, if one is given.
+        """
+        for _ in self.threads:
+            self.tasks.put(None)
+        for thread in self.threads:
+            thread.join()
+
+        leftovers = []
+        while True:
+            try:
+                product = self.tasks.get_nowait()
+            except queue.Empty:
+                break
+            if product is not None:
+                leftovers.append(product)
+
+        if leftovers:
+            self.crawler.log_and_update(f"{len(leftovers)} products were not picked up by workers.")
+            if fallback_driver is not None:
+                for product in leftovers:
+                    if self.crawler.process_product_diagrams(fallback_driver, product):
+                        self.downloaded_count += 1
+
+        return self.downloaded_count
+
+    def _worker_loop(self, worker_id):
+        log = self.crawler.log_and_update
+        driver = None
+        try:
+            try:
+                driver = self.crawler.acquire_driver()
+                log(f"Worker {worker_id}: browser ready.")
+            except Exception as e:
+                log(f"Worker {worker_id}: could not start browser: {str(e)}")
+                return
+
+            while True:
+                product = self.tasks.get()
+                if product is None:
+                    break
+                try:
+                    log(f"Worker {worker_id}: processing {product['product_id']}")
+                    if self.crawler.process_product_diagrams(driver, product):
+                        with self.lock:
+                            self.downloaded_count += 1
+                except Exception as e:
+                    log(f"Worker {worker_id}: error processing {product.get('product_id', 'unknown')}: {str(e)}")
+        finally:
+            if driver:
+                self.crawler.release_driver(driver)
+            log(f"Worker {worker_id}: finished.")